@@ -0,0 +1,225 @@
+"""
+batch_cli.py
+
+无界面的批量坐标提取命令行工具（与 main.py 并列，不依赖 Qt）：
+-   输入 DOM、可选 DSM 以及测点文件（CSV / GeoJSON，像素坐标或投影坐标）
+-   输出与界面“导出坐标”相同格式的普查坐标 CSV（度分秒经纬度、DSM 海拔）
+-   多个遗址可写入清单文件，按遗址分配到多个进程并行处理
+
+用法：
+    python batch_cli.py --dom dom.tif --dsm dsm.tif --points points.csv -o 坐标.csv
+    python batch_cli.py --manifest sites.csv --workers 8
+
+测点 CSV 需含 x,y（投影坐标）或 col,row（像素坐标）列，可选 type、desc 列；
+GeoJSON 取 Point 要素的坐标，属性中可选 type、desc。
+清单 CSV 每行一个遗址，列为 dom, dsm, points, output（dsm、output 可留空）。
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# 测点文件中可识别的列名
+_MAP_COLUMNS = ("x", "y")
+_PIXEL_COLUMNS = ("col", "row")
+
+
+def read_points(points_path, coord_mode="auto"):
+    """
+    读取测点文件，返回 (xs, ys, types, descs, mode)。
+    mode 为 "map"（投影坐标）或 "pixel"（像素坐标）；
+    coord_mode 为 auto 时，CSV 按列名判断，GeoJSON 视为投影坐标。
+    """
+    ext = os.path.splitext(points_path)[1].lower()
+    xs, ys, types, descs = [], [], [], []
+
+    if ext in (".geojson", ".json"):
+        with open(points_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        features = data.get("features", [data] if data.get("type") == "Feature" else [])
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                continue
+            props = feature.get("properties") or {}
+            x, y = geometry["coordinates"][:2]
+            xs.append(float(x))
+            ys.append(float(y))
+            types.append(str(props.get("type", "")))
+            descs.append(str(props.get("desc", "")))
+        mode = "map" if coord_mode == "auto" else coord_mode
+    else:
+        with open(points_path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            fields = [name.strip().lower() for name in (reader.fieldnames or [])]
+            if coord_mode == "auto":
+                if all(c in fields for c in _PIXEL_COLUMNS):
+                    mode = "pixel"
+                elif all(c in fields for c in _MAP_COLUMNS):
+                    mode = "map"
+                else:
+                    raise ValueError(f"{points_path} 缺少 x,y 或 col,row 列")
+            else:
+                mode = coord_mode
+            x_key, y_key = _PIXEL_COLUMNS if mode == "pixel" else _MAP_COLUMNS
+            for raw in reader:
+                row = {k.strip().lower(): (v or "").strip() for k, v in raw.items() if k}
+                if not row.get(x_key) or not row.get(y_key):
+                    continue
+                xs.append(float(row[x_key]))
+                ys.append(float(row[y_key]))
+                types.append(row.get("type", ""))
+                descs.append(row.get("desc", ""))
+
+    return np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64), types, descs, mode
+
+
+def _sample_altitudes(dataset, xs, ys):
+    """在投影坐标 (xs, ys) 处批量采样高程，按该数据集自身的仿射变换换算像素位置"""
+    from elevation_sampler import ElevationSampler
+
+    cols, rows = ~dataset.transform * (xs, ys)
+    return ElevationSampler(dataset).sample_many(cols, rows)
+
+
+def process_site(dom_path, points_path, out_path, dsm_path=None, coord_mode="auto",
+                 src_crs="EPSG:4548", dst_crs="EPSG:4490"):
+    """
+    处理一个遗址：读取测点 -> 换算经纬度（度分秒）-> 采样海拔 -> 写出坐标 CSV。
+    海拔规则与界面拾取一致：优先取 DSM，无 DSM 或无有效值时取 DOM 第一波段，仍无则为 0。
+    :return: (out_path, 测点数量)
+    """
+    import rasterio
+    from orthophoto_utils import (
+        pixels_to_map, get_transformer, decimal_degrees_to_dms_batch, export_csv
+    )
+
+    xs, ys, types, descs, mode = read_points(points_path, coord_mode)
+    with rasterio.open(dom_path) as dom:
+        if mode == "pixel":
+            xs, ys = pixels_to_map(xs, ys, dom.transform)
+        lons, lats = get_transformer(src_crs, dst_crs).transform(xs, ys)
+
+        alts = np.full(xs.shape, np.nan)
+        if dsm_path:
+            with rasterio.open(dsm_path) as dsm:
+                alts = _sample_altitudes(dsm, xs, ys)
+        missing = np.isnan(alts) | (alts == 0)
+        if missing.any():
+            alts[missing] = _sample_altitudes(dom, xs[missing], ys[missing])
+    alts = np.nan_to_num(alts, nan=0.0)
+
+    # 与 CoordinatePicker 一致：度分秒字符串去掉方位字母
+    lon_dms = [s[:-1] for s in decimal_degrees_to_dms_batch(lons, is_lat=False)]
+    lat_dms = [s[:-1] for s in decimal_degrees_to_dms_batch(lats, is_lat=True)]
+
+    coords = [
+        {"index": i + 1, "type": t, "lat": lat, "lon": lon, "alt": round(alt, 3), "desc": d}
+        for i, (t, lat, lon, alt, d) in enumerate(zip(types, lat_dms, lon_dms, alts.tolist(), descs))
+    ]
+    export_csv(coords, out_path)
+    return out_path, len(coords)
+
+
+def read_manifest(manifest_path):
+    """
+    读取遗址清单，返回 process_site 的参数字典列表。
+    相对路径以清单文件所在目录为基准；output 为空时输出到测点文件旁的 *_坐标.csv。
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+
+    def resolve(path):
+        return os.path.join(base, path) if path and not os.path.isabs(path) else path
+
+    sites = []
+    with open(manifest_path, "r", newline="", encoding="utf-8-sig") as f:
+        for raw in csv.DictReader(f):
+            row = {k.strip().lower(): (v or "").strip() for k, v in raw.items() if k}
+            if not row.get("dom") or not row.get("points"):
+                continue
+            points = resolve(row["points"])
+            sites.append({
+                "dom_path": resolve(row["dom"]),
+                "dsm_path": resolve(row.get("dsm")) or None,
+                "points_path": points,
+                "out_path": resolve(row.get("output")) or default_output(points),
+            })
+    return sites
+
+
+def default_output(points_path):
+    return os.path.splitext(points_path)[0] + "_坐标.csv"
+
+
+def run_sites(sites, workers=None, coord_mode="auto"):
+    """
+    在进程池中并行处理多个遗址，逐个打印结果。
+    :return: 失败的遗址数量
+    """
+    failed = 0
+    if len(sites) == 1 or workers == 1:
+        for site in sites:
+            failed += _run_one(site, coord_mode)
+        return failed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_site, coord_mode=coord_mode, **site): site for site in sites}
+        for future in as_completed(futures):
+            site = futures[future]
+            try:
+                out_path, count = future.result()
+                print(f"[完成] {site['points_path']} -> {out_path}（{count} 个测点）")
+            except Exception as e:
+                failed += 1
+                print(f"[失败] {site['points_path']}：{e}", file=sys.stderr)
+    return failed
+
+
+def _run_one(site, coord_mode):
+    try:
+        out_path, count = process_site(coord_mode=coord_mode, **site)
+        print(f"[完成] {site['points_path']} -> {out_path}（{count} 个测点）")
+        return 0
+    except Exception as e:
+        print(f"[失败] {site['points_path']}：{e}", file=sys.stderr)
+        return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量提取普查坐标（无界面）")
+    parser.add_argument("--dom", help="DOM 文件路径")
+    parser.add_argument("--dsm", help="DSM 文件路径（可选）")
+    parser.add_argument("--points", help="测点文件（CSV 或 GeoJSON）")
+    parser.add_argument("-o", "--output", help="输出坐标 CSV 路径")
+    parser.add_argument("--manifest", help="遗址清单 CSV（列：dom, dsm, points, output）")
+    parser.add_argument("--coords", choices=("auto", "map", "pixel"), default="auto",
+                        help="测点坐标类型：投影坐标 map / 像素坐标 pixel，默认按列名判断")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数，默认为 CPU 核数")
+    args = parser.parse_args(argv)
+
+    if args.manifest:
+        sites = read_manifest(args.manifest)
+    elif args.dom and args.points:
+        sites = [{
+            "dom_path": args.dom,
+            "dsm_path": args.dsm,
+            "points_path": args.points,
+            "out_path": args.output or default_output(args.points),
+        }]
+    else:
+        parser.error("需要 --manifest，或同时提供 --dom 与 --points")
+
+    if not sites:
+        print("清单中没有可处理的遗址", file=sys.stderr)
+        return 1
+    failed = run_sites(sites, workers=args.workers, coord_mode=args.coords)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import os
 import sys
 
+from thumbnail_cache import LazyThumbnailLoader
+
 def resource_path(relative_path):
     """获取资源的绝对路径"""
     try:
@@ -66,98 +67,16 @@ def generate_description():
          文物整体坐【文物整体坐】朝【文物整体朝】，
          现存【现存1】、【现存2】、【现存3】、【现存4】、【现存5】。
       ② 原有描述部分。
+    生成规则见 description_engine，这里只收集界面输入。
     """
-    # ---------------- 描述栏部分 ----------------
-    relic_name = var_relic_name.get().strip()
-    town = var_town.get().strip()
-    village = var_village.get().strip()
-    rel_loc = var_relative_location.get().strip()
-    rel_zuo = var_rel_zuo.get().strip()
-    rel_chao = var_rel_chao.get().strip()
-    yard_layout = var_yard_layout.get().strip()
-    yard_length = var_yard_length.get().strip()
-    yard_width = var_yard_width.get().strip()
-    area = var_area.get().strip()
-    existing1 = var_existing1.get().strip()
-    existing2 = var_existing2.get().strip()
-    existing3 = var_existing3.get().strip()
-    existing4 = var_existing4.get().strip()
-    existing5 = var_existing5.get().strip()
-
-    if not relic_name:
-        result_var.set("请输入文物名称（描述栏）！")
-        return
+    from description_engine import BUILDING_FIELDS, generate_building_description
 
-    desc_header = (
-        f"【{relic_name}】位于山东省嘉祥县{town}镇{village}村{rel_loc}，"
-        f"文物整体坐{rel_zuo}朝{rel_chao}，"
-    )
-
-    if yard_layout or yard_length or yard_width or area:
-        desc_header += f"{yard_layout}院落布局，院落长{yard_length}米，宽{yard_width}米，占地面积{area}平方米。"
-
-    desc_header += f"现存{existing1}、{existing2}、{existing3}、{existing4}、{existing5}。"
-
-    # ---------------- 原有描述部分 ----------------
-    eaves_layer_val = var_eaves_layer.get()        # 单檐/重檐
-    M = var_zuo.get().strip()                      # 坐
-    N = var_chao.get().strip()                     # 朝
-    O = var_length.get().strip()                   # 长
-    P = var_width_val.get().strip()                # 宽
-    Q = var_height.get().strip()                   # 高
-    A = var_name.get().strip()                     # 建筑名称
-
-    B = var_roof.get()                  # 房顶整体形制
-    C = var_shape.get()                 # 平面形状
-    E = var_tile_material.get()         # 瓦面材质
-    F = var_tile_layout.get()           # 瓦作铺设
-    D = var_structure.get()             # 正身构架
-    G = var_width_int.get()             # 面阔(几间)
-    H = var_depth_int.get()             # 进深(几椽)
-
-    ceiling_val = var_ceiling.get()               # 天花
-    seg_choice = var_wall_segment.get()           # 墙体是否分段
-    if seg_choice == "不分段":
-        wall_desc = var_wall_not_div.get()
-        wall_desc_final = f"{wall_desc}"
-    else:
-        up_val = var_wall_up.get()
-        down_val = var_wall_down.get()
-        wall_desc_final = f"上身{up_val}，下碱{down_val}"
-
-    eave_exposed_val = var_eave_exposed.get()  # 露檐
-    door_val = var_door_style.get()            # 门形制
-    window_pos_val = var_window_position.get() # 窗位置
-    window_style_val = var_window_style.get()  # 窗形制
-    floor_val = var_floor.get()                # 地面
-
-    I = var_base.get()                 # 台基类别
-    J = var_base_plan.get()            # 台基平面形状
-    K = var_step_style.get()           # 台阶式样
-    L = var_step_arrange_num.get()     # 台阶布置数量
-    drain_val = var_drain.get()        # 散水
-
-    line1 = (
-        f"{A}为{eaves_layer_val}{B}顶建筑，"
-        f"坐{M}朝{N}，{C}平面布局。"
-    )
-    line2 = f"长{O}米，宽{P}米，高（到正脊上皮）{Q}米。"
-    line3 = f"{E}{F}铺设屋面。"
-    line4 = f"{D}构架，面阔{G}间，进深{H}椽。"
-    line5 = f"{ceiling_val}，墙体{wall_desc_final}，{eave_exposed_val}。"
-    line6 = f"建筑正面明辟{door_val}，{window_pos_val}设{window_style_val}，{floor_val}。"
-    line7 = ""
-    if I != "无":
-        if K != "无":
-            line7 = f"{I}台基，{J}平面布局，{L}{K}，{drain_val}。"
-        else:
-            line7 = f"{I}台基，{J}平面布局，{drain_val}。"
-    else:
-        line7 = f"{drain_val}。"
-
-    original_desc = "".join([line1, line2, line3, line4, line5, line6, line7]).strip()
-
-    final_description = desc_header + "\n" + original_desc
+    record = {key: globals()["var_" + key].get() for key, _, _ in BUILDING_FIELDS}
+    try:
+        final_description = generate_building_description(record)
+    except ValueError as e:
+        result_var.set(str(e))
+        return
     result_var.set(final_description)
     char_count_var.set(f"字数：{len(final_description)}")
 
@@ -193,23 +112,16 @@ def _bound_to_mousewheel(event):
     _bind_mousewheel(root)
 def _unbound_to_mousewheel(event):
     _unbind_mousewheel(root)
-def resize_image(image_path, width=80, height=80):
-    """调整图片大小"""
-    try:
-        # 使用resource_path获取图片的绝对路径
-        abs_path = resource_path(image_path)
-        original_img = Image.open(abs_path)
-        resized_img = original_img.resize((width, height), Image.Resampling.LANCZOS)
-        return ImageTk.PhotoImage(resized_img)
-    except Exception as e:
-        print(f"Error loading image {image_path}: {e}")
-        return None
 
 # ----------------------------------------------------
 # 主窗口
 # ----------------------------------------------------
-def main():
-    """程序入口点"""
+def main(master=None):
+    """
+    程序入口点
+    :param master: 为 None 时独立运行（创建 Tk 并进入主循环）；
+                   否则在 master 下创建 Toplevel 并立即返回，由调用方的事件循环驱动
+    """
     global root, scrollable_canvas, form_frame
     global char_count_var, result_var
     global var_relic_name, var_town, var_village, var_relative_location
@@ -225,7 +137,7 @@ def main():
     global var_base, var_base_plan, var_step_style
     global var_step_arrange_num, var_drain
 
-    root = tk.Tk()
+    root = tk.Tk() if master is None else tk.Toplevel(master)
     root.title("古建筑描述生成器")
     root.geometry("1500x1000")
 
@@ -295,12 +207,20 @@ def main():
     scrollbar = ttk.Scrollbar(left_frame, orient="vertical", command=scrollable_canvas.yview)
     scrollbar.pack(side="right", fill="y")
     scrollable_canvas.pack(side="left", fill="both", expand=True)
-    scrollable_canvas.configure(yscrollcommand=scrollbar.set)
+
+    # 参考图片按需加载：滚动到可见范围时才读取缩略图
+    thumbnails = LazyThumbnailLoader(scrollable_canvas)
+
+    def on_yscroll(first, last):
+        scrollbar.set(first, last)
+        thumbnails.load_visible()
+    scrollable_canvas.configure(yscrollcommand=on_yscroll)
     form_frame = ttk.Frame(scrollable_canvas)
     scrollable_canvas.create_window((0, 0), window=form_frame, anchor="nw")
 
     def on_configure(event):
         scrollable_canvas.configure(scrollregion=scrollable_canvas.bbox("all"))
+        scrollable_canvas.after_idle(thumbnails.load_visible)
     form_frame.bind("<Configure>", on_configure)
     form_frame.bind("<Enter>", _bound_to_mousewheel)
     form_frame.bind("<Leave>", _unbound_to_mousewheel)
@@ -502,12 +422,9 @@ def main():
     for i, option in enumerate(tile_layouts):
         rbtn = ttk.Radiobutton(frame_tile_layout, text=option, variable=var_tile_layout, value=option)
         rbtn.grid(row=0, column=i, padx=5, pady=3, sticky="W")
-        img_path = os.path.join('pic', f'tile_{option}.png')
-        img = resize_image(img_path)
-        if img:
-            label_img = ttk.Label(frame_tile_layout, image=img)
-            label_img.image = img
-            label_img.grid(row=1, column=i, padx=5, pady=3)
+        label_img = ttk.Label(frame_tile_layout, image=thumbnails.placeholder)
+        label_img.grid(row=1, column=i, padx=5, pady=3)
+        thumbnails.add(label_img, resource_path(os.path.join('pic', f'tile_{option}.png')))
     row_index += 1
 
     label_roof = ttk.Label(form_frame, text="房顶整体形制：", font=("kaiti", 12))
@@ -518,12 +435,9 @@ def main():
         col_idx = i % 5
         rbtn = ttk.Radiobutton(frame_roof, text=option, variable=var_roof, value=option)
         rbtn.grid(row=0, column=col_idx, padx=5, pady=3, sticky="W")
-        img_path = os.path.join('pic', f'roof_{option}.png')
-        img = resize_image(img_path)
-        if img:
-            label_img = ttk.Label(frame_roof, image=img)
-            label_img.image = img
-            label_img.grid(row=1, column=col_idx, padx=5, pady=3)
+        label_img = ttk.Label(frame_roof, image=thumbnails.placeholder)
+        label_img.grid(row=1, column=col_idx, padx=5, pady=3)
+        thumbnails.add(label_img, resource_path(os.path.join('pic', f'roof_{option}.png')))
     row_index += 1
 
     label_structure = ttk.Label(form_frame, text="正身构架：", font=("kaiti", 12))
@@ -538,12 +452,9 @@ def main():
             row_count += 1
         rbtn = ttk.Radiobutton(frame_structure, text=option, variable=var_structure, value=option)
         rbtn.grid(row=row_count*2, column=col_idx, padx=5, pady=3, sticky="W")
-        img_path = os.path.join('pic', f'structure_{option}.png')
-        img = resize_image(img_path)
-        if img:
-            label_img = ttk.Label(frame_structure, image=img)
-            label_img.image = img
-            label_img.grid(row=row_count*2+1, column=col_idx, padx=5, pady=3)
+        label_img = ttk.Label(frame_structure, image=thumbnails.placeholder)
+        label_img.grid(row=row_count*2+1, column=col_idx, padx=5, pady=3)
+        thumbnails.add(label_img, resource_path(os.path.join('pic', f'structure_{option}.png')))
     row_index += 1
 
     label_width_int = ttk.Label(form_frame, text="面阔(几间)：", font=("kaiti", 12))
@@ -689,12 +600,9 @@ def main():
     for i, option in enumerate(step_style_options):
         rbtn = ttk.Radiobutton(frame_step_style, text=option, variable=var_step_style, value=option)
         rbtn.grid(row=0, column=i, padx=5, pady=3, sticky="W")
-        img_path = os.path.join('pic', f'step_{option}.png')
-        img = resize_image(img_path)
-        if img:
-            label_img = ttk.Label(frame_step_style, image=img)
-            label_img.image = img
-            label_img.grid(row=1, column=i, padx=5, pady=3)
+        label_img = ttk.Label(frame_step_style, image=thumbnails.placeholder)
+        label_img.grid(row=1, column=i, padx=5, pady=3)
+        thumbnails.add(label_img, resource_path(os.path.join('pic', f'step_{option}.png')))
     row_index += 1
 
     label_step_arrange_num = ttk.Label(form_frame, text="台阶布置(数量)：", font=("kaiti", 12))
@@ -735,7 +643,9 @@ def main():
     # ----------------------------------------------------
     # 启动主循环
     # ----------------------------------------------------
-    root.mainloop()
+    if master is None:
+        root.mainloop()
+    return root
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -8,14 +8,18 @@ CAD绘图模块，提供基本的绘图功能，包括：
 4. 直线删除功能
 5. 颜色选择功能
 6. 坐标标注功能（仅蓝色线条显示）
+7. 吸附与删除拾取基于网格空间索引，耗时与图中线段数量无关
+8. 全部直线由一个 LineCollection 绘制（vector_layers.SegmentLayer），端点与颜色存于数组
 """
 
+import bisect
+
 import numpy as np
+from matplotlib.colors import to_hex
 from matplotlib.lines import Line2D
-import matplotlib.pyplot as plt
-from PIL import Image
-import io
 from orthophoto_utils import decimal_degrees_to_dms, transform_coordinate
+from spatial_index import SegmentGridIndex
+from vector_layers import SegmentLayer
 
 class CADDrawer:
     def __init__(self, canvas):
@@ -26,9 +30,15 @@ class CADDrawer:
         self.current_shape = None
         self.start_point = None
         self.end_point = None
-        self.shapes = []  # 存储所有绘制的图形
+        self.lines = SegmentLayer(self.ax, linewidths=1)  # 所有直线
         self.coord_labels = []  # 存储坐标标注
         self.snap_threshold = 10  # 自动吸附阈值（像素）
+        self.segment_index = SegmentGridIndex(cell_size=64)  # 线段空间索引
+        # 直线序号 -> 空间索引 key（删除直线后序号前移，key 不变）。
+        # key 按添加顺序递增、删除不改变其余直线的先后，列表始终有序，由 key 查序号用二分查找
+        self._keys = []
+        self._next_key = 0
+        self.canvas.add_view_listener(self.lines.ensure_attached)
         self.is_first_click = True  # 标记是否是第一次点击
         self.temp_line = None  # 临时直线对象
         self.current_color = '#0000FF'  # 默认蓝色
@@ -43,7 +53,11 @@ class CADDrawer:
         self.current_mode = None
         self.current_line = None
         self.cutting_line = None
-        self._connect_events()
+        self.on_change = None  # 要素变化回调 (操作, 图层, 数据)，由主窗口设置（自动保存）；批量导入时操作为 add_many
+        self.canvas.tool_router.register(
+            'cad', on_press=self.on_press, on_motion=self.on_motion,
+            on_deactivate=self._on_deactivate
+        )
         
     def set_color(self, color_name):
         """设置当前绘图颜色"""
@@ -52,8 +66,7 @@ class CADDrawer:
         
     def set_visibility(self, visible):
         """设置CAD图层的可见性"""
-        for shape in self.shapes:
-            shape.set_visible(visible)
+        self.lines.set_visible(visible)
         if self.temp_line:
             self.temp_line.set_visible(visible)
         for label in self.coord_labels:
@@ -62,23 +75,22 @@ class CADDrawer:
         
     def start_line_mode(self):
         """开始直线绘制模式"""
-        self.current_tool = 'line'
-        self.is_drawing = True
-        self.is_first_click = True
-        self.canvas.mpl_connect('button_press_event', self.on_press)
-        self.canvas.mpl_connect('motion_notify_event', self.on_motion)
+        self._start_mode('line')
         
     def start_erase_mode(self):
         """开始删除模式"""
-        self.current_tool = 'erase'
-        self.is_drawing = True
-        self.canvas.mpl_connect('button_press_event', self.on_press)
+        self._start_mode('erase')
         
     def start_point_coord_mode(self):
         """开始点坐标模式"""
-        self.current_tool = 'point_coord'
+        self._start_mode('point_coord')
+
+    def _start_mode(self, tool):
+        """切换 CAD 子模式：激活画布上的 CAD 工具，并清除上一子模式的临时状态"""
+        self.canvas.tool_router.activate('cad')
+        self._reset_state()
+        self.current_tool = tool
         self.is_drawing = True
-        self.canvas.mpl_connect('button_press_event', self.on_press)
         
     def add_coord_label(self, x, y):
         """添加坐标标注"""
@@ -96,50 +108,97 @@ class CADDrawer:
                 lat_dms = decimal_degrees_to_dms(lat, is_lat=True)
                 # 格式化显示文本
                 label_text = f'{lon_dms}\n{lat_dms}'
-                # 添加坐标标注
-                label = self.ax.text(x, y, label_text, 
-                                   color='black',
-                                   fontsize=8,
-                                   bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'),
-                                   ha='left', va='bottom')
-                self.coord_labels.append(label)
-                self.canvas.draw_idle()
             except Exception as e:
                 print(f"坐标转换错误: {str(e)}")
                 # 如果转换失败，显示原始坐标
                 label_text = f'X: {x:.4f}\nY: {y:.4f}'
-                label = self.ax.text(x, y, label_text, 
-                                   color='black',
-                                   fontsize=8,
-                                   bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'),
-                                   ha='left', va='bottom')
-                self.coord_labels.append(label)
-                self.canvas.draw_idle()
+            # 添加坐标标注
+            self._draw_coord_label(x, y, label_text)
+            if self.on_change is not None:
+                self.on_change("add", "coord_labels", {"x": x, "y": y, "text": label_text})
+            self.canvas.draw_idle()
+
+    def _draw_coord_label(self, x, y, label_text):
+        """绘制一个坐标标注"""
+        label = self.ax.text(x, y, label_text, 
+                             color='black',
+                             fontsize=8,
+                             bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'),
+                             ha='left', va='bottom')
+        self.coord_labels.append(label)
+
+    def restore_shapes(self, lines, coord_labels):
+        """
+        从项目文件恢复直线与坐标标注（不触发 on_change）
+        :param lines: {x0, y0, x1, y1, color} 字典列表
+        :param coord_labels: {x, y, text} 字典列表
+        """
+        if lines:
+            self._add_segments([[(it["x0"], it["y0"]), (it["x1"], it["y1"])] for it in lines],
+                               [it["color"] for it in lines])
+        for item in coord_labels:
+            self._draw_coord_label(item["x"], item["y"], item["text"])
+        self.canvas.draw_idle()
         
+    def add_lines(self, segments, color=None):
+        """
+        批量加入导入的直线，segments 为 (N, 2, 2) 像素坐标数组；
+        color 为 None 时使用当前颜色
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        if not len(segments):
+            return
+        color = color or self.current_color
+        self._add_segments(segments, [color] * len(segments))
+        if self.on_change is not None:
+            self.on_change("add_many", "lines", [
+                {"x0": x0, "y0": y0, "x1": x1, "y1": y1, "color": color}
+                for (x0, y0), (x1, y1) in segments.tolist()
+            ])
+        self.canvas.draw_idle()
+
+    def get_segments(self):
+        """
+        以数组形式返回所有直线：(segments, colors)。
+        segments 形状为 (N, 2, 2)，每条为 [[x0, y0], [x1, y1]]（像素坐标）；
+        colors 为对应的颜色列表。
+        """
+        segments = np.array(self.lines.segments, dtype=np.float64)
+        colors = [to_hex(c) for c in self.lines.colors]
+        return segments, colors
+
+    def get_coord_labels(self):
+        """返回坐标标注列表，元素为 (x, y, 文本)（像素坐标）"""
+        return [(*label.get_position(), label.get_text()) for label in self.coord_labels]
+
+    def _add_segments(self, segments, colors):
+        """批量添加直线 (M, 2, 2) 并登记到空间索引"""
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        self.lines.extend(segments, colors)
+        for (x0, y0), (x1, y1) in segments.tolist():
+            key = self._next_key
+            self._next_key += 1
+            self.segment_index.insert(key, x0, y0, x1, y1)
+            self._keys.append(key)
+
+    def _remove_segment(self, index):
+        """移除第 index 条直线并从空间索引中注销"""
+        self.segment_index.remove(self._keys.pop(index))
+        self.lines.remove(index)
+
     def find_nearest_point(self, x, y):
-        """查找最近的点进行自动吸附"""
-        if not self.shapes:
-            return (x, y), None
-            
-        min_dist = float('inf')
-        nearest_point = (x, y)
-        nearest_shape = None
-        
-        for shape in self.shapes:
-            if isinstance(shape, Line2D):
-                # 检查线段的两个端点
-                xdata, ydata = shape.get_data()
-                for px, py in zip(xdata, ydata):
-                    dist = np.sqrt((px - x)**2 + (py - y)**2)
-                    if dist < min_dist:
-                        min_dist = dist
-                        nearest_point = (float(px), float(py))  # 确保是元组
-                        nearest_shape = shape
-                    
-        # 如果距离小于阈值，则吸附到最近的点
-        if min_dist <= self.snap_threshold:
-            return nearest_point, nearest_shape
+        """查找最近的端点进行自动吸附，返回 (吸附点, 所在直线的索引 key)"""
+        key, point, _ = self.segment_index.nearest_endpoint(x, y, self.snap_threshold)
+        if key is not None:
+            return point, key
         return (float(x), float(y)), None  # 确保是元组
+
+    def find_nearest_shape(self, x, y):
+        """查找阈值范围内距离最近的直线（按点到线段距离），返回其序号"""
+        key, _ = self.segment_index.nearest_segment(x, y, self.snap_threshold)
+        if key is None:
+            return None
+        return bisect.bisect_left(self._keys, key)
         
     def on_press(self, event):
         """处理鼠标按下事件"""
@@ -153,18 +212,21 @@ class CADDrawer:
             
         if self.current_tool == 'erase':
             # 删除模式：查找最近的图形并删除
-            _, nearest_shape = self.find_nearest_point(event.xdata, event.ydata)
-            if nearest_shape:
+            nearest = self.find_nearest_shape(event.xdata, event.ydata)
+            if nearest is not None:
+                start = tuple(self.lines.segments[nearest, 0].tolist())
                 # 删除图形
-                nearest_shape.remove()
-                self.shapes.remove(nearest_shape)
-                # 删除相关的坐标标注
+                self._remove_segment(nearest)
+                if self.on_change is not None:
+                    self.on_change("remove", "lines", nearest)
+                # 删除相关的坐标标注（位于直线起点）
                 for label in self.coord_labels[:]:
-                    if isinstance(nearest_shape, Line2D):
-                        xdata, ydata = nearest_shape.get_data()
-                        if label.get_position() == (xdata[0], ydata[0]):
-                            label.remove()
-                            self.coord_labels.remove(label)
+                    if label.get_position() == start:
+                        index = self.coord_labels.index(label)
+                        label.remove()
+                        self.coord_labels.remove(label)
+                        if self.on_change is not None:
+                            self.on_change("remove", "coord_labels", index)
                 self.canvas.draw_idle()
             return
             
@@ -176,16 +238,15 @@ class CADDrawer:
             else:
                 # 第二次点击，完成直线绘制
                 end_point, _ = self.find_nearest_point(event.xdata, event.ydata)
-                line = Line2D([self.start_point[0], end_point[0]], 
-                            [self.start_point[1], end_point[1]], 
-                            color=self.current_color, linewidth=1)
-                self.ax.add_artist(line)
-                self.shapes.append(line)
+                self._add_segments([[self.start_point, end_point]], [self.current_color])
+                if self.on_change is not None:
+                    self.on_change("add", "lines", {
+                        "x0": self.start_point[0], "y0": self.start_point[1],
+                        "x1": end_point[0], "y1": end_point[1], "color": self.current_color
+                    })
                 
                 # 清除临时直线
-                if self.temp_line:
-                    self.temp_line.remove()
-                    self.temp_line = None
+                self._remove_temp_line()
                     
                 # 更新起点为终点，实现连续绘制
                 self.start_point = end_point
@@ -197,39 +258,55 @@ class CADDrawer:
             return
             
         if self.current_tool == 'line' and not self.is_first_click:
-            # 更新临时直线
-            if self.temp_line:
-                self.temp_line.remove()
+            # 更新临时直线：作为动态对象只做 blit，不重绘整幅影像
             end_point, _ = self.find_nearest_point(event.xdata, event.ydata)
-            self.temp_line = Line2D([self.start_point[0], end_point[0]], 
-                                  [self.start_point[1], end_point[1]], 
-                                  color='red', linewidth=1, linestyle='--')
-            self.ax.add_artist(self.temp_line)
-            self.canvas.draw_idle()
-            
-    def clear_shapes(self):
-        """清除所有绘制的图形"""
-        for shape in self.shapes:
-            shape.remove()
-        self.shapes.clear()
+            if self.temp_line is None:
+                self.temp_line = Line2D([], [], color='red', linewidth=1, linestyle='--')
+                self.ax.add_artist(self.temp_line)
+                self.canvas.overlay.add_artist(self.temp_line)
+            self.temp_line.set_data([self.start_point[0], end_point[0]],
+                                    [self.start_point[1], end_point[1]])
+            self.canvas.overlay.update()
+
+    def _remove_temp_line(self):
+        """移除临时直线"""
         if self.temp_line:
+            self.canvas.overlay.remove_artist(self.temp_line)
             self.temp_line.remove()
             self.temp_line = None
+            
+    def clear_shapes(self):
+        """清除所有绘制的图形"""
+        self.lines.clear()
+        self.segment_index.clear()
+        self._keys.clear()
+        self._remove_temp_line()
         # 清除所有坐标标注
         for label in self.coord_labels:
             label.remove()
         self.coord_labels.clear()
+        if self.on_change is not None:
+            self.on_change("clear", "lines")
+            self.on_change("clear", "coord_labels")
         self.canvas.draw_idle()
         
     def stop_drawing(self):
         """停止绘图模式"""
+        self.canvas.tool_router.deactivate('cad')
+
+    def _on_deactivate(self):
+        """CAD 工具被停用（按 ESC 或切换到其他工具）时清除绘图状态"""
+        self._reset_state()
         self.is_drawing = False
         self.current_tool = None
+
+    def _reset_state(self):
+        """清除连续绘制的起点与临时直线"""
         self.is_first_click = True
         self.start_point = None
         if self.temp_line:
-            self.temp_line.remove()
-            self.temp_line = None
+            self._remove_temp_line()
+            self.canvas.overlay.update()
             
     def calculate_scale(self):
         """计算比例尺"""
@@ -313,6 +390,8 @@ class CADDrawer:
 
     def export_cad_layer(self, out_path):
         """导出CAD图层为PNG文件"""
+        import matplotlib.pyplot as plt
+
         # 创建新的图形
         fig = plt.figure(figsize=(10, 10))
         ax = fig.add_subplot(111)
@@ -321,11 +400,10 @@ class CADDrawer:
         xmin, xmax = self.ax.get_xlim()
         ymin, ymax = self.ax.get_ylim()
         
-        # 复制所有图形到新图形
-        for shape in self.shapes:
-            if isinstance(shape, Line2D):
-                xdata, ydata = shape.get_data()
-                ax.plot(xdata, ydata, color=shape.get_color(), linewidth=1)
+        # 复制所有直线到新图形
+        from matplotlib.collections import LineCollection
+
+        ax.add_collection(LineCollection(self.lines.segments, colors=self.lines.colors, linewidths=1))
         
         # 复制所有坐标标注
         for label in self.coord_labels:
@@ -364,7 +442,3 @@ class CADDrawer:
         # 保存为PNG，增加DPI以提高分辨率
         fig.savefig(out_path, dpi=300, bbox_inches='tight', pad_inches=0)
         plt.close(fig)
-
-    def _connect_events(self):
-        self.canvas.mpl_connect('button_press_event', self.on_press)
-        self.canvas.mpl_connect('motion_notify_event', self.on_motion) 
\ No newline at end of file
@@ -0,0 +1,506 @@
+"""
+contour_engine.py
+
+大幅面正射影像的分块并行轮廓提取：
+-   影像按固定大小的核心区域切分，每块向外扩展重叠带后读取 rasterio 窗口，
+    保证高斯模糊与 Canny 在核心区域内的结果与整幅处理一致
+-   灰度化、GaussianBlur、Canny、findContours 在进程池中逐块执行，内存只与块大小有关
+-   每块只保留落在核心区域内的轮廓点，跨越接缝的轮廓片段按原轮廓的走向首尾相接：
+    片段记录其前后紧邻的核心区域外的像素，只与另一分块中恰好从该处接续的片段相连，
+    拼接结果与整幅一次处理相同（可用 check_tiling 或 python contour_engine.py 影像 核对）
+-   轮廓坐标按影像仿射变换换算为投影坐标，可直接写出 DXF
+-   导出前的后处理：开放边缘的往返描迹改为单程折线（只按长度过滤），
+    闭合环的面积/长度阈值过滤、层级裁剪、嵌套重复轮廓去重、
+    Douglas–Peucker 抽稀，阈值均以像素为单位
+"""
+
+import argparse
+import collections
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from orthophoto_utils import pixels_to_map
+
+# 与 find_contours.py 原有处理参数一致
+DEFAULT_PARAMS = {
+    "blur_ksize": 7,
+    "blur_sigma": 7,
+    "canny_low": 15,
+    "canny_high": 90,
+}
+
+# 后处理默认参数（像素单位），见 simplify_contours
+SIMPLIFY_PARAMS = {
+    "epsilon": 1.0,           # Douglas–Peucker 容差
+    "min_length": 20.0,       # 轮廓最小长度（闭合轮廓含闭合边，开放边缘按单程计）
+    "min_area": 50.0,         # 闭合轮廓最小面积
+    "ring_ratio": 0.5,        # 面积/周长不超过该值的“闭合”轮廓视为开放边缘的往返描迹
+    "max_depth": None,        # 保留的最大嵌套深度，None 表示不裁剪
+    "dedup_tolerance": 2.0,   # 外包框各边相差不超过该值的闭合轮廓视为重复
+}
+
+
+def _to_gray(data):
+    """(波段, 高, 宽) 数组 -> uint8 灰度图"""
+    if data.shape[0] >= 3:
+        gray = cv2.cvtColor(np.ascontiguousarray(data[:3].transpose((1, 2, 0))), cv2.COLOR_RGB2GRAY)
+    else:
+        gray = data[0]
+    if gray.dtype != np.uint8:
+        gray = np.clip(gray, 0, 255).astype(np.uint8)
+    return gray
+
+
+def _contour_depths(hierarchy, n):
+    """由 RETR_TREE 的层级数组计算每个轮廓的嵌套深度（最外层为 0）"""
+    depths = [-1] * n
+    if hierarchy is None:
+        return [0] * n
+    parents = hierarchy[0][:, 3].tolist()
+    for i in range(n):
+        chain = []
+        j = i
+        while j != -1 and depths[j] == -1:
+            chain.append(j)
+            j = parents[j]
+        base = depths[j] if j != -1 else -1
+        for k in reversed(chain):
+            base += 1
+            depths[k] = base
+    return depths
+
+
+def _process_tile(path, core, overlap, params):
+    """
+    处理一个分块（在子进程中执行）。
+    :param core: 核心区域 (col0, row0, col1, row1)，原始像素坐标
+    :return: (closed, fragments)
+             closed 为完全落在核心区域内的轮廓 [(points (N, 2) int32 全局像素坐标, 嵌套深度), ...]；
+             fragments 为跨越核心区域边界、需与相邻分块拼接的片段
+             [(points, 嵌套深度, 所属轮廓序号, 前一像素, 后一像素), ...]，
+             前一/后一像素为原轮廓中紧邻片段首尾、位于核心区域外的像素
+    """
+    col0, row0, col1, row1 = core
+    with rasterio.open(path) as ds:
+        win_col0 = max(0, col0 - overlap)
+        win_row0 = max(0, row0 - overlap)
+        win_col1 = min(ds.width, col1 + overlap)
+        win_row1 = min(ds.height, row1 + overlap)
+        data = ds.read(window=Window(win_col0, win_row0, win_col1 - win_col0, win_row1 - win_row0))
+
+    ksize = params["blur_ksize"]
+    blurred = cv2.GaussianBlur(_to_gray(data), (ksize, ksize), params["blur_sigma"])
+    edges = cv2.Canny(blurred, params["canny_low"], params["canny_high"])
+    # CHAIN_APPROX_NONE 保留全部相邻像素，保证接缝两侧的端点彼此相邻
+    found = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
+    contours, hierarchy = found[-2], found[-1]
+    depths = _contour_depths(hierarchy, len(contours))
+
+    offset = np.array([win_col0, win_row0], dtype=np.int32)
+    closed, fragments = [], []
+    for source, (contour, depth) in enumerate(zip(contours, depths)):
+        pts = contour.reshape(-1, 2) + offset
+        inside = ((pts[:, 0] >= col0) & (pts[:, 0] < col1) &
+                  (pts[:, 1] >= row0) & (pts[:, 1] < row1))
+        if inside.all():
+            closed.append((pts, depth))
+            continue
+        if not inside.any():
+            continue
+        # 闭合轮廓从核心区域外的一点起算，切分出连续落在核心区域内的各段
+        first_out = int(np.argmin(inside))
+        pts = np.roll(pts, -first_out, axis=0)
+        inside = np.roll(inside, -first_out)
+        step = np.diff(inside.astype(np.int8))
+        starts = np.flatnonzero(step == 1) + 1
+        ends = np.flatnonzero(step == -1) + 1
+        if inside[-1]:
+            ends = np.r_[ends, inside.size]
+        for start, end in zip(starts, ends):
+            prev_pt = tuple(pts[start - 1].tolist())
+            next_pt = tuple(pts[end % inside.size].tolist())
+            fragments.append((pts[start:end], depth, source, prev_pt, next_pt))
+    return closed, fragments
+
+
+def _process_tile_args(args):
+    return _process_tile(*args)
+
+
+def stitch_fragments(fragments):
+    """
+    按原轮廓的走向拼接跨接缝的轮廓片段。
+    Canny 边缘的内外两条轮廓在接缝处经过同样的像素、方向相反，只看端点邻接会配错；
+    这里片段 A 只接在片段 B 之后，当且仅当 B 来自另一分块，且 B 的（前一像素, 首点）
+    恰为 A 的（末点, 后一像素），即 B 正是原轮廓越过接缝后的延续。片段不反转。
+    :param fragments: [(points (N, 2) int 数组, 深度, 分块序号, 所属轮廓序号, 前一像素, 后一像素), ...]
+    :return: [(points, 是否闭合, 深度), ...]；深度取各片段的最大值
+             （分块窗口截断了外层轮廓时，块内算得的深度可能偏小）
+    """
+    def head_key(k):
+        pts, _, _, _, prev_pt, _ = fragments[k]
+        return prev_pt, (int(pts[0, 0]), int(pts[0, 1]))
+
+    def tail_key(k):
+        pts, _, _, _, _, next_pt = fragments[k]
+        return (int(pts[-1, 0]), int(pts[-1, 1])), next_pt
+
+    heads = collections.defaultdict(list)
+    tails = collections.defaultdict(list)
+    for k in range(len(fragments)):
+        heads[head_key(k)].append(k)
+        tails[tail_key(k)].append(k)
+    used = [False] * len(fragments)
+
+    def take(index, key, k):
+        tile = fragments[k][2]
+        for j in index.get(key, ()):
+            if not used[j] and fragments[j][2] != tile:
+                used[j] = True
+                return j
+        return None
+
+    results = []
+    for i in range(len(fragments)):
+        if used[i]:
+            continue
+        used[i] = True
+        chain = collections.deque([i])
+        closed = False
+        # 顺着走向向后延伸，直到回到起始片段（闭合）或无法接续
+        while True:
+            key = tail_key(chain[-1])
+            if key == head_key(chain[0]) and fragments[chain[0]][2] != fragments[chain[-1]][2]:
+                closed = True
+                break
+            j = take(heads, key, chain[-1])
+            if j is None:
+                break
+            chain.append(j)
+        # 未闭合时再向前延伸（起始片段可能位于轮廓中段）
+        while not closed:
+            j = take(tails, head_key(chain[0]), chain[0])
+            if j is None:
+                break
+            chain.appendleft(j)
+        merged = np.concatenate([fragments[k][0] for k in chain])
+        depth = max(fragments[k][1] for k in chain)
+        results.append((merged, closed, depth))
+    return results
+
+
+def _measure(contours):
+    """
+    一次性计算所有轮廓的长度、面积（闭合轮廓）与外包框（像素单位）。
+    各轮廓拼接为一个数组后用 reduceat 分段求和，避免逐轮廓循环。
+    """
+    sizes = np.array([len(c["pixels"]) for c in contours], dtype=np.int64)
+    closed = np.array([c["closed"] for c in contours], dtype=bool)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    pts = np.concatenate([c["pixels"] for c in contours]).astype(np.float64)
+
+    # 每个点的"下一个点"：段内顺延，段末回到段首（仅闭合轮廓计入闭合边）
+    nxt = np.arange(1, len(pts) + 1)
+    nxt[starts + sizes - 1] = starts
+    last_edge = np.zeros(len(pts), dtype=bool)
+    last_edge[starts + sizes - 1] = True
+    dx = pts[nxt, 0] - pts[:, 0]
+    dy = pts[nxt, 1] - pts[:, 1]
+    seg_len = np.hypot(dx, dy)
+    seg_len[last_edge & ~np.repeat(closed, sizes)] = 0.0
+    cross = pts[:, 0] * pts[nxt, 1] - pts[nxt, 0] * pts[:, 1]
+
+    lengths = np.add.reduceat(seg_len, starts)
+    areas = np.where(closed, 0.5 * np.abs(np.add.reduceat(cross, starts)), 0.0)
+    bboxes = np.column_stack([
+        np.minimum.reduceat(pts[:, 0], starts), np.minimum.reduceat(pts[:, 1], starts),
+        np.maximum.reduceat(pts[:, 0], starts), np.maximum.reduceat(pts[:, 1], starts),
+    ])
+    return lengths, areas, bboxes
+
+
+def _dedup_nested(indices, areas, bboxes, tolerance):
+    """
+    Canny 边缘为细线，RETR_TREE 会在其内外各产生一条几乎重合的闭合轮廓。
+    按面积从大到小遍历，外包框与已保留轮廓相差不超过 tolerance 的视为重复；
+    外包框量化到网格后只检查相邻网格，耗时与轮廓数量成线性关系。
+    """
+    if tolerance <= 0:
+        return list(indices)
+    grid = {}
+    kept = []
+    for i in sorted(indices, key=lambda k: -areas[k]):
+        box = bboxes[i]
+        key = tuple(np.floor(box / tolerance).astype(np.int64).tolist())
+        duplicate = False
+        for delta in itertools.product((-1, 0, 1), repeat=4):
+            for j in grid.get(tuple(k + d for k, d in zip(key, delta)), ()):
+                if np.abs(bboxes[j] - box).max() <= tolerance:
+                    duplicate = True
+                    break
+            if duplicate:
+                break
+        if not duplicate:
+            grid.setdefault(key, []).append(i)
+            kept.append(i)
+    return kept
+
+
+def _dp_mask(pts, epsilon, closed):
+    """
+    Douglas–Peucker 抽稀，返回保留点的布尔掩码。
+    每次分割时点到弦的距离以 NumPy 向量化计算；闭合轮廓在首点与最远点处分为两段。
+    """
+    n = len(pts)
+    keep = np.zeros(n, dtype=bool)
+    if n <= 3 or epsilon <= 0:
+        keep[:] = True
+        return keep
+    pts = pts.astype(np.float64)
+    if closed:
+        far = int(np.argmax(np.hypot(pts[:, 0] - pts[0, 0], pts[:, 1] - pts[0, 1])))
+        pts = np.vstack([pts, pts[:1]])  # 末尾追加首点，作为第二段的终点
+        keep = np.zeros(n + 1, dtype=bool)
+        stack = [(0, far), (far, n)]
+        keep[[0, far]] = True
+    else:
+        stack = [(0, n - 1)]
+        keep[[0, n - 1]] = True
+
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        a = pts[i]
+        chord = pts[j] - a
+        rel = pts[i + 1:j] - a
+        norm = np.hypot(chord[0], chord[1])
+        if norm == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(chord[0] * rel[:, 1] - chord[1] * rel[:, 0]) / norm
+        k = int(np.argmax(dist))
+        if dist[k] > epsilon:
+            m = i + 1 + k
+            keep[m] = True
+            stack.append((i, m))
+            stack.append((m, j))
+    return keep[:n]
+
+
+def _unfold_trace(pts):
+    """
+    findContours 对未闭合的单像素边缘沿一侧走出、再沿原路返回，得到面积近似为零的"闭合"轮廓。
+    从第一个折返点（边缘端点）起取半圈，返回单程的点序号。
+    """
+    n = len(pts)
+    if n < 3:
+        return np.arange(n)
+    turns = np.flatnonzero((np.roll(pts, 1, axis=0) == np.roll(pts, -1, axis=0)).all(axis=1))
+    start = int(turns[0]) if len(turns) else 0
+    return (start + np.arange(n // 2 + 1)) % n
+
+
+def simplify_contours(contours, epsilon=1.0, min_length=20.0, min_area=50.0,
+                      max_depth=None, dedup_tolerance=2.0, ring_ratio=0.5):
+    """
+    轮廓后处理（阈值均为像素单位）：
+    1. 区分闭合环与开放边缘：面积/周长不超过 ring_ratio 的"闭合"轮廓是开放边缘的往返描迹，
+       改为单程的开放折线，长度按单程计，不参与面积过滤与去重
+    2. 层级裁剪：去掉嵌套深度大于 max_depth 的轮廓
+    3. 阈值过滤：去掉长度小于 min_length 的轮廓、面积小于 min_area 的闭合环
+    4. 去重：去掉与更大轮廓几乎重合的嵌套闭合环
+    5. Douglas–Peucker 抽稀，同一掩码同时作用于像素坐标与投影坐标
+    :param contours: extract_contours 返回的轮廓列表
+    :return: 新的轮廓列表
+    """
+    if not contours:
+        return []
+    lengths, areas, bboxes = _measure(contours)
+    depths = np.array([c["depth"] for c in contours])
+    closed = np.array([c["closed"] for c in contours], dtype=bool)
+    traces = closed & (areas <= ring_ratio * lengths)
+    closed &= ~traces
+    lengths = np.where(traces, 0.5 * lengths, lengths)
+
+    keep = lengths >= min_length
+    keep &= ~closed | (areas >= min_area)
+    if max_depth is not None:
+        keep &= depths <= max_depth
+
+    candidates = np.flatnonzero(keep)
+    closed_ids = candidates[closed[candidates]]
+    kept = set(_dedup_nested(closed_ids, areas, bboxes, dedup_tolerance))
+    kept.update(candidates[~closed[candidates]].tolist())
+
+    output = []
+    for i in sorted(kept):
+        contour = contours[i]
+        if traces[i]:
+            order = _unfold_trace(contour["pixels"])
+            contour = dict(contour, pixels=contour["pixels"][order],
+                           points=contour["points"][order], closed=False)
+        mask = _dp_mask(contour["pixels"], epsilon, contour["closed"])
+        output.append(dict(contour, pixels=contour["pixels"][mask], points=contour["points"][mask]))
+    return output
+
+
+def tile_cores(width, height, tile_size):
+    """按 tile_size 切分影像，返回各分块的核心区域 (col0, row0, col1, row1)"""
+    return [
+        (col0, row0, min(width, col0 + tile_size), min(height, row0 + tile_size))
+        for row0 in range(0, height, tile_size)
+        for col0 in range(0, width, tile_size)
+    ]
+
+
+def extract_contours(path, transform=None, tile_size=2048, overlap=128, workers=None,
+                     simplify=True, progress=None, cancelled=None, **params):
+    """
+    分块并行提取影像轮廓。
+    :param path: 影像文件路径（GeoTIFF 或 rasterio 可读取的普通图片）
+    :param transform: 像素 -> 投影坐标的仿射变换，默认使用影像自身的 transform
+    :param tile_size: 分块核心区域边长（像素）
+    :param overlap: 分块四周的重叠带宽度（像素），需大于模糊与边缘检测的作用范围；
+                    Canny 的滞后阈值会沿弱边缘延伸，弱边缘链长于重叠带时接缝附近仍可能略有差异
+    :param workers: 进程数，默认为 CPU 核数；为 1 时在当前进程内执行
+    :param simplify: 是否执行 simplify_contours 后处理；也可传入字典覆盖 SIMPLIFY_PARAMS
+    :param progress: 可选回调，每处理完一个分块以 0-100 的整数报告进度
+    :param cancelled: 可选回调，返回 True 时停止处理（未开始的分块不再执行）并返回 None
+    :param params: 覆盖 DEFAULT_PARAMS 中的处理参数
+    :return: 轮廓列表（取消时为 None），元素为 {"points": (N, 2) 投影坐标数组, "pixels": (N, 2) 像素坐标数组,
+             "closed": bool, "depth": int}
+    """
+    params = dict(DEFAULT_PARAMS, **params)
+    with rasterio.open(path) as ds:
+        width, height = ds.width, ds.height
+        if transform is None:
+            transform = ds.transform
+
+    cores = tile_cores(width, height, tile_size)
+    jobs = [(path, core, overlap, params) for core in cores]
+    if workers == 1 or len(jobs) == 1:
+        tile_results = map(_process_tile_args, jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        tile_results = pool.map(_process_tile_args, jobs)
+
+    contours = []
+    fragments = []
+    try:
+        for tile, (closed, tile_fragments) in enumerate(tile_results):
+            if cancelled is not None and cancelled():
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = None
+                return None
+            contours.extend((pts, True, depth) for pts, depth in closed)
+            fragments.extend((pts, depth, tile, source, prev_pt, next_pt)
+                             for pts, depth, source, prev_pt, next_pt in tile_fragments)
+            if progress is not None:
+                progress(int(100 * (tile + 1) / len(jobs)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    contours.extend(stitch_fragments(fragments))
+
+    output = []
+    for pts, closed, depth in contours:
+        xs, ys = pixels_to_map(pts[:, 0], pts[:, 1], transform)
+        output.append({"points": np.column_stack([xs, ys]), "pixels": pts,
+                       "closed": closed, "depth": depth})
+
+    if simplify:
+        options = dict(SIMPLIFY_PARAMS, **(simplify if isinstance(simplify, dict) else {}))
+        output = simplify_contours(output, **options)
+    return output
+
+
+def write_dxf(contours, out_path, layer="轮廓"):
+    """
+    将轮廓写出为 DXF 多段线
+    :return: 写出的多段线数量
+    """
+    import ezdxf
+
+    doc = ezdxf.new("R2010")
+    doc.layers.add(layer)
+    msp = doc.modelspace()
+    for contour in contours:
+        msp.add_lwpolyline(contour["points"][:, :2].tolist(), format="xy",
+                           close=contour["closed"], dxfattribs={"layer": layer})
+    doc.saveas(out_path)
+    return len(contours)
+
+
+def _canonical(pixels, closed):
+    """轮廓像素序列的规范形式：闭合轮廓旋转到字典序最小的起点，便于比较"""
+    seq = [tuple(p) for p in np.asarray(pixels).tolist()]
+    if not closed or not seq:
+        return closed, tuple(seq)
+    start = min(seq)
+    return closed, min(tuple(seq[k:] + seq[:k]) for k, p in enumerate(seq) if p == start)
+
+
+def check_tiling(path, tile_size=256, overlap=128, **params):
+    """
+    核对分块提取与整幅一次处理的结果是否一致（只比较未后处理的像素轮廓，不比较嵌套深度）。
+    :return: (整幅轮廓数, 分块轮廓数, 分块结果中未闭合的轮廓数, 仅整幅有的轮廓数, 仅分块有的轮廓数)
+    """
+    with rasterio.open(path) as ds:
+        whole_size = max(ds.width, ds.height)
+    whole = extract_contours(path, tile_size=whole_size, overlap=overlap, workers=1,
+                             simplify=False, **params)
+    tiled = extract_contours(path, tile_size=tile_size, overlap=overlap, simplify=False, **params)
+    expected = collections.Counter(_canonical(c["pixels"], c["closed"]) for c in whole)
+    actual = collections.Counter(_canonical(c["pixels"], c["closed"]) for c in tiled)
+    open_count = sum(1 for c in tiled if not c["closed"])
+    return (len(whole), len(tiled), open_count,
+            sum((expected - actual).values()), sum((actual - expected).values()))
+
+
+def check_straight_edge(size=600):
+    """
+    核对默认参数下贯穿影像的直线边缘（半幅填充的明暗分界）能作为开放折线保留下来，
+    不被闭合轮廓的面积阈值滤掉。
+    :return: 保留下来的最长开放轮廓长度是否达到边长的 90%
+    """
+    image = np.full((size, size), 255, dtype=np.uint8)
+    image[:, :size // 2] = 60
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "straight_edge.png")
+        cv2.imwrite(path, image)
+        contours = extract_contours(path, workers=1)
+    spans = [np.ptp(c["pixels"][:, 1]) for c in contours if not c["closed"]]
+    return max(spans, default=0) >= 0.9 * (size - 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="核对分块轮廓提取与整幅处理的结果是否一致")
+    parser.add_argument("image", nargs="?", help="影像文件路径，省略时只核对直线边缘的保留")
+    parser.add_argument("--tile-size", type=int, nargs="+", default=[256, 512],
+                        help="待核对的分块大小（像素），可给多个")
+    parser.add_argument("--overlap", type=int, default=128, help="重叠带宽度（像素）")
+    args = parser.parse_args(argv)
+
+    ok = check_straight_edge()
+    print(f"直线边缘：{'保留' if ok else '被滤掉'}")
+    for tile_size in args.tile_size if args.image else ():
+        whole, tiled, open_count, missing, extra = check_tiling(
+            args.image, tile_size=tile_size, overlap=args.overlap)
+        print(f"tile_size={tile_size}: 整幅 {whole} 条，分块 {tiled} 条，"
+              f"未闭合 {open_count} 条，缺少 {missing} 条，多出 {extra} 条")
+        ok = ok and missing == 0 and extra == 0
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,50 @@
+"""
+contour_worker.py
+
+在后台线程中提取 DOM 轮廓并写出 DXF，避免大幅面影像处理期间界面无响应：
+-   分块提取由 contour_engine 在进程池中执行，每完成一个分块报告一次进度
+-   可随时请求取消（QThread.requestInterruption），在分块之间检查，未开始的分块不再执行
+"""
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class ContourExportWorker(QThread):
+    """
+    后台轮廓导出线程。信号：
+    -   progress(int)：分块处理进度 0-100
+    -   exported(int)：DXF 已写出，参数为轮廓数量
+    -   failed(str)：提取或写出失败
+    取消后不再发出 exported。
+    """
+
+    progress = pyqtSignal(int)
+    exported = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, dom_path, out_path, transform=None, parent=None):
+        """
+        :param dom_path: DOM 文件路径
+        :param out_path: 输出 DXF 路径
+        :param transform: 像素 -> 投影坐标的仿射变换，默认使用影像自身的 transform
+        """
+        super().__init__(parent)
+        self.dom_path = dom_path
+        self.out_path = out_path
+        self.transform = transform
+
+    def run(self):
+        try:
+            from contour_engine import extract_contours, write_dxf
+
+            contours = extract_contours(self.dom_path, transform=self.transform,
+                                        progress=self.progress.emit,
+                                        cancelled=self.isInterruptionRequested)
+            if contours is None or self.isInterruptionRequested():
+                return
+            count = write_dxf(contours, self.out_path)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if not self.isInterruptionRequested():
+            self.exported.emit(count)
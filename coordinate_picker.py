@@ -4,20 +4,36 @@ coordinate_picker.py
 负责“坐标拾取模式”的开启与关闭，通过鼠标点击事件获取用户在图像上的点击位置。
 在拾取坐标后，会弹出对话框输入“测点类型”和“测点说明”，
 并从内置 DOM 或 DSM 数据中读取海拔高程，最终将完成的坐标信息显示并可导出。
+已有的测量成果可经 survey_importer 读入后由 add_points 批量加入。
 """
 
+import math
+
+import numpy as np
+
 from PyQt5.QtWidgets import (
-    QTableWidgetItem, QMessageBox, QDialog,
+    QMessageBox, QDialog,
     QVBoxLayout, QLabel, QComboBox, QPushButton,
     QHBoxLayout, QFileDialog
 )
 from orthophoto_utils import (
     transform_coordinate,
+    transform_coordinates,
     decimal_degrees_to_dms,
+    decimal_degrees_to_dms_batch,
     export_csv,
     get_altitude,
     get_altitude_dsm
 )
+from elevation_sampler import ElevationSampler
+from table_models import ColumnTableModel
+from vector_layers import PointLayer
+
+# 测点表的列：(标题, 测点字典的键)
+COORD_COLUMNS = [
+    ("序号", "index"), ("测点类型", "type"), ("纬度", "lat"),
+    ("经度", "lon"), ("海拔高程", "alt"), ("测点说明", "desc"),
+]
 
 class CoordDetailDialog(QDialog):
     """
@@ -63,32 +79,46 @@ class CoordDetailDialog(QDialog):
 class CoordinatePicker:
     def __init__(self, canvas, table_coords, dataset_dom=None, dataset_dsm=None):
         """
+        :param table_coords: 显示测点的 QTableView
         :param dataset_dom: 主DOM（通常不含高程）
         :param dataset_dsm: DSM 文件，含高程
         """
         self.canvas = canvas
         self.table_coords = table_coords
+        self.table_model = ColumnTableModel(
+            [title for title, _ in COORD_COLUMNS], numeric_columns=(0, 4), parent=table_coords
+        )
+        self.table_coords.setModel(self.table_model)
+        self.markers = PointLayer(self.canvas.ax)  # 全部测点以一个散点集合绘制
+        self.canvas.add_view_listener(self.markers.ensure_attached)
         self.dataset_dom = dataset_dom
         self.dataset_dsm = dataset_dsm
+        self.dsm_sampler = ElevationSampler(dataset_dsm) if dataset_dsm else None
 
         self.is_selecting_coords = False
         self.coords_list = []  # 存储拾取的坐标及测点信息
-        self.cid = None  # mpl_connect 的连接ID
+        self.on_change = None  # 要素变化回调 (操作, 图层, 数据)，由主窗口设置（自动保存）；批量导入时操作为 add_many
+        self.canvas.tool_router.register(
+            'pick_coords', on_press=self.pick_coords, on_deactivate=self._on_deactivate
+        )
 
     def toggle_coordinate_pick(self):
         """
-        切换坐标拾取模式
+        切换坐标拾取模式（进入时会停用画布上其他绘图工具）
         """
         if self.is_selecting_coords:
             # 退出坐标拾取模式
-            self.is_selecting_coords = False
-            if self.cid is not None:
-                self.canvas.mpl_disconnect(self.cid)
-                self.cid = None
+            self.canvas.tool_router.deactivate('pick_coords')
         else:
             # 进入坐标拾取模式
+            self.canvas.tool_router.activate('pick_coords')
             self.is_selecting_coords = True
-            self.cid = self.canvas.mpl_connect('button_press_event', self.pick_coords)
+
+    def _on_deactivate(self):
+        """
+        坐标拾取工具被停用（按 ESC 或切换到其他工具）
+        """
+        self.is_selecting_coords = False
 
     def pick_coords(self, event):
         """
@@ -121,8 +151,8 @@ class CoordinatePicker:
             lon_dms = decimal_degrees_to_dms(lon, is_lat=False)[:-1]
             lat_dms = decimal_degrees_to_dms(lat, is_lat=True)[:-1]
 
-            # 优先从 DSM 获取海拔
-            alt = get_altitude_dsm(self.dataset_dsm, col, row)
+            # 优先从 DSM 获取海拔（按块缓存采样，无有效值时视为 0）
+            alt = self.get_dsm_altitude(col, row)
             if alt == 0.0:
                 alt = get_altitude(self.dataset_dom, col, row)
 
@@ -137,28 +167,92 @@ class CoordinatePicker:
                     "lat": lat_dms,
                     "lon": lon_dms,
                     "alt": round(alt, 3),
-                    "desc": measure_desc
+                    "desc": measure_desc,
+                    "col": col,   # 像素坐标，供矢量导出使用
+                    "row": row
                 }
                 self.coords_list.append(coord_info)
-
-                row_index = self.table_coords.rowCount()
-                self.table_coords.insertRow(row_index)
-                self.table_coords.setItem(row_index, 0, QTableWidgetItem(str(index)))
-                self.table_coords.setItem(row_index, 1, QTableWidgetItem(measure_type))
-                self.table_coords.setItem(row_index, 2, QTableWidgetItem(lat_dms))
-                self.table_coords.setItem(row_index, 3, QTableWidgetItem(lon_dms))
-                self.table_coords.setItem(row_index, 4, QTableWidgetItem(str(round(alt, 3))))
-                self.table_coords.setItem(row_index, 5, QTableWidgetItem(measure_desc))
+                self._append_rows([coord_info])
+                if self.on_change is not None:
+                    self.on_change("add", "points", coord_info)
 
         except Exception as e:
             QMessageBox.critical(None, "坐标拾取错误", f"拾取坐标时发生错误：{str(e)}")
 
+    def _append_rows(self, coords):
+        """
+        在表格末尾追加测点行
+        """
+        self.table_model.append_rows([c[key] for _, key in COORD_COLUMNS] for c in coords)
+        self.markers.extend([(c["col"], c["row"]) for c in coords if "col" in c and "row" in c])
+
+    def restore_coords(self, coords):
+        """
+        从项目文件恢复测点（不触发 on_change）
+        """
+        coords = [dict(c) for c in coords]
+        self.coords_list.extend(coords)
+        self._append_rows(coords)
+
+    def add_points(self, points):
+        """
+        批量加入导入的测点：points 为含 col / row / type / desc / alt 的字典列表
+        （alt 为 None 时从 DSM 采样）。经纬度一次批量换算，表格一次追加。
+        """
+        if not points:
+            return []
+        if self.canvas.transform is None:
+            raise ValueError("当前尚未加载正射影像，无法换算测点坐标")
+        cols = np.array([p["col"] for p in points], dtype=np.float64)
+        rows = np.array([p["row"] for p in points], dtype=np.float64)
+        lons, lats = transform_coordinates(
+            cols, rows, self.canvas.transform, src_crs="EPSG:4548", dst_crs="EPSG:4490"
+        )
+        lon_dms = [s[:-1] for s in decimal_degrees_to_dms_batch(lons, is_lat=False)]
+        lat_dms = [s[:-1] for s in decimal_degrees_to_dms_batch(lats, is_lat=True)]
+
+        alts = np.array([np.nan if p["alt"] is None else p["alt"] for p in points], dtype=np.float64)
+        missing = np.isnan(alts)
+        if missing.any() and self.dsm_sampler is not None:
+            try:
+                alts[missing] = self.dsm_sampler.sample_many(cols[missing], rows[missing])
+            except Exception:
+                pass
+        alts = np.where(np.isnan(alts), 0.0, alts)
+
+        start = len(self.coords_list) + 1
+        coords = [
+            {
+                "index": index,
+                "type": p["type"],
+                "lat": lat,
+                "lon": lon,
+                "alt": round(alt, 3),
+                "desc": p["desc"],
+                "col": col,
+                "row": row,
+            }
+            for index, p, lat, lon, alt, col, row in zip(
+                range(start, start + len(points)), points, lat_dms, lon_dms,
+                alts.tolist(), cols.tolist(), rows.tolist())
+        ]
+        self.coords_list.extend(coords)
+        self._append_rows(coords)
+        if self.on_change is not None:
+            self.on_change("add_many", "points", coords)
+        self.canvas.draw_idle()
+        return coords
+
     def clear_coords(self):
         """
         清空坐标列表和表格内容
         """
         self.coords_list.clear()
-        self.table_coords.setRowCount(0)
+        self.table_model.clear()
+        self.markers.clear()
+        self.canvas.draw_idle()
+        if self.on_change is not None:
+            self.on_change("clear", "points")
 
     def export_coords(self):
         """
@@ -196,3 +290,16 @@ class CoordinatePicker:
         设置或更新 DSM 文件对应的 dataset
         """
         self.dataset_dsm = dataset
+        self.dsm_sampler = ElevationSampler(dataset) if dataset else None
+
+    def get_dsm_altitude(self, col, row):
+        """
+        从 DSM 采样海拔，无 DSM 或无有效值时返回 0.0
+        """
+        if self.dsm_sampler is None:
+            return get_altitude_dsm(self.dataset_dsm, col, row)
+        try:
+            alt = self.dsm_sampler.sample(col, row)
+        except Exception:
+            return 0.0
+        return 0.0 if math.isnan(alt) else alt
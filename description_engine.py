@@ -0,0 +1,324 @@
+"""
+description_engine.py
+
+古建筑 / 碑刻描述的生成规则（不依赖任何界面库）：
+-   generate_building_description(record) / generate_stele_description(record)：
+    输入一条记录（字典），返回描述文本；界面工具与批量模式共用同一套规则
+-   记录的键可以是英文字段名，也可以是表格中的中文列名，缺失的选项取界面默认值
+-   批量模式：读取 CSV / Excel 中成千上万条记录，在进程池中分块生成，
+    写出原有各列并追加"描述""字数""错误"三列
+
+用法：
+    python description_engine.py building 建筑清单.xlsx 建筑描述.xlsx
+    python description_engine.py stele 碑刻清单.csv 碑刻描述.csv --workers 8
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# ----------------------------------------------------
+# 字段定义：(字段名, 中文列名, 默认值)，默认值与界面各选项的初始值一致
+# ----------------------------------------------------
+BUILDING_FIELDS = [
+    ("relic_name", "文物名称", ""),
+    ("town", "镇", ""),
+    ("village", "村", ""),
+    ("relative_location", "相对位置", ""),
+    ("rel_zuo", "文物整体坐", ""),
+    ("rel_chao", "文物整体朝", ""),
+    ("yard_layout", "院落布局", ""),
+    ("yard_length", "院落长", ""),
+    ("yard_width", "院落宽", ""),
+    ("area", "占地面积", ""),
+    ("existing1", "现存1", ""),
+    ("existing2", "现存2", ""),
+    ("existing3", "现存3", ""),
+    ("existing4", "现存4", ""),
+    ("existing5", "现存5", ""),
+    ("eaves_layer", "单檐重檐", "单檐"),
+    ("zuo", "坐", ""),
+    ("chao", "朝", ""),
+    ("length", "长", ""),
+    ("width_val", "宽", ""),
+    ("height", "高", ""),
+    ("name", "建筑名称", ""),
+    ("roof", "房顶整体形制", "硬山"),
+    ("shape", "平面形状", "矩形"),
+    ("tile_material", "瓦面材质", "琉璃"),
+    ("tile_layout", "瓦作铺设", "筒瓦"),
+    ("structure", "正身构架", "三檩无廊"),
+    ("width_int", "面阔", "1"),
+    ("depth_int", "进深", "3"),
+    ("ceiling", "天花", "彻上明造"),
+    ("wall_segment", "墙体分段", "不分段"),
+    ("wall_not_div", "墙体", "通体抹灰"),
+    ("wall_up", "墙体上身", "通体抹灰"),
+    ("wall_down", "墙体下碱", "整砖砌筑"),
+    ("eave_exposed", "露檐", "前檐"),
+    ("door_style", "门形制", "板门"),
+    ("window_position", "窗位置", "明间"),
+    ("window_style", "窗形制", "直棂窗"),
+    ("floor", "地面", "土作地面"),
+    ("base", "台基类别", "无"),
+    ("base_plan", "台基平面形状", "矩形"),
+    ("step_style", "台阶式样", "无"),
+    ("step_arrange_num", "台阶布置", "单"),
+    ("drain", "散水", "室外有散水"),
+]
+
+STELE_FIELDS = [
+    ("total_height", "碑高", ""),
+    ("total_width", "碑宽", ""),
+    ("total_thickness", "碑厚", ""),
+    ("crown_type", "碑冠", "有碑冠"),
+    ("dragon_pattern", "碑冠纹饰", ""),
+    ("front_text", "碑冠碑额阳面", ""),
+    ("back_text", "碑冠碑额阴面", ""),
+    ("head_type", "碑首", "圆首"),
+    ("head_pattern", "碑首纹饰", ""),
+    ("head_front_text", "碑首碑额阳面", ""),
+    ("head_back_text", "碑首碑额阴面", ""),
+    ("material", "碑身材质", "汉白玉"),
+    ("other_material", "其他材质", ""),
+    ("front_content", "碑身阳面", ""),
+    ("back_content", "碑身阴面", ""),
+    ("base_type", "碑座类型", "方形碑座"),
+    ("length", "碑座长", ""),
+    ("width", "碑座宽", ""),
+    ("height", "碑座高", ""),
+    ("turtle_length", "龟长", ""),
+    ("turtle_width", "龟背宽", ""),
+    ("turtle_height", "龟趺高", ""),
+]
+
+RESULT_COLUMNS = ["描述", "字数", "错误"]
+
+
+def normalize_record(record, fields):
+    """
+    将记录整理为 {字段名: 去除首尾空白的字符串}。
+    有字段名时原样使用（界面传入的空值保持为空）；
+    否则查找中文列名，缺失或为空单元格时取默认值。
+    """
+    out = {}
+    for key, column, default in fields:
+        value = record.get(key)
+        if value is None:
+            value = record.get(column)
+            if value is None or str(value).strip() == "":
+                value = default
+        out[key] = str(value).strip()
+    return out
+
+
+# ----------------------------------------------------
+# 生成规则
+# ----------------------------------------------------
+def generate_building_description(record):
+    """
+    生成古建筑描述，分为两部分：
+      ① 描述栏部分，格式为：
+         【文物名称】位于山东省嘉祥县【镇】镇【村】村【相对位置】，
+         文物整体坐【文物整体坐】朝【文物整体朝】，
+         现存【现存1】、【现存2】、【现存3】、【现存4】、【现存5】。
+      ② 建筑本体描述部分。
+    文物名称为空时抛出 ValueError。
+    """
+    r = normalize_record(record, BUILDING_FIELDS)
+    if not r["relic_name"]:
+        raise ValueError("请输入文物名称（描述栏）！")
+
+    # ---------------- 描述栏部分 ----------------
+    desc_header = (
+        f"【{r['relic_name']}】位于山东省嘉祥县{r['town']}镇{r['village']}村{r['relative_location']}，"
+        f"文物整体坐{r['rel_zuo']}朝{r['rel_chao']}，"
+    )
+    if r["yard_layout"] or r["yard_length"] or r["yard_width"] or r["area"]:
+        desc_header += (f"{r['yard_layout']}院落布局，院落长{r['yard_length']}米，"
+                        f"宽{r['yard_width']}米，占地面积{r['area']}平方米。")
+    desc_header += (f"现存{r['existing1']}、{r['existing2']}、{r['existing3']}、"
+                    f"{r['existing4']}、{r['existing5']}。")
+
+    # ---------------- 建筑本体部分 ----------------
+    if r["wall_segment"] == "不分段":
+        wall_desc_final = r["wall_not_div"]
+    else:
+        wall_desc_final = f"上身{r['wall_up']}，下碱{r['wall_down']}"
+
+    line1 = (
+        f"{r['name']}为{r['eaves_layer']}{r['roof']}顶建筑，"
+        f"坐{r['zuo']}朝{r['chao']}，{r['shape']}平面布局。"
+    )
+    line2 = f"长{r['length']}米，宽{r['width_val']}米，高（到正脊上皮）{r['height']}米。"
+    line3 = f"{r['tile_material']}{r['tile_layout']}铺设屋面。"
+    line4 = f"{r['structure']}构架，面阔{r['width_int']}间，进深{r['depth_int']}椽。"
+    line5 = f"{r['ceiling']}，墙体{wall_desc_final}，{r['eave_exposed']}。"
+    line6 = (f"建筑正面明辟{r['door_style']}，{r['window_position']}设{r['window_style']}，"
+             f"{r['floor']}。")
+    if r["base"] != "无":
+        if r["step_style"] != "无":
+            line7 = (f"{r['base']}台基，{r['base_plan']}平面布局，"
+                     f"{r['step_arrange_num']}{r['step_style']}，{r['drain']}。")
+        else:
+            line7 = f"{r['base']}台基，{r['base_plan']}平面布局，{r['drain']}。"
+    else:
+        line7 = f"{r['drain']}。"
+
+    original_desc = "".join([line1, line2, line3, line4, line5, line6, line7]).strip()
+    return desc_header + "\n" + original_desc
+
+
+def _inscription(front_text, back_text):
+    """碑额阳面 / 阴面文字"""
+    text = ""
+    if front_text:
+        text += f"阳面刻「{front_text}」"
+    if back_text:
+        if front_text:
+            text += "，"
+        text += f"阴面刻「{back_text}」"
+    return text
+
+
+def generate_stele_description(record):
+    """生成碑刻描述：碑的尺寸、碑冠或碑首、碑身、碑座"""
+    r = normalize_record(record, STELE_FIELDS)
+    description = f"碑高{r['total_height']}厘米，宽{r['total_width']}厘米，厚{r['total_thickness']}厘米。"
+
+    # 碑冠 / 碑首
+    if r["crown_type"] == "有碑冠":
+        description += f"碑冠饰以{r['dragon_pattern']}，"
+        if r["front_text"] or r["back_text"]:
+            description += "碑额" + _inscription(r["front_text"], r["back_text"]) + "。"
+    else:
+        description += f"碑首为{r['head_type']}"
+        if r["head_pattern"]:
+            description += f"，饰以{r['head_pattern']}"
+        if r["head_front_text"] or r["head_back_text"]:
+            description += "，碑额" + _inscription(r["head_front_text"], r["head_back_text"])
+        description += "。"
+
+    # 碑身
+    material = r["other_material"] if r["material"] == "其他" else r["material"]
+    description += f"\n碑身为{material}质，"
+    description += f"阳面刻「{r['front_content']}」，"
+    description += "阴面" + (f"刻「{r['back_content']}」" if r["back_content"] else "无字") + "。"
+
+    # 碑座
+    if r["base_type"] == "方形碑座":
+        description += f"\n方形碑座，长{r['length']}厘米，宽{r['width']}厘米，高{r['height']}厘米。"
+    else:
+        description += (f"\n龟趺碑座，龟长{r['turtle_length']}厘米，"
+                        f"龟背宽{r['turtle_width']}厘米，高{r['turtle_height']}厘米。")
+    return description
+
+
+GENERATORS = {
+    "building": generate_building_description,
+    "stele": generate_stele_description,
+}
+
+
+# ----------------------------------------------------
+# 批量模式
+# ----------------------------------------------------
+def read_records(in_path):
+    """读取 CSV / Excel（第一张工作表），返回 (列名列表, 记录字典列表)"""
+    ext = os.path.splitext(in_path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(in_path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = [str(c).strip() if c is not None else "" for c in next(rows, ())]
+            records = [
+                {h: ("" if v is None else v) for h, v in zip(header, row) if h}
+                for row in rows if any(v is not None for v in row)
+            ]
+        finally:
+            wb.close()
+        return header, records
+    with open(in_path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        records = list(reader)
+        return list(reader.fieldnames or []), records
+
+
+def _generate_one(kind, record):
+    """生成一条描述，返回 (描述, 字数, 错误信息)"""
+    try:
+        text = GENERATORS[kind](record)
+        return text, len(text), ""
+    except Exception as e:
+        return "", 0, str(e)
+
+
+def generate_many(kind, records, workers=None, chunksize=256):
+    """
+    批量生成描述，结果与 records 顺序一致。
+    记录较少时在当前进程内完成，否则按 chunksize 分块交给进程池。
+    """
+    func = partial(_generate_one, kind)
+    if workers == 1 or len(records) <= chunksize:
+        return [func(r) for r in records]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, records, chunksize=chunksize))
+
+
+def write_results(out_path, header, records, results):
+    """写出原有各列及"描述""字数""错误"列，格式由扩展名决定（CSV / Excel）"""
+    columns = [h for h in header if h and h not in RESULT_COLUMNS] + RESULT_COLUMNS
+    ext = os.path.splitext(out_path)[1].lower()
+    rows = (
+        [record.get(h, "") for h in columns[:-3]] + list(result)
+        for record, result in zip(records, results)
+    )
+    if ext in (".xlsx", ".xlsm"):
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("描述")
+        ws.append(columns)
+        for row in rows:
+            ws.append(row)
+        wb.save(out_path)
+        return
+    # utf-8-sig 便于 Excel 直接打开
+    with open(out_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def generate_bulk(kind, in_path, out_path, workers=None):
+    """
+    批量生成：读取 in_path 中的记录，生成描述后写入 out_path
+    :param kind: "building"（古建筑）或 "stele"（碑刻）
+    :return: (记录数, 失败数)
+    """
+    header, records = read_records(in_path)
+    results = generate_many(kind, records, workers=workers)
+    write_results(out_path, header, records, results)
+    return len(records), sum(1 for _, _, error in results if error)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量生成古建筑 / 碑刻描述")
+    parser.add_argument("kind", choices=sorted(GENERATORS), help="building：古建筑；stele：碑刻")
+    parser.add_argument("input", help="输入 CSV / Excel 文件")
+    parser.add_argument("output", help="输出 CSV / Excel 文件")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数，默认为 CPU 核数")
+    args = parser.parse_args(argv)
+
+    total, failed = generate_bulk(args.kind, args.input, args.output, workers=args.workers)
+    print(f"已生成 {total - failed} 条描述，失败 {failed} 条：{args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+description_host.py
+
+在独立进程中承载 Tk 描述工具，避免 Tk 的 mainloop 阻塞 Qt 主窗口：
+-   首次打开描述工具时启动一个常驻子进程，其中只有一个隐藏的 Tk 根窗口和一个事件循环
+-   主窗口通过命令队列发送"打开哪个工具"，子进程在 Tk 事件循环中定时取命令
+-   各工具窗口关闭时只是隐藏，再次打开时直接显示，已填写的内容保留；
+    tkinter、图片和表单都不必重新加载
+-   主窗口关闭时通知子进程退出
+"""
+
+import multiprocessing
+import queue
+
+# 工具名 -> 模块名，模块需提供 main(master) 并返回顶层窗口
+TOOLS = {
+    "building": "building_description",
+    "stele": "stele_description",
+}
+
+POLL_MS = 100
+
+
+def _serve(commands):
+    """子进程入口：隐藏的 Tk 根窗口 + 定时读取命令队列"""
+    import importlib
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.withdraw()
+    windows = {}
+
+    def open_tool(name):
+        window = windows.get(name)
+        if window is None or not window.winfo_exists():
+            window = importlib.import_module(TOOLS[name]).main(master=root)
+            # 关闭时隐藏而不销毁，下次打开直接显示
+            window.protocol("WM_DELETE_WINDOW", window.withdraw)
+            windows[name] = window
+        window.deiconify()
+        window.lift()
+        window.focus_force()
+
+    def poll():
+        while True:
+            try:
+                command = commands.get_nowait()
+            except queue.Empty:
+                break
+            if command == "quit":
+                root.destroy()
+                return
+            try:
+                open_tool(command)
+            except Exception as e:
+                print(f"打开描述工具 {command} 失败: {e}")
+        root.after(POLL_MS, poll)
+
+    root.after(0, poll)
+    root.mainloop()
+
+
+class DescriptionHost:
+    """
+    描述工具宿主进程的句柄（主窗口侧），所有方法均立即返回
+    """
+
+    def __init__(self):
+        self.process = None
+        self.commands = None
+
+    def is_running(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        """启动宿主进程（已在运行时不做任何事）"""
+        if self.is_running():
+            return
+        self.commands = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve, args=(self.commands,),
+                                               name="description_host", daemon=True)
+        self.process.start()
+
+    def open(self, name):
+        """
+        打开（或显示已打开的）描述工具
+        :param name: "building"（古建筑）或 "stele"（碑刻）
+        """
+        if name not in TOOLS:
+            raise ValueError(f"未知的描述工具: {name}")
+        self.start()
+        self.commands.put(name)
+
+    def shutdown(self, timeout=1.0):
+        """通知宿主进程退出，超时未退出时强制结束"""
+        if not self.is_running():
+            return
+        self.commands.put("quit")
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
@@ -3,41 +3,120 @@ import math
 from PyQt5.QtWidgets import QMessageBox
 from matplotlib.lines import Line2D
 
+from elevation_sampler import summarize_profile
+from label_layer import LabelLayer
+from vector_layers import SegmentLayer
+
+# 尺寸标注文字样式
+DIMENSION_TEXT_STYLE = dict(fontsize=12, color="blue", backgroundcolor="white", ha="center", va="bottom")
+
 class DimensionAnnotator:
     """
     实现尺寸标注功能：
     用户依次点击两点，系统根据 ImageCanvas 的 transform 参数计算两点间真实距离，
     并在图上绘制尺寸线及标注距离。
+    若设置了 DSM 高程采样器，还会沿尺寸线采样高程剖面，标注斜距与高差。
+    点击第一个点后，跟随鼠标的预览线以 blit 方式刷新。
+    尺寸线由一个集合对象绘制，标注文字只绘制视图范围内的部分。
     """
     def __init__(self, canvas):
         self.canvas = canvas
         self.ax = self.canvas.ax
         self.active = False
         self.points = []       # 存放点击的2个点 (x, y)
-        self.annotations = []  # 存放已绘制的尺寸标注（线和文字）
-        self.cid_click = None
+        self.dimensions = []   # 已绘制的尺寸标注 (x1, y1, x2, y2, 标注文字)
+        self.lines = SegmentLayer(self.ax, color="blue", linewidths=2)
+        self.texts = LabelLayer(self.ax, style=DIMENSION_TEXT_STYLE)
+        self.preview_line = None  # 第二点确定前的预览线（动态对象）
+        self.elevation_sampler = None  # DSM 高程采样器（ElevationSampler）
+        self.max_profile_samples = 10000
+        self.on_change = None  # 要素变化回调 (操作, 图层, 数据)，由主窗口设置（自动保存）
+        self.canvas.tool_router.register(
+            "dimension", on_press=self.on_click, on_motion=self.on_motion,
+            on_deactivate=self.stop_dimension_mode
+        )
+        self.canvas.add_view_listener(self.lines.ensure_attached)
+        self.canvas.add_view_listener(self.texts.update)
+
+    def set_elevation_sampler(self, sampler):
+        """
+        设置或更新用于剖面测量的 DSM 高程采样器
+        """
+        self.elevation_sampler = sampler
+
+    def measure_profile(self, x1, y1, x2, y2):
+        """
+        沿两点连线采样 DSM 剖面，返回 summarize_profile 的统计结果；
+        无 DSM 或采样失败时返回 None
+        """
+        if self.elevation_sampler is None:
+            return None
+        length_px = math.hypot(x2 - x1, y2 - y1)
+        n_samples = min(self.max_profile_samples, max(2, int(math.ceil(length_px)) + 1))
+        try:
+            profile = self.elevation_sampler.profile(
+                [(x1, y1), (x2, y2)], n_samples=n_samples, transform=self.canvas.transform
+            )
+        except Exception:
+            return None
+        stats = summarize_profile(profile)
+        if math.isnan(stats["slope_distance"]):
+            return None
+        return stats
 
     def start_dimension_mode(self):
         """
-        进入尺寸标注模式，绑定鼠标点击事件
+        进入尺寸标注模式，激活尺寸标注工具
         """
         if self.active:
             return
+        self.canvas.tool_router.activate("dimension")
         self.active = True
         self.points = []
-        self.cid_click = self.canvas.mpl_connect("button_press_event", self.on_click)
         QMessageBox.information(None, "提示", "已进入尺寸标注模式：\n请依次点击两点进行测距，完成后自动绘制标注。\n按 ESC 退出该模式。")
 
     def stop_dimension_mode(self):
         """
-        退出尺寸标注模式，解绑事件
+        退出尺寸标注模式，停用尺寸标注工具
         """
         if self.active:
-            if self.cid_click is not None:
-                self.canvas.mpl_disconnect(self.cid_click)
-                self.cid_click = None
             self.active = False
+            self.canvas.tool_router.deactivate("dimension")
             self.points = []
+            self._remove_preview()
+            self.canvas.overlay.update()
+
+    def on_motion(self, event):
+        """
+        已点击第一个点时，显示从该点到鼠标位置的预览线
+        """
+        if len(self.points) != 1:
+            return
+        if event.inaxes != self.ax or event.xdata is None or event.ydata is None:
+            return
+        x1, y1 = self.points[0]
+        if self.preview_line is not None and self.preview_line.axes is not self.ax:
+            # 坐标轴已被清空（重新加载影像），旧预览线作废
+            self._remove_preview()
+        if self.preview_line is None:
+            self.preview_line = Line2D([], [], color="blue", linewidth=1, linestyle="--")
+            self.ax.add_line(self.preview_line)
+            self.canvas.overlay.add_artist(self.preview_line)
+        self.preview_line.set_data([x1, event.xdata], [y1, event.ydata])
+        self.preview_line.set_visible(True)
+        self.canvas.overlay.update()
+
+    def _remove_preview(self):
+        """
+        移除预览线（测量完成或取消时）
+        """
+        if self.preview_line is not None:
+            self.canvas.overlay.remove_artist(self.preview_line)
+            try:
+                self.preview_line.remove()
+            except Exception:
+                pass
+            self.preview_line = None
 
     def on_click(self, event):
         """
@@ -60,30 +139,53 @@ class DimensionAnnotator:
                 pixel_size_y = abs(self.canvas.transform.e)
                 distance = math.sqrt((dx * pixel_size_x)**2 + (dy * pixel_size_y)**2)
                 distance_str = f"{distance:.2f} m"
+                stats = self.measure_profile(x1, y1, x2, y2)
+                if stats is not None:
+                    distance_str += (
+                        f"\n斜距 {stats['slope_distance']:.2f} m  高差 {stats['height_diff']:+.2f} m"
+                    )
             else:
                 distance = math.sqrt(dx**2 + dy**2)
                 distance_str = f"{distance:.2f} px"
-            line = Line2D([x1, x2], [y1, y2], color="blue", linewidth=2)
-            self.ax.add_line(line)
-            mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-            text = self.ax.text(mid_x, mid_y, distance_str, fontsize=12, color="blue",
-                                backgroundcolor="white", ha="center", va="bottom")
-            self.annotations.append((line, text))
-            self.canvas.draw()
+            self._draw_dimensions([(x1, y1, x2, y2, distance_str)])
+            if self.on_change is not None:
+                self.on_change("add", "dimensions",
+                               {"x1": x1, "y1": y1, "x2": x2, "y2": y2, "text": distance_str})
             self.points = []
+            self._remove_preview()
+            self.canvas.draw_idle()
+
+    def _draw_dimensions(self, dims):
+        """
+        批量绘制尺寸线及其标注文字，dims 为 (x1, y1, x2, y2, 标注文字) 列表
+        """
+        self.dimensions.extend(dims)
+        self.lines.extend([[(x1, y1), (x2, y2)] for x1, y1, x2, y2, _ in dims])
+        self.texts.extend(((x1 + x2) / 2, (y1 + y2) / 2, text) for x1, y1, x2, y2, text in dims)
+        self.texts.update()
+
+    def restore_dimensions(self, dimensions):
+        """
+        从项目文件恢复尺寸标注（不触发 on_change），
+        dimensions 为 {x1, y1, x2, y2, text} 字典列表
+        """
+        if dimensions:
+            self._draw_dimensions([(d["x1"], d["y1"], d["x2"], d["y2"], d["text"]) for d in dimensions])
+        self.canvas.draw_idle()
+
+    def get_dimensions(self):
+        """
+        返回已绘制的尺寸标注列表，元素为 (x1, y1, x2, y2, 标注文字)（像素坐标）
+        """
+        return list(self.dimensions)
 
     def clear_annotations(self):
         """
         清除所有已绘制的尺寸标注
         """
-        for line, text in self.annotations:
-            try:
-                line.remove()
-            except Exception:
-                pass
-            try:
-                text.remove()
-            except Exception:
-                pass
-        self.annotations.clear()
+        self.dimensions.clear()
+        self.lines.clear()
+        self.texts.clear()
+        if self.on_change is not None:
+            self.on_change("clear", "dimensions")
         self.canvas.draw()
\ No newline at end of file
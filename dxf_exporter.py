@@ -0,0 +1,129 @@
+"""
+dxf_exporter.py
+
+将画布上的矢量要素导出为 DXF（AutoCAD 可直接打开）：
+-   CAD 直线、多边形、标注、尺寸标注、坐标标注分别写入独立图层
+-   像素坐标经影像仿射变换批量换算为投影坐标（默认 EPSG:4548）
+-   直接由各工具的坐标数组生成 DXF 实体，不经过 matplotlib
+"""
+
+import ezdxf
+import numpy as np
+from ezdxf.colors import rgb2int
+from ezdxf.enums import TextEntityAlignment
+from matplotlib.colors import to_rgb
+
+from orthophoto_utils import pixels_to_map
+
+# 图层名称及其默认 ACI 颜色
+LAYER_LINES = "CAD直线"
+LAYER_POLYGONS = "多边形"
+LAYER_LABELS = "标注"
+LAYER_DIMENSIONS = "尺寸标注"
+LAYER_COORDS = "坐标标注"
+
+_LAYERS = {
+    LAYER_LINES: 5,       # 蓝
+    LAYER_POLYGONS: 1,    # 红
+    LAYER_LABELS: 1,      # 红
+    LAYER_DIMENSIONS: 5,  # 蓝
+    LAYER_COORDS: 7,      # 黑/白
+}
+
+
+def _true_color(color):
+    """matplotlib 颜色 -> DXF true_color 整数"""
+    r, g, b = to_rgb(color)
+    return rgb2int((int(round(r * 255)), int(round(g * 255)), int(round(b * 255))))
+
+
+def _to_map(points, transform):
+    """(..., 2) 像素坐标数组 -> 同形状的投影坐标数组"""
+    points = np.asarray(points, dtype=np.float64)
+    xs, ys = pixels_to_map(points[..., 0], points[..., 1], transform)
+    return np.stack([xs, ys], axis=-1)
+
+
+def export_dxf(out_path, transform, segments=None, segment_colors=None, polygons=None,
+               labels=None, dimensions=None, coord_labels=None, text_height=None):
+    """
+    导出 DXF 文件。所有输入均为像素坐标。
+
+    :param transform: 影像仿射变换参数（像素 -> 投影坐标）
+    :param segments: (N, 2, 2) 数组，CAD 直线
+    :param segment_colors: 长度为 N 的颜色列表，与 segments 对应
+    :param polygons: 多边形顶点数组 (K, 2) 的列表
+    :param labels: 标注列表，元素为 (x, y, 文本)
+    :param dimensions: 尺寸标注列表，元素为 (x1, y1, x2, y2, 文本)
+    :param coord_labels: 坐标标注列表，元素为 (x, y, 文本)
+    :param text_height: 文字高度（地图单位），默认为 20 个像素的地面尺寸
+    :return: 写入的实体数量
+    """
+    if text_height is None:
+        text_height = 20 * abs(transform.a)
+
+    doc = ezdxf.new("R2010")
+    doc.header["$INSUNITS"] = 6  # 米
+    for name, color in _LAYERS.items():
+        doc.layers.add(name, color=color)
+    msp = doc.modelspace()
+    count = 0
+
+    # ---------------- CAD 直线 ----------------
+    if segments is not None and len(segments):
+        map_segments = _to_map(segments, transform).tolist()
+        colors = segment_colors or [None] * len(map_segments)
+        attribs_by_color = {}
+        for (start, end), color in zip(map_segments, colors):
+            attribs = attribs_by_color.get(color)
+            if attribs is None:
+                attribs = {"layer": LAYER_LINES}
+                if color is not None:
+                    attribs["true_color"] = _true_color(color)
+                attribs_by_color[color] = attribs
+            msp.add_line(start, end, dxfattribs=attribs)
+            count += 1
+
+    # ---------------- 多边形 ----------------
+    for polygon in polygons or []:
+        msp.add_lwpolyline(_to_map(polygon, transform).tolist(), close=True,
+                           dxfattribs={"layer": LAYER_POLYGONS})
+        count += 1
+
+    # ---------------- 标注 ----------------
+    if labels:
+        points = _to_map([(x, y) for x, y, _ in labels], transform).tolist()
+        for (x, y), (_, _, text) in zip(points, labels):
+            msp.add_text(str(text), dxfattribs={"layer": LAYER_LABELS, "height": text_height}) \
+               .set_placement((x, y), align=TextEntityAlignment.MIDDLE_CENTER)
+            count += 1
+
+    # ---------------- 尺寸标注 ----------------
+    if dimensions:
+        ends = _to_map([[(x1, y1), (x2, y2)] for x1, y1, x2, y2, _ in dimensions], transform)
+        for (start, end), (*_, text) in zip(ends.tolist(), dimensions):
+            msp.add_line(start, end, dxfattribs={"layer": LAYER_DIMENSIONS})
+            mid = ((start[0] + end[0]) / 2, (start[1] + end[1]) / 2)
+            msp.add_mtext(str(text), dxfattribs={
+                "layer": LAYER_DIMENSIONS,
+                "char_height": text_height,
+                "insert": mid,
+                "attachment_point": 8,  # 底部居中
+            })
+            count += 2
+
+    # ---------------- 坐标标注 ----------------
+    if coord_labels:
+        points = _to_map([(x, y) for x, y, _ in coord_labels], transform).tolist()
+        for (x, y), (_, _, text) in zip(points, coord_labels):
+            msp.add_point((x, y), dxfattribs={"layer": LAYER_COORDS})
+            msp.add_mtext(str(text), dxfattribs={
+                "layer": LAYER_COORDS,
+                "char_height": text_height / 2,
+                "insert": (x, y),
+                "attachment_point": 7,  # 左下角
+            })
+            count += 2
+
+    doc.saveas(out_path)
+    return count
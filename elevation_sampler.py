@@ -0,0 +1,245 @@
+"""
+elevation_sampler.py
+
+DSM 高程采样：
+-   按 rasterio 的数据块 (block) 读取并缓存，单点查询只解码该点所在的一个块
+-   可选一次性将整个波段读入内存，适合反复采样的小幅 DSM
+-   批量模式：先按数据块分组，每个块只读取一次即可取出其中所有点的高程
+-   nodata 及影像范围外的点返回 NaN
+-   双线性 / 双三次插值采样，nodata 邻点按有效权重归一化
+-   沿线段或折线的高程剖面，以及由剖面得到的斜距、高差
+"""
+
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ElevationSampler:
+    """
+    对一个 DSM dataset 的指定波段进行高程采样。
+    像素坐标约定与 orthophoto_utils 一致：(col, row)，即 (x, y)。
+    """
+
+    def __init__(self, dataset, band=1, max_cached_blocks=64, load_band=False):
+        """
+        :param dataset: 已打开的 rasterio dataset
+        :param band: 高程所在波段（从 1 开始）
+        :param max_cached_blocks: 块缓存的最大块数
+        :param load_band: 为 True 时一次性读入整个波段，之后不再访问文件
+        """
+        self.dataset = dataset
+        self.band = band
+        self.width = dataset.width
+        self.height = dataset.height
+        self.nodata = dataset.nodatavals[band - 1]
+        self.block_h, self.block_w = dataset.block_shapes[band - 1]
+        self.max_cached_blocks = max_cached_blocks
+
+        self._blocks = OrderedDict()  # (块行号, 块列号) -> float64 数组
+        self._band_data = None
+        if load_band:
+            self._band_data = self._to_float(dataset.read(band))
+
+    def _to_float(self, data):
+        """转为 float64，并将 nodata 替换为 NaN"""
+        data = data.astype(np.float64)
+        if self.nodata is not None:
+            data[data == self.nodata] = np.nan
+        return data
+
+    def _get_block(self, by, bx):
+        """读取 (或从缓存取出) 第 by 行、第 bx 列的数据块"""
+        key = (by, bx)
+        block = self._blocks.get(key)
+        if block is not None:
+            self._blocks.move_to_end(key)
+            return block
+
+        from rasterio.windows import Window
+
+        row0 = by * self.block_h
+        col0 = bx * self.block_w
+        window = Window(col0, row0,
+                        min(self.block_w, self.width - col0),
+                        min(self.block_h, self.height - row0))
+        block = self._to_float(self.dataset.read(self.band, window=window))
+
+        self._blocks[key] = block
+        if len(self._blocks) > self.max_cached_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def sample_pixels(self, cols, rows):
+        """
+        按整数像素下标批量取值，返回 float64 数组（形状与输入一致）。
+        影像范围外或 nodata 的点为 NaN。
+        """
+        cols = np.asarray(cols, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        shape = np.broadcast(cols, rows).shape
+        cols = np.broadcast_to(cols, shape).ravel()
+        rows = np.broadcast_to(rows, shape).ravel()
+
+        out = np.full(cols.shape, np.nan)
+        valid = np.flatnonzero((cols >= 0) & (cols < self.width) & (rows >= 0) & (rows < self.height))
+        if valid.size == 0:
+            return out.reshape(shape)
+
+        if self._band_data is not None:
+            out[valid] = self._band_data[rows[valid], cols[valid]]
+            return out.reshape(shape)
+
+        # 按所在数据块分组，每个块只读取一次
+        by = rows[valid] // self.block_h
+        bx = cols[valid] // self.block_w
+        n_bx = -(-self.width // self.block_w)
+        keys = by * n_bx + bx
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], sorted_keys.size]
+
+        for start, end in zip(starts, ends):
+            members = order[start:end]
+            block_y = int(by[members[0]])
+            block_x = int(bx[members[0]])
+            block = self._get_block(block_y, block_x)
+            idx = valid[members]
+            out[idx] = block[rows[idx] - block_y * self.block_h, cols[idx] - block_x * self.block_w]
+        return out.reshape(shape)
+
+    def sample_many(self, cols, rows):
+        """
+        批量采样：(cols, rows) 为浮点像素坐标，取最近像素的高程
+        """
+        return self.sample_pixels(np.round(np.asarray(cols, dtype=np.float64)),
+                                  np.round(np.asarray(rows, dtype=np.float64)))
+
+    def sample(self, col, row):
+        """
+        单点采样：返回最近像素的高程（float），无有效值时为 NaN
+        """
+        return float(self.sample_many([col], [row])[0])
+
+    def interpolate(self, cols, rows, method="bilinear"):
+        """
+        插值采样：(cols, rows) 为浮点像素坐标（像素中心位于整数坐标处）。
+        method 可选 "nearest" / "bilinear" / "bicubic"。
+        邻点中含 nodata 时：双线性按剩余有效邻点的权重归一化；
+        双三次退回双线性结果。全部邻点无效时为 NaN。
+        """
+        cols = np.asarray(cols, dtype=np.float64)
+        rows = np.asarray(rows, dtype=np.float64)
+        if method == "nearest":
+            return self.sample_many(cols, rows)
+        if method not in ("bilinear", "bicubic"):
+            raise ValueError(f"不支持的插值方法：{method}")
+
+        c0 = np.floor(cols)
+        r0 = np.floor(rows)
+        fx = (cols - c0)[..., None]
+        fy = (rows - r0)[..., None]
+        c0 = c0.astype(np.int64)[..., None]
+        r0 = r0.astype(np.int64)[..., None]
+
+        # 双线性：2x2 邻点
+        offsets = np.array([0, 1])
+        values = self.sample_pixels(c0[..., None, :] + offsets[None, :],
+                                    r0[..., None, :] + offsets[:, None])
+        wx = np.concatenate([1 - fx, fx], axis=-1)
+        wy = np.concatenate([1 - fy, fy], axis=-1)
+        weights = wy[..., :, None] * wx[..., None, :]
+        valid = ~np.isnan(values)
+        weight_sum = np.where(valid, weights, 0.0).sum(axis=(-2, -1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bilinear = np.where(valid, values * weights, 0.0).sum(axis=(-2, -1)) / weight_sum
+        bilinear = np.where(weight_sum > 0, bilinear, np.nan)
+        if method == "bilinear":
+            return bilinear
+
+        # 双三次（Keys 卷积核，a = -0.5）：4x4 邻点
+        offsets = np.array([-1, 0, 1, 2])
+        values = self.sample_pixels(c0[..., None, :] + offsets[None, :],
+                                    r0[..., None, :] + offsets[:, None])
+        wx = _cubic_weights(fx[..., 0])
+        wy = _cubic_weights(fy[..., 0])
+        bicubic = np.einsum("...i,...ij,...j->...", wy, values, wx)
+        return np.where(np.isnan(bicubic), bilinear, bicubic)
+
+    def profile(self, points, n_samples=None, spacing=1.0, transform=None, method="bilinear"):
+        """
+        沿折线 points（(K, 2) 像素坐标，K >= 2）等间距采样高程剖面。
+
+        :param n_samples: 采样点数；为 None 时按 spacing（像素）确定
+        :param transform: 仿射变换参数；给定时距离按像素尺寸换算为地图单位（米）
+        :return: dict，包含 distance（沿线水平距离）、col、row、elevation 四个数组
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) < 2:
+            raise ValueError("剖面至少需要两个点")
+
+        scale = np.array([1.0, 1.0])
+        if transform is not None:
+            scale = np.array([abs(transform.a), abs(transform.e)])
+        seg_len_px = np.hypot(*np.diff(points, axis=0).T)
+        seg_len = np.hypot(*(np.diff(points, axis=0) * scale).T)
+        cum_px = np.r_[0.0, np.cumsum(seg_len_px)]
+        cum = np.r_[0.0, np.cumsum(seg_len)]
+
+        if n_samples is None:
+            n_samples = max(2, int(math.ceil(cum_px[-1] / spacing)) + 1)
+        at = np.linspace(0.0, cum_px[-1], n_samples)
+        cols = np.interp(at, cum_px, points[:, 0])
+        rows = np.interp(at, cum_px, points[:, 1])
+
+        return {
+            "distance": np.interp(at, cum_px, cum),
+            "col": cols,
+            "row": rows,
+            "elevation": self.interpolate(cols, rows, method=method),
+        }
+
+    def clear_cache(self):
+        """清空块缓存"""
+        self._blocks.clear()
+
+
+def _cubic_weights(t, a=-0.5):
+    """Keys 三次卷积核在偏移 -1, 0, 1, 2 处的权重，t 为小数部分"""
+    t = t[..., None]
+    d = np.abs(np.array([-1.0, 0.0, 1.0, 2.0]) - t)
+    near = ((a + 2) * d - (a + 3)) * d * d + 1
+    far = ((a * d - 5 * a) * d + 8 * a) * d - 4 * a
+    return np.where(d <= 1, near, np.where(d < 2, far, 0.0))
+
+
+def summarize_profile(profile):
+    """
+    由剖面计算测量统计量，忽略无有效高程的采样点：
+      horizontal      水平距离
+      slope_distance  斜距（沿地表逐段累加）
+      height_diff     终点与起点高差
+      min / max       最低、最高高程
+    无有效高程时，除 horizontal 外均为 NaN。
+    """
+    distance = profile["distance"]
+    elevation = profile["elevation"]
+    valid = ~np.isnan(elevation)
+    result = {
+        "horizontal": float(distance[-1]) if len(distance) else 0.0,
+        "slope_distance": float("nan"),
+        "height_diff": float("nan"),
+        "min": float("nan"),
+        "max": float("nan"),
+    }
+    if not valid.any():
+        return result
+    d = distance[valid]
+    z = elevation[valid]
+    result["slope_distance"] = float(np.hypot(np.diff(d), np.diff(z)).sum())
+    result["height_diff"] = float(z[-1] - z[0])
+    result["min"] = float(z.min())
+    result["max"] = float(z.max())
+    return result
@@ -1,37 +1,63 @@
-import cv2
+"""
+find_contours.py
+
+影像轮廓提取小工具（Tk 界面）：打开影像，预览提取的轮廓并导出为 DXF。
+轮廓由 contour_engine 分块并行提取，大幅面影像不会一次性读入内存；
+导出坐标为影像的投影坐标（无地理参考的普通图片为像素坐标）。
+"""
+
 import numpy as np
 from tkinter import *
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
-import ezdxf
+from PIL import Image, ImageDraw, ImageTk
+
+from contour_engine import extract_contours, write_dxf
+
+PREVIEW_SIZE = (400, 400)
+contours = []  # 保存轮廓以供导出使用
 
 
 def open_file():
-    filepath = filedialog.askopenfilename(filetypes=[("Image files", "*.jpg;*.jpeg;*.png")])
+    filepath = filedialog.askopenfilename(filetypes=[("Image files", "*.jpg;*.jpeg;*.png;*.tif;*.tiff")])
     if filepath:
         display_image(filepath)
 
 
-def display_image(filepath):
-    global contours  # 保存轮廓以供导出使用
-    image = cv2.imread(filepath)
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+def read_preview(filepath, size=PREVIEW_SIZE):
+    """
+    以 rasterio 抽稀读取预览图（有概视图时由 GDAL 直接取概视图），
+    不解码整幅影像，返回 (RGB 图像, 原始宽, 原始高)
+    """
+    import rasterio
+
+    with rasterio.open(filepath) as ds:
+        full_width, full_height = ds.width, ds.height
+        scale = min(size[0] / full_width, size[1] / full_height, 1.0)
+        out_w = max(1, int(round(full_width * scale)))
+        out_h = max(1, int(round(full_height * scale)))
+        data = ds.read(out_shape=(ds.count, out_h, out_w))
 
-    # 更新高斯模糊参数
-    blurred = cv2.GaussianBlur(gray, (7, 7), 7)
+    if data.dtype != np.uint8:
+        data = np.clip(data, 0, 255).astype(np.uint8)
+    bands = [data[0]] * 3 if data.shape[0] < 3 else list(data[:3])
+    return Image.fromarray(np.stack(bands, axis=-1), "RGB"), full_width, full_height
 
-    # 更新Canny边缘检测参数
-    edges = cv2.Canny(blurred, 15, 90)
 
-    # 寻找并绘制轮廓
-    contours, _ = cv2.findContours(edges.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-    cv2.drawContours(image, contours, -1, (0, 0, 0), 3)  # 使用黑色绘制轮廓
+def display_image(filepath):
+    global contours  # 保存轮廓以供导出使用
+    contours = extract_contours(filepath)
 
-    original_image = Image.open(filepath)
-    contour_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    # 预览只读取抽稀后的缩略图，轮廓按比例缩放后绘制
+    original_image, full_width, full_height = read_preview(filepath)
 
-    original_image.thumbnail((400, 400))
-    contour_image.thumbnail((400, 400))
+    contour_image = original_image.copy()
+    draw = ImageDraw.Draw(contour_image)
+    scale = np.array([contour_image.width / full_width, contour_image.height / full_height])
+    for contour in contours:
+        pts = contour["pixels"] * scale
+        if contour["closed"]:
+            pts = np.vstack([pts, pts[:1]])
+        draw.line([tuple(p) for p in pts.tolist()], fill=(0, 0, 0), width=1)  # 使用黑色绘制轮廓
 
     original_tk = ImageTk.PhotoImage(original_image)
     contour_tk = ImageTk.PhotoImage(contour_image)
@@ -43,7 +69,7 @@ def display_image(filepath):
 
 
 def export_to_dxf():
-    if 'contours' not in globals() or not contours:
+    if not contours:
         messagebox.showerror("错误", "请先打开并处理图像。")
         return
 
@@ -51,34 +77,35 @@ def export_to_dxf():
     if not filepath:
         return
 
-    doc = ezdxf.new('R2010')
-    msp = doc.modelspace()
+    write_dxf(contours, filepath)
+    messagebox.showinfo("导出成功", f"CAD文件已成功导出到 {filepath}")
 
-    for contour in contours:
-        points = [(pt[0][0], pt[0][1]) for pt in contour]
-        msp.add_lwpolyline(points, close=True)
 
-    doc.saveas(filepath)
-    messagebox.showinfo("导出成功", f"CAD文件已成功导出到 {filepath}")
+def main():
+    global original_label, processed_label
+
+    # 创建主窗口
+    root = Tk()
+    root.title("正射影像处理")
 
+    frame = Frame(root)
+    frame.pack(padx=10, pady=10)
 
-# 创建主窗口
-root = Tk()
-root.title("正射影像处理")
+    original_label = Label(frame)
+    original_label.grid(row=0, column=0, padx=5, pady=5)
 
-frame = Frame(root)
-frame.pack(padx=10, pady=10)
+    processed_label = Label(frame)
+    processed_label.grid(row=0, column=1, padx=5, pady=5)
 
-original_label = Label(frame)
-original_label.grid(row=0, column=0, padx=5, pady=5)
+    open_button = Button(root, text="打开影像", command=open_file)
+    open_button.pack(side=LEFT, padx=10, pady=10)
 
-processed_label = Label(frame)
-processed_label.grid(row=0, column=1, padx=5, pady=5)
+    export_button = Button(root, text="导出为CAD", command=export_to_dxf)
+    export_button.pack(side=RIGHT, padx=10, pady=10)
 
-open_button = Button(root, text="打开影像", command=open_file)
-open_button.pack(side=LEFT, padx=10, pady=10)
+    root.mainloop()
 
-export_button = Button(root, text="导出为CAD", command=export_to_dxf)
-export_button.pack(side=RIGHT, padx=10, pady=10)
 
-root.mainloop()
\ No newline at end of file
+# 分块处理使用进程池，子进程导入本模块时不能再次创建窗口
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+georef_export.py
+
+按 DOM 原始分辨率导出叠加了标注、多边形、尺寸标注和 CAD 直线的影像：
+-   逐条带读取 DOM，每个条带再按列分块，用离屏 matplotlib (Agg) 只绘制与该块相交的要素，
+    得到透明叠加层后与原始像素做 alpha 合成，影像像素本身不经重采样
+-   合成后的条带立即写出，内存中最多只有一个条带
+-   GeoTIFF：分块 (256x256)、压缩，保留 DOM 的坐标系与仿射变换
+-   PNG：用标准库 zlib 逐行流式压缩写出，并附世界文件 (.pgw) 与 .prj
+"""
+
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# 各类要素的样式，与画布上的显示一致
+LABEL_STYLE = dict(fontsize=10, color='red', ha='center', va='center',
+                   bbox=dict(boxstyle="round,pad=0.3", fc="yellow", ec="red", alpha=0.5))
+DIMENSION_TEXT_STYLE = dict(fontsize=12, color="blue", backgroundcolor="white",
+                            ha="center", va="bottom")
+COORD_LABEL_STYLE = dict(color='black', fontsize=8, ha='left', va='bottom',
+                         bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'))
+
+
+def _bboxes(groups):
+    """
+    每个要素的像素范围 (N, 4)：xmin, ymin, xmax, ymax
+    :param groups: 顶点数组 (K, 2) 的序列
+    """
+    boxes = [(g[:, 0].min(), g[:, 1].min(), g[:, 0].max(), g[:, 1].max()) for g in groups if len(g)]
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def _hits(boxes, col0, row0, col1, row1, margin=0.0):
+    """与块范围（外扩 margin 像素）相交的要素序号"""
+    return np.flatnonzero((boxes[:, 2] >= col0 - margin) & (boxes[:, 0] <= col1 + margin) &
+                          (boxes[:, 3] >= row0 - margin) & (boxes[:, 1] <= row1 + margin))
+
+
+def _output_bands(count):
+    """输出波段数：灰度+透明度、RGBA 输出 4 波段，其余输出 RGB"""
+    return 4 if count in (2, 4) else 3
+
+
+def _to_rgb8(data):
+    """
+    (波段, H, W) -> (H, W, 3 或 4) uint8：单波段按灰度扩展为 RGB，2 / 4 波段影像的最后一个波段作为透明度；
+    非 uint8 数据截断到 0-255
+    """
+    if data.dtype != np.uint8:
+        data = np.clip(data, 0, 255).astype(np.uint8)
+    count = data.shape[0]
+    if count == 1:
+        bands = [data[0]] * 3
+    elif count == 2:
+        bands = [data[0]] * 3 + [data[1]]
+    elif count == 4:
+        bands = list(data)
+    else:
+        bands = list(data[:3])
+    return np.stack(bands, axis=-1)
+
+
+class _OverlayRenderer:
+    """
+    离屏绘制叠加层：只创建一个固定大小的 Figure，各块通过修改坐标范围复用；
+    直线、多边形、尺寸线作为集合常驻，文字只为与当前块相交的要素临时创建
+    """
+
+    def __init__(self, block_width, block_height, dpi, segments, segment_colors,
+                 polygons, dimensions, labels, coord_labels, text_margin):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection
+        from matplotlib.figure import Figure
+
+        self.fig = Figure(figsize=(block_width / dpi, block_height / dpi), dpi=dpi)
+        self.fig.patch.set_alpha(0)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_axes([0, 0, 1, 1])
+        self.ax.axis('off')
+        self.ax.set_autoscale_on(False)
+        self.text_margin = text_margin
+
+        segments = np.asarray(segments if segments is not None else [], dtype=np.float64).reshape(-1, 2, 2)
+        rings = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in (polygons or [])]
+        rings = [np.vstack([p, p[:1]]) for p in rings if len(p)]
+        dimensions = list(dimensions or [])
+        dim_segments = np.asarray([[(d[0], d[1]), (d[2], d[3])] for d in dimensions],
+                                  dtype=np.float64).reshape(-1, 2, 2)
+
+        if len(segments):
+            self.ax.add_collection(LineCollection(
+                segments, colors=list(segment_colors or ['#0000FF'] * len(segments)), linewidths=1))
+        if rings:
+            self.ax.add_collection(LineCollection(rings, colors="red", linestyles="--"))
+            vertices = np.vstack([r[:-1] for r in rings])
+            self.ax.plot(vertices[:, 0], vertices[:, 1], linestyle="none", marker="o", color="red")
+        if len(dim_segments):
+            self.ax.add_collection(LineCollection(dim_segments, colors="blue", linewidths=2))
+
+        # 文字：(x, y, 文本, 样式)
+        self.texts = [(x, y, str(t), LABEL_STYLE) for x, y, t in (labels or [])]
+        self.texts += [((d[0] + d[2]) / 2, (d[1] + d[3]) / 2, d[4], DIMENSION_TEXT_STYLE)
+                       for d in dimensions]
+        self.texts += [(x, y, str(t), COORD_LABEL_STYLE) for x, y, t in (coord_labels or [])]
+        self.text_xy = np.asarray([(t[0], t[1]) for t in self.texts], dtype=np.float64).reshape(-1, 2)
+
+        self.vector_boxes = np.vstack([
+            _bboxes(list(segments)), _bboxes(rings), _bboxes(list(dim_segments))
+        ])
+
+    def render(self, col0, row0, width, height):
+        """
+        绘制以 (col0, row0) 为左上角的块，返回 (height, width, 4) 的 RGBA 叠加层；
+        块内没有要素时返回 None
+        """
+        col1, row1 = col0 + width, row0 + height
+        text_ids = _hits(np.column_stack([self.text_xy, self.text_xy]),
+                         col0, row0, col1, row1, margin=self.text_margin)
+        if not len(text_ids) and not len(_hits(self.vector_boxes, col0, row0, col1, row1, margin=2)):
+            return None
+
+        # 像素 (col, row) 的中心落在输出像素中心
+        self.ax.set_xlim(col0 - 0.5, col0 + self.fig.bbox.width - 0.5)
+        self.ax.set_ylim(row0 + self.fig.bbox.height - 0.5, row0 - 0.5)
+        artists = [self.ax.text(self.texts[i][0], self.texts[i][1], self.texts[i][2], **self.texts[i][3])
+                   for i in text_ids]
+        try:
+            self.canvas.draw()
+            buf = np.asarray(self.canvas.buffer_rgba())
+            return buf[:height, :width].copy()
+        finally:
+            for artist in artists:
+                artist.remove()
+
+
+class _PngWriter:
+    """
+    流式 PNG 写出：按条带追加图像行（Up 过滤 + zlib），不需要整幅图像
+    """
+
+    def __init__(self, path, width, height, bands):
+        self.file = open(path, "wb")
+        self.width = width
+        self.bands = bands
+        self._z = zlib.compressobj(6)
+        self._prev = np.zeros(width * bands, dtype=np.uint8)
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        color_type = 6 if bands == 4 else 2
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind + data)
+        self.file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def write_strip(self, row0, strip):
+        rows = strip.reshape(strip.shape[0], -1)
+        raw = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        raw[:, 0] = 2  # Up 过滤：与上一行逐字节相减（uint8 溢出回绕）
+        raw[0, 1:] = rows[0] - self._prev
+        raw[1:, 1:] = rows[1:] - rows[:-1]
+        self._prev = rows[-1].copy()
+        data = self._z.compress(raw.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+
+    def close(self):
+        self._chunk(b"IDAT", self._z.flush())
+        self._chunk(b"IEND", b"")
+        self.file.close()
+
+
+class _GeoTiffWriter:
+    """分块压缩 GeoTIFF，按条带窗口写入"""
+
+    def __init__(self, path, width, height, bands, crs, transform, compress):
+        import rasterio
+
+        options = dict(tiled=True, blockxsize=256, blockysize=256, compress=compress,
+                       BIGTIFF="IF_SAFER", photometric="RGB")
+        if compress.lower() in ("deflate", "lzw", "zstd"):
+            options["predictor"] = 2
+        if bands == 4:
+            options["alpha"] = "YES"
+        self.dataset = rasterio.open(
+            path, "w", driver="GTiff", width=width, height=height, count=bands, dtype="uint8",
+            crs=crs, transform=transform, **options
+        )
+
+    def write_strip(self, row0, strip):
+        from rasterio.windows import Window
+
+        height, width = strip.shape[:2]
+        self.dataset.write(strip.transpose((2, 0, 1)), window=Window(0, row0, width, height))
+
+    def close(self):
+        self.dataset.close()
+
+
+def write_world_file(png_path, transform, crs=None):
+    """
+    写出 PNG 的世界文件 (.pgw，坐标为左上角像素中心) 及坐标系 (.prj)
+    """
+    base = os.path.splitext(png_path)[0]
+    t = transform
+    lines = [t.a, t.d, t.b, t.e, t.c + t.a / 2 + t.b / 2, t.f + t.d / 2 + t.e / 2]
+    with open(base + ".pgw", "w", encoding="ascii") as f:
+        f.write("\n".join(f"{v:.10f}" for v in lines) + "\n")
+    if crs is not None:
+        with open(base + ".prj", "w", encoding="ascii") as f:
+            f.write(crs.to_wkt())
+
+
+def export_georeferenced(dom_path, out_path, segments=None, segment_colors=None, polygons=None,
+                         dimensions=None, labels=None, coord_labels=None,
+                         strip_height=256, block_width=4096, dpi=100, text_margin=256,
+                         compress="deflate", progress=None, cancelled=None):
+    """
+    按 DOM 原始分辨率导出叠加要素后的影像。所有要素均为像素坐标，参数与 dxf_exporter.export_dxf 一致。
+
+    :param dom_path: DOM 文件路径
+    :param out_path: .tif 导出 GeoTIFF；.png 导出 PNG + 世界文件
+    :param strip_height: 条带高度（像素），决定内存占用
+    :param block_width: 绘制叠加层时每块的宽度（像素）
+    :param dpi: 线宽、字号按此 dpi 换算为像素，与屏幕显示一致
+    :param text_margin: 文字可能超出其锚点的范围（像素），用于判断文字是否与块相交
+    :param compress: GeoTIFF 压缩方式（deflate / lzw / jpeg 等）
+    :param progress: 可选回调，每写完一个条带以 0-100 的整数报告进度
+    :param cancelled: 可选回调，返回 True 时停止导出并删除未完成的文件
+    :return: 是否导出完成
+    """
+    import rasterio
+    from rasterio.windows import Window
+
+    is_png = out_path.lower().endswith(".png")
+    with rasterio.open(dom_path) as src:
+        width, height = src.width, src.height
+        bands = _output_bands(src.count)
+        if is_png:
+            writer = _PngWriter(out_path, width, height, bands)
+        else:
+            writer = _GeoTiffWriter(out_path, width, height, bands, src.crs, src.transform, compress)
+        renderer = _OverlayRenderer(min(block_width, width), strip_height, dpi, segments,
+                                    segment_colors, polygons, dimensions, labels, coord_labels,
+                                    text_margin)
+        completed = False
+        try:
+            for row0 in range(0, height, strip_height):
+                if cancelled is not None and cancelled():
+                    return False
+                strip_h = min(strip_height, height - row0)
+                strip = _to_rgb8(src.read(window=Window(0, row0, width, strip_h)))
+                for col0 in range(0, width, block_width):
+                    block_w = min(block_width, width - col0)
+                    overlay = renderer.render(col0, row0, block_w, strip_h)
+                    if overlay is None:
+                        continue
+                    block = strip[:, col0:col0 + block_w]
+                    alpha = overlay[..., 3:4].astype(np.float32) / 255.0
+                    block[..., :3] = (block[..., :3] * (1.0 - alpha)
+                                      + overlay[..., :3] * alpha + 0.5).astype(np.uint8)
+                    if bands == 4:
+                        np.maximum(block[..., 3], overlay[..., 3], out=block[..., 3])
+                writer.write_strip(row0, strip)
+                if progress is not None:
+                    progress(int(100 * (row0 + strip_h) / height))
+            completed = True
+        finally:
+            writer.close()
+            if not completed and os.path.exists(out_path):
+                os.remove(out_path)
+        if is_png:
+            write_world_file(out_path, src.transform, src.crs)
+    return True
@@ -4,10 +4,13 @@ import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei']
 matplotlib.rcParams['axes.unicode_minus'] = False
 
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+from interactive_overlay import BlitOverlay
+from tiled_raster import ArrayPyramid
+from tool_router import ToolRouter
+
 
 class ImageCanvas(FigureCanvas):
     """
@@ -24,6 +27,9 @@ class ImageCanvas(FigureCanvas):
         self.ax.set_position([0, 0, 1, 1])  # 让图像填满整个画布
         
         self.image_data = None
+        self.raster = None  # 分块读取的影像金字塔（TiledRaster / ArrayPyramid）
+        self.image_artist = None
+        self._raster_view_key = None  # 上次读取的 (抽稀倍数, 瓦片范围)，未变化时不重新拼接
         self.transform = None  # 存储影像变换信息
         self.enable_pan = True
         self.is_panning = False
@@ -34,6 +40,16 @@ class ImageCanvas(FigureCanvas):
         self.mpl_connect('button_press_event', self.on_press)
         self.mpl_connect('motion_notify_event', self.on_move)
         self.mpl_connect('button_release_event', self.on_release)
+        self.mpl_connect('resize_event', self.on_resize)
+
+        # 交互绘制的动态对象覆盖层（橡皮筋线、绘制中的多边形等）
+        self.overlay = BlitOverlay(self)
+
+        # 绘图工具的事件分发器：各工具只登记一次，事件只转发给当前激活的工具
+        self.tool_router = ToolRouter(self)
+
+        # 视图（缩放 / 平移 / 尺寸）变化回调，用于按视图范围刷新的图层
+        self.view_listeners = []
 
         # 性能优化设置
         self.fig.set_tight_layout(False)  # 禁用tight_layout以避免自动调整
@@ -46,22 +62,91 @@ class ImageCanvas(FigureCanvas):
     def show_image(self, image_array, transform):
         """
         显示传入的影像数据（格式为 H x W x 波段，一般为 RGB 或 RGBA）
-        并设置对应的变换信息，同时绘制指北针
+        并设置对应的变换信息，同时绘制指北针。
+        数组以抽稀金字塔方式显示，缩放/平移时只重采样当前视图所需的层级。
         """
-        self.transform = transform  # 设置 transform 属性
-        self.ax.clear()
+        self.show_raster(ArrayPyramid(image_array), transform)
         self.image_data = image_array
-        
-        # 使用性能更好的显示设置，保持原始比例
-        self.ax.imshow(self.image_data, interpolation='nearest', aspect='equal')
+
+    def show_raster(self, raster, transform):
+        """
+        显示分块读取的影像（TiledRaster / ArrayPyramid）：只读取当前视图覆盖到的瓦片，
+        视图变化时按需补读，并根据缩放程度选择金字塔层级
+        """
+        self.transform = transform
+        self.ax.clear()
+        self.raster = raster
+        self.image_data = raster  # 非 None 即表示已加载影像
+        self.image_artist = None
+        self._raster_view_key = None
+
+        # 初始视图为整幅影像，像素坐标系与 imshow 整幅数组时一致
+        self.ax.set_xlim(-0.5, raster.width - 0.5)
+        self.ax.set_ylim(raster.height - 0.5, -0.5)
+        self.ax.set_aspect('equal')
         self.ax.axis('off')
-        
-        # 添加指北针
+
+        self.refresh_raster_view()
         self.add_north_arrow()
-        
-        # 使用draw_idle()代替draw()来提高性能
+        self.notify_view_changed()
+        self.draw_idle()
+
+    def refresh_raster_view(self):
+        """
+        根据当前 xlim/ylim 与画布像素尺寸选择金字塔层级，
+        读取可见范围内的瓦片并更新影像对象
+        """
+        if self.raster is None:
+            return
+
+        col0, col1 = sorted(self.ax.get_xlim())
+        row0, row1 = sorted(self.ax.get_ylim())
+
+        # 每个屏幕像素对应的影像像素数
+        bbox = self.ax.get_window_extent()
+        ratio = min((col1 - col0) / max(1.0, bbox.width),
+                    (row1 - row0) / max(1.0, bbox.height))
+        factor = self.raster.choose_level(ratio)
+
+        # 视图四周各外扩半个视图，小幅平移时直接复用已拼接的影像
+        pad_x = (col1 - col0) / 2
+        pad_y = (row1 - row0) / 2
+        bounds = (col0 - pad_x, row0 - pad_y, col1 + pad_x, row1 + pad_y)
+        tiles = self.raster.tile_range(*bounds, factor=factor)
+        if tiles is None:
+            return
+        key = (factor, tiles)
+        if key == self._raster_view_key:
+            return
+        self._raster_view_key = key
+
+        data, extent = self.raster.read_region(*bounds, factor=factor)
+        if self.image_artist is None:
+            self.image_artist = self.ax.imshow(data, extent=extent, interpolation='nearest', aspect='equal')
+        else:
+            self.image_artist.set_data(data)
+            self.image_artist.set_extent(extent)
+
+    def invalidate_raster_view(self):
+        """
+        影像数据更新（如后台缩略图就绪）后重新读取当前视图
+        """
+        self._raster_view_key = None
+        self.refresh_raster_view()
         self.draw_idle()
 
+    def clear_image(self):
+        """
+        清空影像及其缓存
+        """
+        if self.raster is not None:
+            self.raster.clear_cache()
+        self.raster = None
+        self.image_data = None
+        self.image_artist = None
+        self._raster_view_key = None
+        self.transform = None
+
     def add_north_arrow(self):
         """
         在图像右上角添加指北针（红色箭头和"N"标识）。
@@ -106,6 +191,8 @@ class ImageCanvas(FigureCanvas):
 
         self.ax.set_xlim(new_xmin, new_xmax)
         self.ax.set_ylim(new_ymin, new_ymax)
+        self.refresh_raster_view()
+        self.notify_view_changed()
 
         # 使用draw_idle()代替draw()来提高性能
         self.draw_idle()
@@ -139,7 +226,9 @@ class ImageCanvas(FigureCanvas):
 
         self.pan_start_x = event.xdata
         self.pan_start_y = event.ydata
-        
+        self.refresh_raster_view()
+        self.notify_view_changed()
+
         # 使用draw_idle()代替draw()来提高性能
         self.draw_idle()
 
@@ -152,6 +241,23 @@ class ImageCanvas(FigureCanvas):
             self.pan_start_x = None
             self.pan_start_y = None
 
+    def on_resize(self, event):
+        """
+        画布尺寸变化时重新选择抽稀倍数
+        """
+        self.refresh_raster_view()
+        self.notify_view_changed()
+
+    def add_view_listener(self, callback):
+        """
+        登记视图变化回调（无参数），在缩放、平移、尺寸变化及加载影像后、重绘前调用
+        """
+        self.view_listeners.append(callback)
+
+    def notify_view_changed(self):
+        for callback in self.view_listeners:
+            callback()
+
     def set_label_mode(self, enabled):
         """
         设置是否启用标注模式
@@ -0,0 +1,69 @@
+"""
+interactive_overlay.py
+
+交互绘制的覆盖层（blitting）：
+-   每次完整重绘后缓存一份不含动态对象的画布背景
+-   橡皮筋线、正在绘制的多边形、尺寸预览线等动态对象设为 animated，
+    更新时只需恢复背景并重绘这些对象，不再重新渲染整幅正射影像
+"""
+
+
+class BlitOverlay:
+    """
+    画布上的动态对象管理器，由 ImageCanvas 创建并共享给各绘图工具
+    """
+
+    def __init__(self, canvas):
+        """
+        :param canvas: ImageCanvas 对象
+        """
+        self.canvas = canvas
+        self.artists = []
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add_artist(self, artist):
+        """
+        登记一个动态对象（需已添加到 Axes 中），返回该对象
+        """
+        artist.set_animated(True)
+        if artist not in self.artists:
+            self.artists.append(artist)
+        return artist
+
+    def remove_artist(self, artist):
+        """
+        注销动态对象（对象本身仍需由调用方从 Axes 中移除）
+        """
+        if artist in self.artists:
+            self.artists.remove(artist)
+
+    def release(self, artist):
+        """
+        将动态对象转为普通对象（例如绘制完成的多边形），之后随画布正常重绘
+        """
+        self.remove_artist(artist)
+        artist.set_animated(False)
+
+    def on_draw(self, event):
+        """
+        完整重绘后缓存背景，并把动态对象画回画布
+        """
+        self.background = self.canvas.copy_from_bbox(self.canvas.fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            if artist.get_visible() and artist.figure is not None:
+                self.canvas.fig.draw_artist(artist)
+
+    def update(self):
+        """
+        只重绘动态对象：恢复缓存背景 -> 绘制动态对象 -> blit
+        """
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.canvas.fig.bbox)
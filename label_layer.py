@@ -0,0 +1,188 @@
+"""
+label_layer.py
+
+大量标注的分级显示图层：
+-   标注数据（坐标、序号）与绘图对象分离，坐标以数组保存
+-   视图变化时只绘制当前视图范围内的标注，视图外的不参与布局与绘制
+-   视图内标注过多（缩小显示整村范围时）按屏幕网格聚合，每格显示一个"数量"标记
+-   文字对象放在复用池中：仍在视图内的标注保持原对象，文字与样式不变，
+    matplotlib 的文字布局缓存得以跨帧复用；离开视图的对象隐藏后留待复用
+"""
+
+import numpy as np
+
+# 单个标注的样式（与原先逐条 ax.text 的样式一致）
+LABEL_STYLE = dict(
+    fontsize=10, color='red', ha='center', va='center',
+    bbox=dict(boxstyle="round,pad=0.3", fc="yellow", ec="red", alpha=0.5),
+)
+# 聚合标记的样式
+CLUSTER_STYLE = dict(
+    fontsize=9, color='white', ha='center', va='center', fontweight='bold',
+    bbox=dict(boxstyle="circle,pad=0.4", fc="red", ec="darkred", alpha=0.7),
+)
+
+
+class LabelLayer:
+    """
+    标注图层：add / clear 只修改数据，update 按当前视图刷新绘图对象
+    """
+
+    def __init__(self, ax, max_labels=300, cluster_px=48, style=None):
+        """
+        :param ax: 绘制所在的 Axes
+        :param max_labels: 视图内标注数不超过此值时逐条显示，否则聚合
+        :param cluster_px: 聚合网格的边长（屏幕像素）
+        :param style: 单个标注的文字样式，None 时使用 LABEL_STYLE
+        """
+        self.ax = ax
+        self.style = LABEL_STYLE if style is None else style
+        self.max_labels = max_labels
+        self.cluster_px = cluster_px
+        self.visible = True
+
+        self._xs = []
+        self._ys = []
+        self.texts = []         # 各标注显示的文字
+        self._xy = None         # (N, 2) 坐标数组缓存，数据变化时重建
+
+        self._label_artists = {}    # 标注序号 -> 正在显示该标注的文字对象
+        self._cluster_artists = []  # 正在使用的聚合标记
+        self._free_labels = []      # 可复用的标注文字对象
+        self._free_clusters = []    # 可复用的聚合标记
+
+    def __len__(self):
+        return len(self.texts)
+
+    # ------------------------------------------------------------------
+    # 数据
+    # ------------------------------------------------------------------
+    def add(self, x, y, text):
+        self.extend([(x, y, text)])
+
+    def extend(self, items):
+        """批量追加 (x, y, 文字)"""
+        for x, y, text in items:
+            self._xs.append(float(x))
+            self._ys.append(float(y))
+            self.texts.append(str(text))
+        self._xy = None
+
+    def clear(self):
+        """清除全部标注（绘图对象隐藏后保留在池中）"""
+        self._xs.clear()
+        self._ys.clear()
+        self.texts.clear()
+        self._xy = None
+        self._release_all()
+
+    def coords(self):
+        if self._xy is None:
+            self._xy = np.column_stack([np.asarray(self._xs, dtype=np.float64),
+                                        np.asarray(self._ys, dtype=np.float64)]).reshape(-1, 2)
+        return self._xy
+
+    # ------------------------------------------------------------------
+    # 绘制
+    # ------------------------------------------------------------------
+    def set_visible(self, visible):
+        self.visible = visible
+        self.update()
+
+    def update(self):
+        """
+        按当前视图刷新：视图内标注少时逐条显示，多时按屏幕网格聚合。
+        只修改绘图对象的属性，由调用方负责重绘画布。
+        """
+        self._check_pool()
+        if not self.visible or not self.texts:
+            self._release_all()
+            return
+
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        xy = self.coords()
+        inside = np.flatnonzero((xy[:, 0] >= x0) & (xy[:, 0] <= x1) &
+                                (xy[:, 1] >= y0) & (xy[:, 1] <= y1))
+
+        if len(inside) <= self.max_labels:
+            singles, clusters = inside, []
+        else:
+            singles, clusters = self._cluster(inside, x0, y0, x1 - x0)
+        self._show_labels(singles)
+        self._show_clusters(clusters)
+
+    def _cluster(self, inside, x0, y0, view_width):
+        """
+        按屏幕网格聚合视图内的标注：单独落在一格的标注仍逐条显示，
+        其余每格返回 (中心 x, 中心 y, 数量)
+        """
+        width_px = max(1.0, self.ax.get_window_extent().width)
+        cell = max(view_width / width_px * self.cluster_px, 1e-9)
+        xy = self.coords()[inside]
+        cx = np.floor((xy[:, 0] - x0) / cell).astype(np.int64)
+        cy = np.floor((xy[:, 1] - y0) / cell).astype(np.int64)
+        keys = cx * (int(cy.max()) + 1) + cy
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+
+        singles = inside[counts[inverse] == 1]
+        multi = np.flatnonzero(counts > 1)
+        sum_x = np.bincount(inverse, weights=xy[:, 0], minlength=len(counts))
+        sum_y = np.bincount(inverse, weights=xy[:, 1], minlength=len(counts))
+        clusters = [(sum_x[k] / counts[k], sum_y[k] / counts[k], int(counts[k])) for k in multi]
+        return singles, clusters
+
+    def _show_labels(self, indices):
+        wanted = set(indices.tolist())
+        # 离开视图的标注释放其文字对象
+        for index in [i for i in self._label_artists if i not in wanted]:
+            artist = self._label_artists.pop(index)
+            artist.set_visible(False)
+            self._free_labels.append(artist)
+        # 新进入视图的标注取用空闲对象；已显示的保持不变
+        for index in wanted:
+            if index in self._label_artists:
+                continue
+            artist = self._free_labels.pop() if self._free_labels else self.ax.text(
+                0, 0, "", transform=self.ax.transData, **self.style)
+            artist.set_position((self._xs[index], self._ys[index]))
+            artist.set_text(self.texts[index])
+            artist.set_visible(True)
+            self._label_artists[index] = artist
+
+    def _show_clusters(self, clusters):
+        while len(self._cluster_artists) < len(clusters):
+            artist = self._free_clusters.pop() if self._free_clusters else self.ax.text(
+                0, 0, "", transform=self.ax.transData, **CLUSTER_STYLE)
+            self._cluster_artists.append(artist)
+        while len(self._cluster_artists) > len(clusters):
+            artist = self._cluster_artists.pop()
+            artist.set_visible(False)
+            self._free_clusters.append(artist)
+        for artist, (x, y, count) in zip(self._cluster_artists, clusters):
+            artist.set_position((x, y))
+            text = str(count)
+            if artist.get_text() != text:
+                artist.set_text(text)
+            artist.set_visible(True)
+
+    def _release_all(self):
+        for artist in self._label_artists.values():
+            artist.set_visible(False)
+            self._free_labels.append(artist)
+        self._label_artists.clear()
+        self._show_clusters([])
+
+    def _check_pool(self):
+        """
+        坐标轴被清空（如重新加载影像时 ax.clear()）后，池中对象已不在坐标轴上，全部丢弃重建
+        """
+        artists = (list(self._label_artists.values()) + self._cluster_artists
+                   + self._free_labels + self._free_clusters)
+        if artists and artists[0].axes is not None and artists[0] in self.ax.texts:
+            return
+        self._label_artists.clear()
+        self._cluster_artists.clear()
+        self._free_labels.clear()
+        self._free_clusters.clear()
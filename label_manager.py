@@ -3,12 +3,14 @@ import matplotlib
 matplotlib.rcParams['font.sans-serif'] = ['SimHei']
 matplotlib.rcParams['axes.unicode_minus'] = False
 
-import matplotlib.pyplot as plt
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QLineEdit,
-    QPushButton, QHBoxLayout, QTableWidgetItem, QMessageBox
+    QPushButton, QHBoxLayout, QMessageBox
 )
 
+from label_layer import LabelLayer
+from table_models import ColumnTableModel
+
 class LabelDialog(QDialog):
     """
     用于创建标注时的对话框，输入“标注序号”和“内容”
@@ -51,26 +53,37 @@ class LabelManager:
     def __init__(self, canvas, table_widget):
         """
         :param canvas: ImageCanvas 对象
-        :param table_widget: QTableWidget 显示标注列表
+        :param table_widget: QTableView 显示标注列表
         """
         self.canvas = canvas
         self.ax = self.canvas.ax
         self.table_widget = table_widget
 
-        # 每条标注: { x, y, order, content, text_obj }
+        # 每条标注: { x, y, order, content }
         self.annotations = []
+        # 标注的绘制交给分级显示图层：只绘制视图内的标注，过密时聚合为数量标记
+        self.layer = LabelLayer(self.ax)
+        self.canvas.add_view_listener(self.layer.update)
         self.is_labeling = False
         self._temp_text_artist = None  # 汇总文本对象
+        self.on_click = None  # 标注模式下点击图像的回调，由主窗口设置
+        self.on_change = None  # 要素变化回调 (操作, 图层, 数据)，由主窗口设置（自动保存）
+
+        # 登记到画布的工具分发器
+        self.canvas.tool_router.register(
+            'label', on_press=self.on_press, on_deactivate=self.stop_labeling
+        )
 
-        # 设置表格列
-        self.table_widget.setColumnCount(2)
-        self.table_widget.setHorizontalHeaderLabels(["标注序号", "内容"])
+        # 表格数据模型
+        self.table_model = ColumnTableModel(["标注序号", "内容"], numeric_columns=(0,), parent=table_widget)
+        self.table_widget.setModel(self.table_model)
 
         self.ax.set_title("")
         self.ax.axis('off')
 
     def start_labeling(self):
         """进入标注模式"""
+        self.canvas.tool_router.activate('label')
         self.is_labeling = True
         self.canvas.set_label_mode(True)
 
@@ -78,6 +91,12 @@ class LabelManager:
         """退出标注模式"""
         self.is_labeling = False
         self.canvas.set_label_mode(False)
+        self.canvas.tool_router.deactivate('label')
+
+    def on_press(self, event):
+        """标注模式下的鼠标点击，交由主窗口弹出标注对话框"""
+        if self.on_click is not None:
+            self.on_click(event)
 
     def add_annotation(self, x, y, order_str, content_str):
         """
@@ -87,38 +106,39 @@ class LabelManager:
             if not order_str or not content_str:
                 raise ValueError("标注序号和内容不能为空")
 
-            text_obj = self.ax.text(
-                x, y,
-                f"{order_str}",
-                fontsize=10,
-                color='red',
-                transform=self.ax.transData,
-                ha='center',
-                va='center',
-                bbox=dict(boxstyle="round,pad=0.3", fc="yellow", ec="red", alpha=0.5)
-            )
-            one_ann = {'x': x, 'y': y, 'order': order_str, 'content': content_str, 'text_obj': text_obj}
-            self.annotations.append(one_ann)
-
-            row_index = self.table_widget.rowCount()
-            self.table_widget.insertRow(row_index)
-            self.table_widget.setItem(row_index, 0, QTableWidgetItem(str(order_str)))
-            self.table_widget.setItem(row_index, 1, QTableWidgetItem(str(content_str)))
+            self._add_items([(x, y, order_str, content_str)])
+            if self.on_change is not None:
+                self.on_change("add", "labels", {'x': x, 'y': y, 'order': order_str, 'content': content_str})
 
             self.canvas.draw()
 
         except Exception as e:
             QMessageBox.critical(None, "标注错误", f"添加标注时发生错误：{str(e)}")
 
+    def _add_items(self, items):
+        """
+        绘制标注并追加到列表与表格，items 为 (x, y, 序号, 内容) 序列
+        """
+        for x, y, order_str, content_str in items:
+            self.annotations.append({'x': x, 'y': y, 'order': order_str, 'content': content_str})
+        self.table_model.append_rows((order_str, content_str) for _, _, order_str, content_str in items)
+        self.layer.extend((x, y, order_str) for x, y, order_str, _ in items)
+        self.layer.update()
+
+    def restore_annotations(self, items):
+        """
+        从项目文件恢复标注（不触发 on_change），items 为 {x, y, order, content} 字典列表
+        """
+        self._add_items([(it['x'], it['y'], it['order'], it['content']) for it in items])
+        self.canvas.draw_idle()
+
     def clear_annotations(self):
         """清除所有标注和表格内容"""
-        for ann in self.annotations:
-            try:
-                ann['text_obj'].remove()
-            except Exception:
-                pass
+        self.layer.clear()
         self.annotations.clear()
-        self.table_widget.setRowCount(0)
+        self.table_model.clear()
+        if self.on_change is not None:
+            self.on_change("clear", "labels")
         self.canvas.draw()
 
     def export_labeled_image(self, out_path):
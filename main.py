@@ -1,15 +1,32 @@
+"""
+main.py
+
+程序入口。GDAL/rasterio、pyproj、OpenCV 及描述工具（tkinter、PIL）均在首次使用时才导入；
+设置环境变量 SIPU_PROFILE_STARTUP=1 可记录导入耗时与"启动到窗口"耗时（见 startup_profile.py）。
+"""
+
 import sys
-import rasterio.sample  # 强制显式导入
-from PyQt5.QtWidgets import QApplication
-from main_window import MainWindow
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
+import multiprocessing
+
+from startup_profile import StartupProfiler
 
 def main():
+    profiler = StartupProfiler()
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    profiler.mark("qt_imported")
+
     app = QApplication(sys.argv)
+    from main_window import MainWindow
+    profiler.mark("main_window_imported")
+
     window = MainWindow()
+    profiler.mark("main_window_created")
     window.show()
+    # 事件循环开始处理后窗口才真正显示
+    QTimer.singleShot(0, profiler.window_shown)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后轮廓提取、批量处理的进程池需要
     main()
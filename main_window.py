@@ -10,10 +10,11 @@ import numpy as np
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog,
-    QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
-    QMessageBox, QStatusBar, QGroupBox, QApplication, QComboBox
+    QLabel, QTableView, QHeaderView, QLineEdit,
+    QMessageBox, QStatusBar, QGroupBox, QApplication, QComboBox,
+    QProgressDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 import matplotlib
 matplotlib.rcParams["font.sans-serif"] = ["SimHei"]
@@ -21,7 +22,6 @@ matplotlib.rcParams["axes.unicode_minus"] = False
 
 from image_canvas import ImageCanvas
 from orthophoto_utils import (
-    read_orthophoto,
     transform_coordinate,
     decimal_degrees_to_dms,
     export_csv
@@ -31,8 +31,11 @@ from coordinate_picker import CoordinatePicker
 from polygon_drawer import PolygonDrawer  # 多边形绘制模块
 from dimension_annotator import DimensionAnnotator  # 尺寸标注模块
 from cad_drawer import CADDrawer  # CAD绘图模块
-import building_description  # 古建筑描述工具
-import stele_description  # 碑刻描述工具
+from raster_loader import RasterLoadWorker  # 后台加载 DOM / DSM
+from contour_worker import ContourExportWorker  # 后台提取轮廓
+from tiled_raster import TiledRaster
+from description_host import DescriptionHost  # 描述工具在独立进程中运行
+from project_store import ProjectSession, PROJECT_EXT, has_autosave  # 项目文件与自动保存
 import os
 
 class MainWindow(QMainWindow):
@@ -52,6 +55,14 @@ class MainWindow(QMainWindow):
         self.dataset_dsm = None   # DSM 数据
         self.transform = None
         self.coords_list = []
+        self.dom_loader = None    # 正在进行的 DOM 后台加载任务
+        self.dom_progress = None  # DOM 加载进度框
+        self.dsm_loader = None
+        self.contour_worker = None    # 正在进行的轮廓导出任务
+        self.contour_progress = None  # 轮廓导出进度框
+        self.description_host = DescriptionHost()  # 描述工具宿主进程，首次打开时启动
+        self.project = ProjectSession()  # 当前项目，每次编辑追加到自动保存日志
+        self.pending_restore = None      # 打开项目时待影像加载后恢复的要素
 
         # ============ 主 Widget ============
         central_widget = QWidget()
@@ -83,6 +94,14 @@ class MainWindow(QMainWindow):
         self.btn_clear_all.clicked.connect(self.clear_all)
         layout_data_load.addWidget(self.btn_clear_all)
 
+        self.btn_open_project = QPushButton("打开项目")
+        self.btn_open_project.clicked.connect(self.open_project)
+        layout_data_load.addWidget(self.btn_open_project)
+
+        self.btn_save_project = QPushButton("保存项目")
+        self.btn_save_project.clicked.connect(self.save_project)
+        layout_data_load.addWidget(self.btn_save_project)
+
         top_groups_layout.addWidget(group_data_load)
 
         # ------------------- 坐标操作分组 -------------------
@@ -101,6 +120,14 @@ class MainWindow(QMainWindow):
         self.btn_export_coords.clicked.connect(self.export_coords)
         layout_coords.addWidget(self.btn_export_coords)
 
+        self.btn_export_vector = QPushButton("导出矢量")
+        self.btn_export_vector.clicked.connect(self.export_vector)
+        layout_coords.addWidget(self.btn_export_vector)
+
+        self.btn_import_survey = QPushButton("导入测量数据")
+        self.btn_import_survey.clicked.connect(self.import_survey)
+        layout_coords.addWidget(self.btn_import_survey)
+
         top_groups_layout.addWidget(group_coords)
 
         # ------------------- 标注操作分组 -------------------
@@ -119,6 +146,10 @@ class MainWindow(QMainWindow):
         self.btn_export_label.clicked.connect(self.export_label)
         layout_labels.addWidget(self.btn_export_label)
 
+        self.btn_export_georef = QPushButton("导出原图")
+        self.btn_export_georef.clicked.connect(self.export_georeferenced_image)
+        layout_labels.addWidget(self.btn_export_georef)
+
         top_groups_layout.addWidget(group_labels)
 
         # ------------------ 多边形操作分组 ------------------
@@ -194,6 +225,10 @@ class MainWindow(QMainWindow):
         self.btn_export_cad.clicked.connect(self.export_cad)
         layout_cad.addWidget(self.btn_export_cad)
 
+        self.btn_export_contours = QPushButton("提取轮廓")
+        self.btn_export_contours.clicked.connect(self.export_dom_contours)
+        layout_cad.addWidget(self.btn_export_contours)
+
         top_groups_layout.addWidget(group_cad)
 
         # ------------------ 版本信息按钮 ------------------
@@ -212,31 +247,34 @@ class MainWindow(QMainWindow):
 
         # ============ 左侧：影像区域 ============
         self.canvas = ImageCanvas()
-        self.canvas.mpl_connect("button_press_event", self.on_click_image)
         body_layout.addWidget(self.canvas, stretch=5)  # 增加图像区域的比例
 
         # ============ 右侧：坐标/标注表格 ============
         right_layout = QVBoxLayout()
 
-        # 坐标列表
+        # 坐标列表（表格数据由 CoordinatePicker 的模型提供，点击表头排序）
+        coords_header = QHBoxLayout()
         self.label_coords = QLabel("点选坐标列表：")
-        right_layout.addWidget(self.label_coords)
+        coords_header.addWidget(self.label_coords)
+        self.filter_coords = QLineEdit()
+        self.filter_coords.setPlaceholderText("筛选")
+        coords_header.addWidget(self.filter_coords)
+        right_layout.addLayout(coords_header)
 
-        self.table_coords = QTableWidget()
-        self.table_coords.setColumnCount(6)
-        self.table_coords.setHorizontalHeaderLabels([
-            "序号", "测点类型", "纬度", "经度", "海拔高程", "测点说明"
-        ])
+        self.table_coords = QTableView()
         self.table_coords.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         right_layout.addWidget(self.table_coords, stretch=1)
 
-        # 标注列表
+        # 标注列表（表格数据由 LabelManager 的模型提供）
+        labels_header = QHBoxLayout()
         self.label_labels = QLabel("标注栏：")
-        right_layout.addWidget(self.label_labels)
+        labels_header.addWidget(self.label_labels)
+        self.filter_labels = QLineEdit()
+        self.filter_labels.setPlaceholderText("筛选")
+        labels_header.addWidget(self.filter_labels)
+        right_layout.addLayout(labels_header)
 
-        self.table_labels = QTableWidget()
-        self.table_labels.setColumnCount(2)
-        self.table_labels.setHorizontalHeaderLabels(["标注序号", "内容"])
+        self.table_labels = QTableView()
         self.table_labels.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         right_layout.addWidget(self.table_labels, stretch=1)
 
@@ -244,6 +282,7 @@ class MainWindow(QMainWindow):
 
         # 初始化标注管理器/坐标拾取器/多边形绘制器/尺寸标注器
         self.label_manager = LabelManager(self.canvas, self.table_labels)
+        self.label_manager.on_click = self.on_click_image
         self.coordinate_picker = CoordinatePicker(
             self.canvas,
             self.table_coords,
@@ -254,10 +293,38 @@ class MainWindow(QMainWindow):
         self.dimension_annotator = DimensionAnnotator(self.canvas)
         self.cad_drawer = CADDrawer(self.canvas)  # 初始化CAD绘图器
 
+        # 表格排序与筛选在模型内完成；初始不排序（按录入顺序显示）
+        for table, edit in ((self.table_coords, self.filter_coords),
+                            (self.table_labels, self.filter_labels)):
+            table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            table.setSortingEnabled(True)
+            edit.textChanged.connect(table.model().set_filter)
+
+        # 各工具的编辑记录到项目自动保存日志
+        for tool in (self.coordinate_picker, self.label_manager, self.polygon_drawer,
+                     self.dimension_annotator, self.cad_drawer):
+            tool.on_change = self.on_feature_changed
+
+        # 窗口显示后检查上次未保存的自动保存记录
+        QTimer.singleShot(0, self.check_autosave)
+
     # =========================================================================
     #  事件与功能函数
     # =========================================================================
 
+    def closeEvent(self, event):
+        """关闭主窗口：处理未保存的项目，并结束描述工具宿主进程"""
+        if not self.confirm_close_project():
+            event.ignore()
+            return
+        self.project.close()
+        self.description_host.shutdown()
+        worker = self.contour_worker
+        if worker is not None:
+            self.cancel_contour_export()
+            worker.wait()
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
         """
         监听 ESC 键：退出标注模式、坐标拾取模式、多边形绘制模式、以及尺寸标注模式
@@ -292,32 +359,23 @@ class MainWindow(QMainWindow):
 
     def on_click_image(self, event):
         """
-        根据当前状态进行处理：
-         1) 若处于坐标拾取模式 => return，让 coordinate_picker 自行处理
-         2) 若处于多边形绘制模式 => return，让 polygon_drawer 自行处理
-         3) 若处于标注模式 => 弹出标注对话框
-         4) 其他状态 => 不处理
+        标注模式下点击图像：弹出标注对话框并添加标注。
+        画布事件由 canvas.tool_router 分发，只有标注工具激活时才会调用此函数。
         """
-        # 坐标拾取
-        if self.coordinate_picker.is_in_select_mode():
+        if event.button != 1:
             return
-        # 多边形绘制
-        if self.polygon_drawer.is_drawing_polygon:
+        if not self.dataset_dom:
             return
-        # 标注模式
-        if self.label_manager.is_labeling:
-            if not self.dataset_dom:
-                return
-            if event.inaxes != self.canvas.ax:
-                return
-            xdata, ydata = event.xdata, event.ydata
-            if xdata is None or ydata is None:
-                return
-            dlg = LabelDialog(self)
-            if dlg.exec_() == dlg.Accepted:
-                order_str, content_str = dlg.get_data()
-                if order_str and content_str:
-                    self.label_manager.add_annotation(xdata, ydata, order_str, content_str)
+        if event.inaxes != self.canvas.ax:
+            return
+        xdata, ydata = event.xdata, event.ydata
+        if xdata is None or ydata is None:
+            return
+        dlg = LabelDialog(self)
+        if dlg.exec_() == dlg.Accepted:
+            order_str, content_str = dlg.get_data()
+            if order_str and content_str:
+                self.label_manager.add_annotation(xdata, ydata, order_str, content_str)
 
     # =========================================================================
     #  坐标拾取功能
@@ -337,7 +395,6 @@ class MainWindow(QMainWindow):
         """
         清空坐标列表
         """
-        self.table_coords.setRowCount(0)
         self.coordinate_picker.clear_coords()
 
     def export_coords(self):
@@ -357,6 +414,74 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "导出失败", f"导出坐标时发生错误：{str(e)}")
 
+    def export_vector(self):
+        """
+        导出测点、多边形和CAD直线为矢量数据（GeoPackage / Shapefile / GeoJSON），
+        坐标为投影坐标 EPSG:4548
+        """
+        if self.transform is None:
+            QMessageBox.warning(self, "导出矢量", "请先导入DOM，才能将像素坐标换算为投影坐标！")
+            return
+        out_path, _ = QFileDialog.getSaveFileName(
+            self, "导出矢量", "",
+            "GeoPackage (*.gpkg);;Shapefile (*.shp);;GeoJSON (*.geojson)"
+        )
+        if not out_path:
+            return
+        try:
+            from vector_exporter import export_vector
+
+            segments, colors = self.cad_drawer.get_segments()
+            count = export_vector(
+                out_path,
+                self.transform,
+                coords=self.coordinate_picker.get_coords(),
+                polygons=self.polygon_drawer.get_polygons(),
+                segments=segments,
+                segment_colors=colors,
+            )
+            QMessageBox.information(self, "导出成功", f"已导出 {count} 个要素到：{out_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "导出失败", f"导出矢量时发生错误：{str(e)}")
+
+    def import_survey(self):
+        """
+        批量导入已有测量成果（CSV / GeoJSON / DXF）：测点加入坐标列表，
+        闭合边界加入多边形，其余线段加入CAD直线
+        """
+        if self.transform is None:
+            QMessageBox.warning(self, "导入测量数据", "请先导入DOM，才能将坐标换算到影像上！")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入测量数据", "",
+            "测量数据 (*.csv *.txt *.geojson *.json *.dxf);;所有文件 (*.*)"
+        )
+        if not file_path:
+            return
+        try:
+            from survey_importer import read_survey
+
+            survey = read_survey(file_path)
+            if survey.is_empty():
+                QMessageBox.information(self, "导入测量数据", "文件中没有可导入的测点或边界。")
+                return
+            crs = self.dataset_dom.crs if self.dataset_dom is not None and self.dataset_dom.crs else "EPSG:4548"
+            result = survey.to_pixels(self.transform, dataset_crs=crs)
+
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                self.coordinate_picker.add_points(result["points"])
+                self.polygon_drawer.add_polygons(result["polygons"])
+                self.cad_drawer.add_lines(result["segments"])
+            finally:
+                QApplication.restoreOverrideCursor()
+            self.update_status(
+                f"已导入 {len(result['points'])} 个测点、{len(result['polygons'])} 个多边形、"
+                f"{len(result['segments'])} 条线段：{file_path}"
+            )
+        except Exception as e:
+            QMessageBox.critical(self, "导入失败", f"导入测量数据时发生错误：{str(e)}")
+
     # =========================================================================
     #  标注功能
     # =========================================================================
@@ -366,12 +491,7 @@ class MainWindow(QMainWindow):
         切换标注模式
         """
         if not self.label_manager.is_labeling:
-            # 若坐标拾取模式，先关闭
-            if self.coordinate_picker.is_in_select_mode():
-                self.coordinate_picker.toggle_coordinate_pick()
-            # 若多边形绘制模式，先关闭
-            if self.polygon_drawer.is_drawing_polygon:
-                self.polygon_drawer.stop_polygon_mode()
+            # 进入标注模式时，其他绘图工具由分发器自动停用
             self.label_manager.start_labeling()
             QMessageBox.information(self, "提示", "已进入标注模式，点击图像可创建标注。\n按ESC键退出标注模式。")
             self.update_status("标注模式")
@@ -394,6 +514,52 @@ class MainWindow(QMainWindow):
         if out_path:
             self.label_manager.export_labeled_image(out_path)
 
+    def export_georeferenced_image(self):
+        """
+        按 DOM 原始分辨率导出叠加标注、多边形、尺寸标注和 CAD 直线的影像（带地理参考），
+        逐条带合成写出
+        """
+        if self.dataset_dom is None:
+            QMessageBox.warning(self, "导出原图", "请先导入DOM！")
+            return
+        out_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "导出原图", "", "GeoTIFF (*.tif);;PNG + 坐标文件 (*.png)")
+        if not out_path:
+            return
+        if not out_path.lower().endswith((".tif", ".tiff", ".png")):
+            out_path += ".png" if selected_filter.startswith("PNG") else ".tif"
+
+        progress = QProgressDialog("正在导出影像...", "取消", 0, 100, self)
+        progress.setWindowTitle("导出原图")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+
+        def report(value):
+            progress.setValue(value)
+            QApplication.processEvents()
+
+        try:
+            from georef_export import export_georeferenced
+
+            segments, colors = self.cad_drawer.get_segments()
+            done = export_georeferenced(
+                self.dataset_dom.name,
+                out_path,
+                segments=segments,
+                segment_colors=colors,
+                polygons=self.polygon_drawer.get_polygons(),
+                dimensions=self.dimension_annotator.get_dimensions(),
+                labels=[(ann['x'], ann['y'], ann['order']) for ann in self.label_manager.annotations],
+                coord_labels=self.cad_drawer.get_coord_labels(),
+                progress=report,
+                cancelled=progress.wasCanceled,
+            )
+            self.update_status(f"影像已导出至: {out_path}" if done else "已取消导出影像")
+        except Exception as e:
+            QMessageBox.critical(self, "导出失败", f"导出影像时发生错误：{str(e)}")
+        finally:
+            progress.close()
+
     # =========================================================================
     #  多边形绘制功能
     # =========================================================================
@@ -401,13 +567,8 @@ class MainWindow(QMainWindow):
     def start_draw_polygon(self):
         """
         点击"开始绘制多边形"按钮：
-         - 先退出坐标拾取/标注模式，避免冲突
-         - 进入多边形绘制模式
+         - 进入多边形绘制模式（其他绘图工具由分发器自动停用，避免冲突）
         """
-        if self.coordinate_picker.is_in_select_mode():
-            self.coordinate_picker.toggle_coordinate_pick()
-        if self.label_manager.is_labeling:
-            self.label_manager.stop_labeling()
         self.polygon_drawer.start_polygon_mode()
         QMessageBox.information(self, "提示", "已进入多边形绘制模式：\n左键依次下顶点，右键或按ESC可结束。")
 
@@ -426,15 +587,9 @@ class MainWindow(QMainWindow):
     def start_dimension_annotation(self):
         """
         开始尺寸标注模式：
-         - 退出坐标拾取、标注和多边形绘制模式（避免冲突）
+         - 其他绘图工具由分发器自动停用（避免冲突）
          - 进入尺寸标注模式，等待用户依次点击两个点进行测距
         """
-        if self.coordinate_picker.is_in_select_mode():
-            self.coordinate_picker.toggle_coordinate_pick()
-        if self.label_manager.is_labeling:
-            self.label_manager.stop_labeling()
-        if self.polygon_drawer.is_drawing_polygon:
-            self.polygon_drawer.stop_polygon_mode()
         self.dimension_annotator.start_dimension_mode()
         self.update_status("尺寸标注模式")
 
@@ -451,32 +606,157 @@ class MainWindow(QMainWindow):
 
     def load_tif_dom(self):
         """
-        导入DOM
+        导入DOM：在后台线程中打开并读取首屏预览，界面保持可操作。
+        地理参考信息就绪后即可拾取坐标、绘图；预览读取过程中可取消。
         """
         file_path, _ = QFileDialog.getOpenFileName(self, "选择 DOM 文件", "", "TIF Files (*.tif *.tiff)")
-        if file_path:
-            try:
-                self.dataset_dom, image_array = read_orthophoto(file_path)
-                self.transform = self.dataset_dom.transform
-                image_data = image_array.transpose((1, 2, 0))  # [height, width, channels]
-                self.canvas.show_image(image_data, self.transform)
-                self.coordinate_picker.set_dataset_dom(self.dataset_dom)
-            except Exception as e:
-                QMessageBox.critical(self, "读取错误", f"无法读取DOM文件：{str(e)}")
+        if not file_path:
+            return
+        self.start_dom_loading(file_path)
+
+    def start_dom_loading(self, file_path):
+        """
+        在后台线程中加载指定的 DOM 文件
+        """
+        self.cancel_dom_loading()
+
+        loader = RasterLoadWorker(file_path, build_preview=True, parent=self)
+        progress = QProgressDialog("正在加载DOM...", "取消", 0, 100, self)
+        progress.setWindowTitle("导入DOM")
+        progress.setWindowModality(Qt.NonModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setValue(0)
+
+        loader.metadata_loaded.connect(lambda dataset, w=loader: self.on_dom_metadata(w, dataset))
+        loader.preview_loaded.connect(lambda preview, w=loader: self.on_dom_preview(w, preview))
+        loader.failed.connect(lambda message, w=loader: self.on_dom_failed(w, message))
+        loader.progress.connect(progress.setValue)
+        loader.finished.connect(loader.deleteLater)
+        progress.canceled.connect(lambda w=loader: self.cancel_dom_loading(w))
+
+        self.dom_loader = loader
+        self.dom_progress = progress
+        self.update_status("正在读取DOM...")
+        loader.start()
+
+    def on_dom_metadata(self, loader, dataset):
+        """
+        DOM 已打开：显示影像范围（预览就绪前粗层级为空白），启用拾取与绘图
+        """
+        if loader is not self.dom_loader:
+            dataset.close()  # 已取消或被新的加载取代
+            return
+        try:
+            if self.dataset_dom:
+                self.dataset_dom.close()
+                self.dataset_dom = None
+            self.dataset_dom = dataset
+            loader.dataset = dataset  # 取消加载时据此移除本次加载的影像
+            self.transform = dataset.transform
+            raster = TiledRaster(dataset)
+            raster.thumbnail_pending = raster.needs_thumbnail
+            self.canvas.show_raster(raster, self.transform)  # 按视图范围分块读取
+            self.coordinate_picker.set_dataset_dom(self.dataset_dom)
+            self.set_project_raster("dom_path", loader.file_path)
+            self.restore_pending_features()  # 打开项目时，影像就绪后再绘制要素
+            self.update_status("已读取DOM地理参考信息，正在生成预览...")
+        except Exception as e:
+            self._finish_dom_loading()
+            QMessageBox.critical(self, "读取错误", f"无法读取DOM文件：{str(e)}")
+
+    def on_dom_preview(self, loader, preview):
+        """
+        首屏预览（抽稀缩略图）读取完成
+        """
+        if loader is not self.dom_loader:
+            return
+        raster = self.canvas.raster
+        if preview is not None and isinstance(raster, TiledRaster):
+            raster.set_thumbnail(preview)
+            self.canvas.invalidate_raster_view()
+        self._finish_dom_loading()
+        self.update_status("DOM加载完成")
+
+    def on_dom_failed(self, loader, message):
+        if loader is not self.dom_loader:
+            return
+        self._finish_dom_loading()
+        self.restore_pending_features()
+        self.update_status("")
+        QMessageBox.critical(self, "读取错误", f"无法读取DOM文件：{message}")
+
+    def cancel_dom_loading(self, loader=None):
+        """
+        取消正在进行的 DOM 加载，并移除已显示的部分结果。
+        loader 不为 None 时仅在其仍为当前加载任务时生效。
+        """
+        if self.dom_loader is None or (loader is not None and loader is not self.dom_loader):
+            return
+        current = self.dom_loader
+        self._finish_dom_loading()
+        current.requestInterruption()
+        if self.dataset_dom is not None and getattr(current, "dataset", None) is self.dataset_dom:
+            if self.canvas.image_artist is not None:
+                self.canvas.image_artist.remove()
+            self.canvas.clear_image()
+            self.canvas.draw_idle()
+            self.coordinate_picker.set_dataset_dom(None)
+            self.dataset_dom.close()
+            self.dataset_dom = None
+            self.transform = None
+            self.set_project_raster("dom_path", "")
+        self.restore_pending_features()
+        self.update_status("已取消加载DOM")
+
+    def _finish_dom_loading(self):
+        """
+        结束当前加载任务并关闭进度框（先清除任务引用，关闭进度框触发的取消信号将被忽略）
+        """
+        progress = self.dom_progress
+        self.dom_loader = None
+        self.dom_progress = None
+        if progress is not None:
+            progress.close()
 
     def load_tif_dsm(self):
         """
-        导入DSM文件(含高程信息)
+        导入DSM文件(含高程信息)，在后台线程中打开
         """
         file_path, _ = QFileDialog.getOpenFileName(self, "选择 DSM 文件", "", "TIF Files (*.tif *.tiff)")
-        if file_path:
-            try:
-                dsm_dataset, _ = read_orthophoto(file_path)
-                self.dataset_dsm = dsm_dataset
-                self.coordinate_picker.set_dataset_dsm(self.dataset_dsm)
-                QMessageBox.information(self, "提示", "已成功加载DSM文件，可获取海拔信息。")
-            except Exception as e:
-                QMessageBox.critical(self, "读取错误", f"无法读取DSM文件：{str(e)}")
+        if not file_path:
+            return
+        self.start_dsm_loading(file_path)
+
+    def start_dsm_loading(self, file_path, notify=True):
+        """
+        在后台线程中加载指定的 DSM 文件
+        :param notify: 加载完成后是否弹出提示
+        """
+        loader = RasterLoadWorker(file_path, build_preview=False, parent=self)
+        loader.metadata_loaded.connect(lambda dataset, w=loader: self.on_dsm_metadata(w, dataset))
+        loader.failed.connect(
+            lambda message: QMessageBox.critical(self, "读取错误", f"无法读取DSM文件：{message}"))
+        loader.finished.connect(loader.deleteLater)
+        loader.notify = notify
+        self.dsm_loader = loader
+        self.update_status("正在读取DSM...")
+        loader.start()
+
+    def on_dsm_metadata(self, loader, dataset):
+        if loader is not self.dsm_loader:
+            dataset.close()
+            return
+        self.dsm_loader = None
+        if self.dataset_dsm:
+            self.dataset_dsm.close()
+        self.dataset_dsm = dataset
+        self.coordinate_picker.set_dataset_dsm(self.dataset_dsm)
+        self.dimension_annotator.set_elevation_sampler(self.coordinate_picker.dsm_sampler)
+        self.set_project_raster("dsm_path", loader.file_path)
+        self.update_status("")
+        if loader.notify:
+            QMessageBox.information(self, "提示", "已成功加载DSM文件，可获取海拔信息。")
 
     def clear_all(self):
         """
@@ -484,18 +764,24 @@ class MainWindow(QMainWindow):
          先清空多边形，再清标注与坐标，然后再 cla()
         """
         try:
+            # 0) 停止正在进行的后台加载
+            self.cancel_dom_loading()
+            self.dsm_loader = None
+
             # 1) 清空多边形
             if self.polygon_drawer:
                 self.polygon_drawer.clear_polygons()
 
-            # 2) 清空标注与坐标
+            # 2) 清空标注与坐标、尺寸标注与CAD图形
             self.label_manager.clear_annotations()
             self.coordinate_picker.clear_coords()
-            self.table_coords.setRowCount(0)
+            self.dimension_annotator.clear_annotations()
+            self.cad_drawer.clear_shapes()
 
             # 3) 若要把图像也清掉，则再 ax.cla()
             if self.canvas.ax is not None:
                 self.canvas.ax.cla()
+                self.canvas.clear_image()
                 self.canvas.draw()
 
             # 4) 释放 DOM / DSM
@@ -505,6 +791,10 @@ class MainWindow(QMainWindow):
             if self.dataset_dsm:
                 self.dataset_dsm.close()
                 self.dataset_dsm = None
+                self.coordinate_picker.set_dataset_dsm(None)
+                self.dimension_annotator.set_elevation_sampler(None)
+            self.set_project_raster("dom_path", "")
+            self.set_project_raster("dsm_path", "")
 
             self.transform = None
             self.coords_list.clear()
@@ -512,6 +802,147 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"发生错误: {str(e)}")
 
+    # =========================================================================
+    #  项目文件与自动保存
+    # =========================================================================
+
+    def on_feature_changed(self, op, layer, value=None):
+        """
+        各工具的编辑回调：追加到当前项目的自动保存日志。
+        批量导入时工具以 ("add_many", 图层, 要素列表) 回调，整批一次写入日志
+        """
+        if self.project is None:
+            return  # 切换项目、清空界面期间不记录
+        try:
+            if op == "add_many":
+                self.project.record_many(("add", layer, item) for item in value)
+            else:
+                self.project.record(op, layer, value)
+        except OSError as e:
+            self.update_status(f"自动保存失败：{str(e)}")
+
+    def set_project_raster(self, key, file_path):
+        """
+        记录项目引用的 DOM / DSM 路径（未变化时不记录）
+        """
+        if self.project is not None and self.project.meta.get(key, "") != (file_path or ""):
+            self.on_feature_changed("meta", key, file_path)
+
+    def open_project(self):
+        """
+        打开项目文件：恢复 DOM / DSM 及全部要素（含上次保存后自动记录的编辑）
+        """
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "打开项目", "", f"项目文件 (*{PROJECT_EXT})")
+        if not file_path or not self.confirm_close_project():
+            return
+        try:
+            session = ProjectSession.open(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "打开失败", f"无法打开项目文件：{str(e)}")
+            return
+        self.switch_project(session)
+
+    def save_project(self):
+        """
+        保存项目（写出快照并清空自动保存日志）；未命名项目先选择保存路径
+        :return: 是否已保存
+        """
+        file_path = self.project.path
+        if not file_path:
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "保存项目", "", f"项目文件 (*{PROJECT_EXT})")
+            if not file_path:
+                return False
+            if not file_path.lower().endswith(PROJECT_EXT):
+                file_path += PROJECT_EXT
+        try:
+            self.project.save(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "保存失败", f"保存项目时发生错误：{str(e)}")
+            return False
+        self.setWindowTitle(f"第四次全国文物普查内业工具包 - {os.path.basename(file_path)}")
+        self.update_status(f"项目已保存至 {file_path}")
+        return True
+
+    def confirm_close_project(self):
+        """
+        关闭当前项目前调用：已命名的项目直接写出快照；
+        未命名且有编辑的项目询问是否保存。
+        :return: 是否可以继续（用户取消时返回 False）
+        """
+        if not self.project.dirty:
+            return True
+        if self.project.path:
+            try:
+                self.project.save()
+            except Exception:
+                pass  # 日志仍在，下次打开项目时重放
+            return True
+        reply = QMessageBox.question(
+            self, "保存项目", "当前项目尚未保存，是否保存？",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+        if reply == QMessageBox.Cancel:
+            return False
+        if reply == QMessageBox.Yes:
+            return self.save_project()
+        self.project.discard()
+        return True
+
+    def check_autosave(self):
+        """
+        启动时发现未命名项目的自动保存日志（上次未保存即退出或异常退出），询问是否恢复
+        """
+        if not has_autosave():
+            return
+        reply = QMessageBox.question(
+            self, "恢复", "发现上次未保存的编辑记录，是否恢复？", QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            try:
+                self.switch_project(ProjectSession.recover())
+                return
+            except Exception as e:
+                QMessageBox.critical(self, "恢复失败", f"无法恢复编辑记录：{str(e)}")
+        self.project.discard()
+
+    def switch_project(self, session):
+        """
+        切换到 session：清空界面（不记录到任何项目），加载项目引用的影像并恢复要素
+        """
+        self.project.close()
+        self.project = None
+        self.clear_all()
+        self.project = session
+        title = os.path.basename(session.path) if session.path else "未命名项目"
+        self.setWindowTitle(f"第四次全国文物普查内业工具包 - {title}")
+
+        self.pending_restore = session
+        dom_path = session.meta.get("dom_path")
+        dsm_path = session.meta.get("dsm_path")
+        if dsm_path and os.path.exists(dsm_path):
+            self.start_dsm_loading(dsm_path, notify=False)
+        if dom_path and os.path.exists(dom_path):
+            self.start_dom_loading(dom_path)  # 影像就绪后恢复要素（加载影像会清空坐标轴）
+        else:
+            if dom_path:
+                QMessageBox.warning(self, "提示", f"项目引用的DOM文件不存在：{dom_path}")
+            self.restore_pending_features()
+
+    def restore_pending_features(self):
+        """
+        将待恢复项目的要素交给各工具重建（恢复过程不写入日志）
+        """
+        session, self.pending_restore = self.pending_restore, None
+        if session is None:
+            return
+        layers = session.layers
+        self.coordinate_picker.restore_coords(layers["points"])
+        self.label_manager.restore_annotations(layers["labels"])
+        self.polygon_drawer.restore_polygons(layers["polygons"])
+        self.dimension_annotator.restore_dimensions(layers["dimensions"])
+        self.cad_drawer.restore_shapes(layers["lines"], layers["coord_labels"])
+        self.update_status(f"已恢复 {sum(len(items) for items in layers.values())} 个要素")
+
     # =========================================================================
     #  版本信息弹窗
     # =========================================================================
@@ -541,12 +972,12 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "版本信息", version_info)
 
     def open_building_description(self):
-        """打开古建筑描述工具"""
-        building_description.main()
+        """打开古建筑描述工具（在宿主进程中运行，不阻塞主窗口）"""
+        self.description_host.open("building")
 
     def open_stele_description(self):
-        """打开碑刻描述工具"""
-        stele_description.main()
+        """打开碑刻描述工具（在宿主进程中运行，不阻塞主窗口）"""
+        self.description_host.open("stele")
 
     def start_draw_line(self):
         """开始直线绘制模式"""
@@ -564,16 +995,115 @@ class MainWindow(QMainWindow):
         self.update_status("已清空CAD图层")
         
     def export_cad(self):
-        """导出CAD图层"""
-        file_path, _ = QFileDialog.getSaveFileName(
+        """导出CAD图层（DXF 矢量或 PNG 图片）"""
+        file_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "导出CAD图层",
             "",
-            "PNG文件 (*.png)"
+            "DXF文件 (*.dxf);;PNG文件 (*.png)"
         )
-        if file_path:
+        if not file_path:
+            return
+        if file_path.lower().endswith(".png") or (
+                selected_filter.startswith("PNG") and not file_path.lower().endswith(".dxf")):
             self.cad_drawer.export_cad_layer(file_path)
             self.update_status(f"CAD图层已导出至: {file_path}")
+            return
+        if not file_path.lower().endswith(".dxf"):
+            file_path += ".dxf"
+        self.export_cad_dxf(file_path)
+
+    def export_cad_dxf(self, file_path):
+        """
+        将 CAD 直线、多边形、标注、尺寸标注及坐标标注导出为 DXF，
+        坐标换算为影像的投影坐标（EPSG:4548）
+        """
+        if self.transform is None:
+            QMessageBox.warning(self, "导出CAD", "请先导入DOM，才能将像素坐标换算为投影坐标！")
+            return
+        try:
+            from dxf_exporter import export_dxf
+
+            segments, colors = self.cad_drawer.get_segments()
+            count = export_dxf(
+                file_path,
+                self.transform,
+                segments=segments,
+                segment_colors=colors,
+                polygons=self.polygon_drawer.get_polygons(),
+                labels=[(ann['x'], ann['y'], ann['order']) for ann in self.label_manager.annotations],
+                dimensions=self.dimension_annotator.get_dimensions(),
+                coord_labels=self.cad_drawer.get_coord_labels(),
+            )
+            self.update_status(f"已导出 {count} 个DXF实体至: {file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "导出失败", f"导出DXF时发生错误：{str(e)}")
+
+    def export_dom_contours(self):
+        """
+        对已导入的 DOM 分块并行提取轮廓，导出为投影坐标的 DXF
+        """
+        if self.dataset_dom is None:
+            QMessageBox.warning(self, "提取轮廓", "请先导入DOM！")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出轮廓", "", "DXF文件 (*.dxf)")
+        if not file_path:
+            return
+        if not file_path.lower().endswith(".dxf"):
+            file_path += ".dxf"
+        self.cancel_contour_export()
+
+        worker = ContourExportWorker(self.dataset_dom.name, file_path,
+                                     transform=self.transform, parent=self)
+        progress = QProgressDialog("正在提取轮廓...", "取消", 0, 100, self)
+        progress.setWindowTitle("提取轮廓")
+        progress.setWindowModality(Qt.NonModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setValue(0)
+
+        worker.progress.connect(progress.setValue)
+        worker.exported.connect(lambda count, w=worker: self.on_contours_exported(w, count))
+        worker.failed.connect(lambda message, w=worker: self.on_contour_export_failed(w, message))
+        worker.finished.connect(worker.deleteLater)
+        progress.canceled.connect(lambda w=worker: self.cancel_contour_export(w))
+
+        self.contour_worker = worker
+        self.contour_progress = progress
+        self.update_status("正在提取轮廓...")
+        worker.start()
+
+    def on_contours_exported(self, worker, count):
+        if worker is not self.contour_worker:
+            return
+        self._finish_contour_export()
+        self.update_status(f"已导出 {count} 条轮廓至: {worker.out_path}")
+
+    def on_contour_export_failed(self, worker, message):
+        if worker is not self.contour_worker:
+            return
+        self._finish_contour_export()
+        self.update_status("")
+        QMessageBox.critical(self, "提取失败", f"提取轮廓时发生错误：{message}")
+
+    def cancel_contour_export(self, worker=None):
+        """
+        取消正在进行的轮廓导出。worker 不为 None 时仅在其仍为当前任务时生效。
+        """
+        if self.contour_worker is None or (worker is not None and worker is not self.contour_worker):
+            return
+        current = self.contour_worker
+        self._finish_contour_export()
+        current.requestInterruption()
+        self.update_status("已取消提取轮廓")
+
+    def _finish_contour_export(self):
+        """结束当前轮廓导出任务并关闭进度框（先清除任务引用，关闭进度框触发的取消信号将被忽略）"""
+        progress = self.contour_progress
+        self.contour_worker = None
+        self.contour_progress = None
+        if progress is not None:
+            progress.close()
 
     def change_cad_color(self, color_name):
         """更改CAD绘图颜色"""
@@ -2,35 +2,100 @@
 orthophoto_utils.py
 
 封装了常用的正射影像读写与投影变换工具函数：
--   读取 DOM/DSM 数据集
--   将像素坐标转换为经纬度
--   十进制度数与度分秒格式的转换
--   从指定波段中提取海拔高程
+-   读取 DOM/DSM 数据集（大幅面 DOM 的按窗口分块读取见 tiled_raster.TiledRaster）
+-   将像素坐标转换为经纬度（按线程缓存 Transformer，避免重复初始化 PROJ）
+-   十进制度数与度分秒格式的相互转换
+-   以上转换的 NumPy 批量版本，一次处理成千上万个像素点
+-   反向换算：投影坐标 / 经纬度批量转为像素坐标（导入已有测量成果）
+-   从指定波段中提取海拔高程（按 1x1 窗口读取，不解码整个波段）
 -   将完整的坐标信息导出到 CSV
+rasterio (GDAL) 与 pyproj 在首次使用时才导入，以加快程序启动。
 """
 
 import csv
-import rasterio
-from pyproj import Transformer
+import re
+import threading
+import numpy as np
 
 def read_orthophoto(file_path):
     """
     使用 rasterio 打开地理TIF文件，返回 dataset 和其像素值数组。
     """
+    import rasterio
+
     dataset = rasterio.open(file_path)
     image_array = dataset.read()  # 形状通常是 [波段数, 高度, 宽度]
     return dataset, image_array
 
+# pyproj 的 Transformer 不能在多个线程间同时使用，因此每个线程各自缓存一份
+_transformer_local = threading.local()
+
+def get_transformer(src_crs="EPSG:4548", dst_crs="EPSG:4490"):
+    """
+    返回 src_crs -> dst_crs 的 Transformer (always_xy=True)。
+    以 (源CRS, 目标CRS) 为键按线程缓存，同一线程内重复调用直接复用。
+    """
+    cache = getattr(_transformer_local, "transformers", None)
+    if cache is None:
+        cache = _transformer_local.transformers = {}
+    key = (str(src_crs), str(dst_crs))
+    transformer = cache.get(key)
+    if transformer is None:
+        from pyproj import Transformer
+
+        transformer = Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+        cache[key] = transformer
+    return transformer
+
 def transform_coordinate(col, row, transform, src_crs="EPSG:4548", dst_crs="EPSG:4490"):
     """
     根据 transform (仿射变换参数) 和给定的源/目标CRS，
     将像素坐标 (col, row) 转化为地理坐标 (lon, lat)。
     """
     x, y = transform * (col, row)
-    transformer = Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+    transformer = get_transformer(src_crs, dst_crs)
     lon, lat = transformer.transform(x, y)
     return lon, lat
 
+def pixels_to_map(cols, rows, transform):
+    """
+    批量将像素坐标数组 (cols, rows) 按仿射变换转化为投影坐标 (xs, ys)。
+    与 transform * (col, row) 的结果一致。
+    """
+    cols = np.asarray(cols, dtype=np.float64)
+    rows = np.asarray(rows, dtype=np.float64)
+    xs = transform.a * cols + transform.b * rows + transform.c
+    ys = transform.d * cols + transform.e * rows + transform.f
+    return xs, ys
+
+def map_to_pixels(xs, ys, transform):
+    """
+    pixels_to_map 的逆运算：批量将投影坐标 (xs, ys) 转化为像素坐标 (cols, rows)。
+    """
+    xs = np.asarray(xs, dtype=np.float64) - transform.c
+    ys = np.asarray(ys, dtype=np.float64) - transform.f
+    det = transform.a * transform.e - transform.b * transform.d
+    cols = (transform.e * xs - transform.b * ys) / det
+    rows = (transform.a * ys - transform.d * xs) / det
+    return cols, rows
+
+def geographic_to_pixels(lons, lats, transform, src_crs="EPSG:4490", dst_crs="EPSG:4548"):
+    """
+    transform_coordinates 的逆运算：批量将经纬度转化为像素坐标 (cols, rows)。
+    """
+    xs, ys = get_transformer(src_crs, dst_crs).transform(
+        np.asarray(lons, dtype=np.float64), np.asarray(lats, dtype=np.float64))
+    return map_to_pixels(xs, ys, transform)
+
+def transform_coordinates(cols, rows, transform, src_crs="EPSG:4548", dst_crs="EPSG:4490"):
+    """
+    transform_coordinate 的批量版本：输入像素坐标数组，
+    一次完成仿射变换和投影变换，返回 (lons, lats) 数组。
+    """
+    xs, ys = pixels_to_map(cols, rows, transform)
+    lons, lats = get_transformer(src_crs, dst_crs).transform(xs, ys)
+    return np.asarray(lons), np.asarray(lats)
+
 def decimal_degrees_to_dms(deg, is_lat=False):
     """
     将十进制度数转化为度分秒格式的字符串。
@@ -49,6 +114,74 @@ def decimal_degrees_to_dms(deg, is_lat=False):
 
     return f"{d:02d}°{m:02d}′{s:.4f}″{suffix}"
 
+def decimal_degrees_to_dms_batch(degs, is_lat=False):
+    """
+    decimal_degrees_to_dms 的批量版本：输入十进制度数数组，返回度分秒字符串列表。
+    度、分、秒的计算在 NumPy 中一次完成，结果与逐个调用一致。
+    """
+    degs = np.asarray(degs, dtype=np.float64)
+    pos, neg = ('N', 'S') if is_lat else ('E', 'W')
+    suffixes = np.where(degs >= 0, pos, neg)
+
+    deg_abs = np.abs(degs)
+    d = deg_abs.astype(np.int64)
+    m_float = (deg_abs - d) * 60
+    m = m_float.astype(np.int64)
+    s = (m_float - m) * 60
+
+    return [
+        f"{di:02d}°{mi:02d}′{si:.4f}″{suffix}"
+        for di, mi, si, suffix in zip(d.tolist(), m.tolist(), s.tolist(), suffixes.tolist())
+    ]
+
+_DMS_NUMBER = re.compile(r"\d+(?:\.\d*)?|\.\d+")
+
+def dms_to_decimal_degrees(text):
+    """
+    decimal_degrees_to_dms 的逆运算：将度分秒字符串转化为十进制度数。
+    接受 "113°30′06.2313″E"、"22°30′06.2313″"（无方位字母视为正）、
+    "113 30 6.2"、"22:30:06"、"N22°30'06\"" 以及十进制度数 "113.5" / "-22.5"；
+    S、W 或前置负号表示负值。
+    """
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text).strip().upper()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    numbers = _DMS_NUMBER.findall(text)
+    if not numbers or len(numbers) > 3:
+        raise ValueError(f"无法识别的度分秒: {text!r}")
+    values = [float(v) for v in numbers] + [0.0, 0.0]
+    deg = values[0] + values[1] / 60 + values[2] / 3600
+    if text.startswith("-") or "S" in text or "W" in text:
+        deg = -deg
+    return deg
+
+def dms_to_decimal_degrees_batch(texts):
+    """
+    dms_to_decimal_degrees 的批量版本，返回 float64 数组；
+    全部为十进制数字时直接由 NumPy 转换
+    """
+    try:
+        return np.asarray(texts, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([dms_to_decimal_degrees(t) for t in texts], dtype=np.float64)
+
+def read_pixel(dataset, col, row, band=1):
+    """
+    只读取 (col, row) 处 1x1 窗口的像素值，不解码整个波段。
+    超出影像范围时抛出 IndexError。
+    """
+    from rasterio.windows import Window
+
+    row_i = int(round(row))
+    col_i = int(round(col))
+    if not (0 <= row_i < dataset.height and 0 <= col_i < dataset.width):
+        raise IndexError(f"像素 ({col_i}, {row_i}) 超出影像范围")
+    return dataset.read(band, window=Window(col_i, row_i, 1, 1))[0, 0]
+
 def get_altitude(dataset, col, row):
     """
     尝试从给定 dataset 中读取海拔数值。如果 dataset 不包含有效高程数据，则返回0.0
@@ -56,10 +189,7 @@ def get_altitude(dataset, col, row):
     if not dataset:
         return 0.0
     try:
-        row_i = int(round(row))
-        col_i = int(round(col))
-        alt_value = dataset.read(1)[row_i, col_i]
-        return float(alt_value)
+        return float(read_pixel(dataset, col, row))
     except:
         return 0.0
 
@@ -70,10 +200,7 @@ def get_altitude_dsm(dsm_dataset, col, row):
     if not dsm_dataset:
         return 0.0
     try:
-        row_i = int(round(row))
-        col_i = int(round(col))
-        alt_value = dsm_dataset.read(1)[row_i, col_i]
-        return float(alt_value)
+        return float(read_pixel(dsm_dataset, col, row))
     except:
         return 0.0
 
@@ -6,10 +6,14 @@ polygon_drawer.py
 -  right-click 或按 Esc：结束绘制
 -  在图像上用红色线条显示已绘制的多边形轮廓
 -  新增：在清空多边形时更稳健，避免移除线条时程序崩溃
+-  绘制中的多边形（含跟随鼠标的橡皮筋边）作为动态对象以 blit 方式刷新
+-  已完成的多边形统一由 vector_layers.RingLayer 绘制，顶点存于数组
 """
 
+import numpy as np
 from PyQt5.QtWidgets import QMessageBox
 from matplotlib.lines import Line2D
+from vector_layers import RingLayer
 
 class PolygonDrawer:
     def __init__(self, canvas):
@@ -25,14 +29,21 @@ class PolygonDrawer:
         # 用于记录当前正在绘制的多边形的顶点列表 [(x1, y1), (x2, y2), ...]
         self.current_polygon_points = []
 
-        # 连接 ID（mpl_connect 返回）
-        self.cid_click = None
-
         # 用于 Matplotlib 显示当前多边形过程的 line
         self.drawing_line = None
 
-        # 已经完成的多边形线段对象，用于后续清空
-        self.polygon_patches = []
+        # 已经完成的多边形（一个集合对象绘制全部多边形）
+        self.rings = RingLayer(self.ax, color="red", linestyle="--", marker="o")
+        self.canvas.add_view_listener(self.rings.ensure_attached)
+
+        # 要素变化回调 (操作, 图层, 数据)，由主窗口设置（自动保存）；批量导入时操作为 add_many
+        self.on_change = None
+
+        # 登记到画布的工具分发器，切换到其他工具时自动结束绘制
+        self.canvas.tool_router.register(
+            "polygon", on_press=self.on_mouse_click, on_motion=self.on_mouse_move,
+            on_deactivate=self.stop_polygon_mode
+        )
 
     @property
     def is_drawing_polygon(self):
@@ -44,21 +55,21 @@ class PolygonDrawer:
 
     def start_polygon_mode(self):
         """
-        进入多边形绘制模式：绑定鼠标事件、初始化顶点列表和绘制线
+        进入多边形绘制模式：激活多边形工具、初始化顶点列表和绘制线
         """
         if self.is_drawing_polygon:
             return
 
+        # 激活多边形工具，鼠标事件由分发器转发
+        self.canvas.tool_router.activate("polygon")
         self.is_drawing_polygon = True
         self.current_polygon_points = []
 
-        # 连接鼠标点击事件
-        self.cid_click = self.canvas.mpl_connect("button_press_event", self.on_mouse_click)
-
-        # 创建红色虚线+小圆点的线对象，用于显示多边形绘制过程
+        # 创建红色虚线+小圆点的线对象，用于显示多边形绘制过程（动态对象）
         self.drawing_line = Line2D([], [], color="red", linestyle="--", marker="o")
         self.ax.add_line(self.drawing_line)
-        self.canvas.draw()
+        self.canvas.overlay.add_artist(self.drawing_line)
+        self.canvas.overlay.update()
 
     def stop_polygon_mode(self):
         """
@@ -69,10 +80,8 @@ class PolygonDrawer:
 
         self.is_drawing_polygon = False
 
-        # 断开鼠标事件
-        if self.cid_click is not None:
-            self.canvas.mpl_disconnect(self.cid_click)
-            self.cid_click = None
+        # 停用多边形工具（若由其他工具取代而停用，此处不再重复处理）
+        self.canvas.tool_router.deactivate("polygon")
 
         # 若已足够点数，则闭合多边形
         if len(self.current_polygon_points) >= 3:
@@ -80,6 +89,7 @@ class PolygonDrawer:
         else:
             # 不够 3 个点，说明不构成多边形，移除临时线
             if self.drawing_line:
+                self.canvas.overlay.remove_artist(self.drawing_line)
                 try:
                     self.drawing_line.remove()
                 except Exception:
@@ -87,7 +97,7 @@ class PolygonDrawer:
 
         self.current_polygon_points = []
         self.drawing_line = None
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
     def on_mouse_click(self, event):
         """
@@ -123,48 +133,84 @@ class PolygonDrawer:
         ys = [p[1] for p in self.current_polygon_points]
         self.drawing_line.set_data(xs, ys)
 
-        self.canvas.draw()
+        self.canvas.overlay.update()
+
+    def on_mouse_move(self, event):
+        """
+        鼠标移动：在已有顶点后追加当前鼠标位置，预览下一条边
+        """
+        if not self.is_drawing_polygon or not self.current_polygon_points:
+            return
+        if event.inaxes != self.ax or event.xdata is None or event.ydata is None:
+            return
+        xs = [p[0] for p in self.current_polygon_points] + [event.xdata]
+        ys = [p[1] for p in self.current_polygon_points] + [event.ydata]
+        self.drawing_line.set_data(xs, ys)
+        self.canvas.overlay.update()
 
     def close_polygon(self):
         """
-        将当前多边形首尾相连，以闭合形状，并将该线条对象保存到 polygon_patches
+        将当前多边形首尾相连，以闭合形状，并加入多边形图层
         """
         if len(self.current_polygon_points) < 3:
             return
 
-        # 闭合：将首点再追加一次，让最后画回首点
-        xs = [p[0] for p in self.current_polygon_points]
-        ys = [p[1] for p in self.current_polygon_points]
-        xs.append(xs[0])
-        ys.append(ys[0])
+        # 移除绘制过程中的临时线，闭合多边形由图层绘制
+        if self.drawing_line:
+            self.canvas.overlay.remove_artist(self.drawing_line)
+            try:
+                self.drawing_line.remove()
+            except Exception:
+                pass
+            self.drawing_line = None
 
-        # 用 drawing_line 表示闭合多边形
-        self.drawing_line.set_data(xs, ys)
+        self.rings.add(self.current_polygon_points)
+        if self.on_change is not None:
+            self.on_change("add", "polygons", {"points": list(self.current_polygon_points)})
 
-        # 存储到 polygon_patches，方便后续清空
-        self.polygon_patches.append(self.drawing_line)
+        self.canvas.draw_idle()
 
-        self.canvas.draw()
+    def restore_polygons(self, polygons):
+        """
+        从项目文件恢复已完成的多边形（不触发 on_change），
+        polygons 为 {"points": [[x, y], ...]} 字典列表（不含闭合点）
+        """
+        self.rings.extend([item["points"] for item in polygons])
+        self.canvas.draw_idle()
+
+    def add_polygons(self, polygons):
+        """
+        批量加入导入的多边形，polygons 为 (K, 2) 像素顶点数组的列表（不含闭合点）
+        """
+        polygons = [np.asarray(p, dtype=np.float64) for p in polygons if len(p) >= 3]
+        self.rings.extend(polygons)
+        if self.on_change is not None:
+            self.on_change("add_many", "polygons", [{"points": points.tolist()} for points in polygons])
+        self.canvas.draw_idle()
+
+    def get_polygons(self):
+        """
+        以数组形式返回已完成的多边形：每个多边形为 (K, 2) 的顶点数组（像素坐标），
+        不含重复的闭合点。
+        """
+        return [np.asarray(points, dtype=np.float64) for points in self.rings.polygons()]
 
     def clear_polygons(self):
         """
         清空已绘制的多边形，并结束绘制状态（若在绘制中）。
-        通过 line.remove() 来移除，从而避免 'ArtistList has no attribute remove' 。
         """
         # 若仍在绘制，先 stop
         if self.is_drawing_polygon:
             self.stop_polygon_mode()
 
         # 移除已完成的多边形
-        for line_obj in self.polygon_patches:
-            try:
-                line_obj.remove()  # 调用 line 对象自身的 remove()
-            except Exception:
-                pass
-        self.polygon_patches.clear()
+        self.rings.clear()
+        if self.on_change is not None:
+            self.on_change("clear", "polygons")
 
         # 移除正在绘制线
         if self.drawing_line:
+            self.canvas.overlay.remove_artist(self.drawing_line)
             try:
                 self.drawing_line.remove()
             except Exception:
@@ -172,5 +218,5 @@ class PolygonDrawer:
             self.drawing_line = None
 
         self.current_polygon_points = []
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
@@ -0,0 +1,244 @@
+"""
+project_store.py
+
+项目文件与自动保存：
+-   项目文件（.sipu）为 SQLite 数据库，记录 DOM / DSM 路径及全部要素：
+    测点、标注、多边形、尺寸标注、CAD 直线、CAD 坐标标注各占一张表，
+    多边形顶点以 float64 二进制存放
+-   每次编辑作为一行 JSON 追加到项目旁的日志文件（<项目>.journal），
+    自动保存的开销与要素总数无关；程序崩溃后重新打开项目即可恢复
+-   打开项目时一次读出快照再重放日志；保存时写出新快照（先写临时文件再替换）并清空日志
+-   尚未保存过的项目，日志写在 ~/.siputoolkit/autosave.journal，下次启动时可恢复
+"""
+
+import json
+import os
+import sqlite3
+from array import array
+
+PROJECT_EXT = ".sipu"
+SCHEMA_VERSION = "1"
+
+# 图层 -> 字段（与各绘图工具记录的要素字典一致）
+LAYERS = {
+    "points": ["index", "type", "desc", "lat", "lon", "alt", "col", "row"],   # 坐标拾取测点
+    "labels": ["x", "y", "order", "content"],                                # 标注
+    "polygons": ["points"],                                                  # 多边形顶点 [[x, y], ...]
+    "dimensions": ["x1", "y1", "x2", "y2", "text"],                          # 尺寸标注
+    "lines": ["x0", "y0", "x1", "y1", "color"],                              # CAD 直线
+    "coord_labels": ["x", "y", "text"],                                      # CAD 坐标标注
+}
+
+# 日志累计条数达到此值时，已命名的项目自动写出快照并清空日志
+COMPACT_EVERY = 5000
+
+
+def default_journal_path():
+    """未命名项目的自动保存日志"""
+    return os.path.join(os.path.expanduser("~"), ".siputoolkit", "autosave.journal")
+
+
+def journal_path_for(project_path):
+    return project_path + ".journal" if project_path else default_journal_path()
+
+
+def has_autosave():
+    """是否存在未命名项目遗留的自动保存日志（上次未保存即退出或崩溃）"""
+    path = default_journal_path()
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def _encode_polygon(points):
+    return array("d", [v for p in points for v in p]).tobytes()
+
+
+def _decode_polygon(blob):
+    values = array("d")
+    values.frombytes(blob)
+    return [[values[i], values[i + 1]] for i in range(0, len(values), 2)]
+
+
+def _quote(name):
+    return '"' + name + '"'
+
+
+class ProjectSession:
+    """
+    当前项目的要素与自动保存日志。
+    要素按图层存为字典列表，编辑通过 record() 记录：
+    -   ("add", 图层, 要素字典)
+    -   ("remove", 图层, 序号)
+    -   ("clear", 图层)
+    -   ("meta", 键, 值)：dom_path / dsm_path
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.meta = {"dom_path": "", "dsm_path": ""}
+        self.layers = {name: [] for name in LAYERS}
+        self.dirty = False           # 上次保存后是否有新的编辑
+        self._journal = None         # 日志文件句柄，首次记录时打开
+        self._journal_entries = 0
+
+    @property
+    def journal_path(self):
+        return journal_path_for(self.path)
+
+    # ------------------------------------------------------------------
+    # 打开 / 恢复
+    # ------------------------------------------------------------------
+    @classmethod
+    def open(cls, path):
+        """打开项目：读取快照，再重放上次保存后的日志"""
+        session = cls(path)
+        session._read_snapshot(path)
+        session._replay(session.journal_path)
+        return session
+
+    @classmethod
+    def recover(cls):
+        """从未命名项目的自动保存日志恢复"""
+        session = cls()
+        session._replay(session.journal_path)
+        return session
+
+    def _read_snapshot(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            for key, value in conn.execute("SELECT key, value FROM meta WHERE key != 'version'"):
+                self.meta[key] = value
+            for name, fields in LAYERS.items():
+                rows = conn.execute(
+                    f"SELECT {', '.join(map(_quote, fields))} FROM {name} ORDER BY rowid").fetchall()
+                if name == "polygons":
+                    self.layers[name] = [{"points": _decode_polygon(blob)} for (blob,) in rows]
+                else:
+                    self.layers[name] = [dict(zip(fields, row)) for row in rows]
+        finally:
+            conn.close()
+
+    def _replay(self, journal_path):
+        """
+        重放日志。崩溃时写了一半的最后一行（没有换行符）被截掉，
+        之后追加的编辑从新的一行开始，不会与残行连成一行而丢失；
+        无法解析或无法应用的行跳过，每次重放跳过的都是同样的行，结果保持一致。
+        """
+        if not os.path.exists(journal_path):
+            return
+        complete = 0
+        with open(journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete += len(line)
+                try:
+                    self.apply(*json.loads(line))
+                except (ValueError, TypeError, KeyError, IndexError):
+                    continue
+                self._journal_entries += 1
+        if complete < os.path.getsize(journal_path):
+            with open(journal_path, "r+b") as f:
+                f.truncate(complete)
+        self.dirty = self._journal_entries > 0
+
+    # ------------------------------------------------------------------
+    # 编辑
+    # ------------------------------------------------------------------
+    def apply(self, op, name, value=None):
+        """将一条编辑应用到内存中的要素"""
+        if op == "add":
+            self.layers[name].append(value)
+        elif op == "remove":
+            del self.layers[name][value]
+        elif op == "clear":
+            self.layers[name].clear()
+        elif op == "meta":
+            self.meta[name] = value or ""
+        else:
+            raise ValueError(f"未知的编辑操作: {op}")
+
+    def record(self, op, name, value=None):
+        """
+        记录一条编辑：追加一行到日志并应用到内存。
+        先序列化再应用，保证内存中的要素与重放日志得到的完全一致。
+        """
+        self.record_many([(op, name, value)])
+
+    def record_many(self, entries):
+        """
+        批量记录编辑（如导入成千上万个测点）：entries 为 (操作, 图层, 数据) 序列。
+        全部行一次写入、一次 flush，日志压缩也只在最后检查一次。
+        """
+        lines = [json.dumps([op, name, value], ensure_ascii=False, default=float)
+                 for op, name, value in entries]
+        if not lines:
+            return
+        if self._journal is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write("\n".join(lines) + "\n")
+        self._journal.flush()
+        for line in lines:
+            self.apply(*json.loads(line))
+        self._journal_entries += len(lines)
+        self.dirty = True
+        if self.path and self._journal_entries >= COMPACT_EVERY:
+            self.save()
+
+    # ------------------------------------------------------------------
+    # 保存
+    # ------------------------------------------------------------------
+    def save(self, path=None):
+        """
+        写出项目快照并清空日志。path 不为 None 时另存为新项目
+        （未命名项目的自动保存日志随之删除）。
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("项目尚未指定保存路径")
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                                 [("version", SCHEMA_VERSION)] + sorted(self.meta.items()))
+                for name, fields in LAYERS.items():
+                    conn.execute(f"CREATE TABLE {name} ({', '.join(map(_quote, fields))})")
+                    if name == "polygons":
+                        rows = ((_encode_polygon(item["points"]),) for item in self.layers[name])
+                    else:
+                        rows = ([item.get(field) for field in fields] for item in self.layers[name])
+                    conn.executemany(
+                        f"INSERT INTO {name} VALUES ({', '.join('?' * len(fields))})", rows)
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+
+        self._close_journal()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.path = path
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)  # 另存为覆盖的旧项目遗留的日志
+        self._journal_entries = 0
+        self.dirty = False
+
+    def discard(self):
+        """放弃上次保存后的编辑：删除日志"""
+        self._close_journal()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._journal_entries = 0
+        self.dirty = False
+
+    def close(self):
+        """关闭日志文件（保留日志，下次打开时重放）"""
+        self._close_journal()
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,70 @@
+"""
+raster_loader.py
+
+在后台线程中加载 DOM / DSM，避免读取期间界面无响应：
+-   先打开数据集并立即发出元数据（仿射变换、尺寸），主线程即可显示范围并开始拾取、绘图
+-   对无概视图的大幅 DOM，再用另一个 dataset 句柄按条带读取抽稀缩略图作为首屏预览，
+    逐条带报告进度
+-   可随时请求取消（QThread.requestInterruption），在条带之间检查
+"""
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from tiled_raster import TiledRaster
+
+
+class RasterLoadWorker(QThread):
+    """
+    后台加载线程。信号：
+    -   metadata_loaded(dataset)：数据集已打开，之后由主线程独占使用
+    -   progress(int)：缩略图读取进度 0-100
+    -   preview_loaded(object)：缩略图数组；不需要缩略图时为 None
+    -   failed(str)：打开或读取失败
+    取消后不再发出 preview_loaded。
+    """
+
+    metadata_loaded = pyqtSignal(object)
+    progress = pyqtSignal(int)
+    preview_loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, build_preview=True, tile_size=512, parent=None):
+        """
+        :param file_path: 影像文件路径
+        :param build_preview: 是否读取缩略图（DSM 只需元数据）
+        :param tile_size: 与主线程 TiledRaster 一致的瓦片边长
+        """
+        super().__init__(parent)
+        self.file_path = file_path
+        self.build_preview = build_preview
+        self.tile_size = tile_size
+
+    def run(self):
+        # rasterio (GDAL) 在首次加载影像时才导入，导入过程也在后台线程中
+        import rasterio
+        import rasterio.sample  # 打包时需显式导入
+
+        try:
+            dataset = rasterio.open(self.file_path)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.metadata_loaded.emit(dataset)
+        if not self.build_preview:
+            return
+
+        # dataset 已交给主线程，这里另开一个句柄读取缩略图
+        try:
+            with rasterio.open(self.file_path) as ds:
+                raster = TiledRaster(ds, tile_size=self.tile_size)
+                if not raster.needs_thumbnail:
+                    self.progress.emit(100)
+                    self.preview_loaded.emit(None)
+                    return
+                thumbnail = raster.get_thumbnail(progress=self.progress.emit,
+                                                 cancelled=self.isInterruptionRequested)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if thumbnail is not None and not self.isInterruptionRequested():
+            self.preview_loaded.emit(thumbnail)
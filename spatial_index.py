@@ -0,0 +1,125 @@
+"""
+spatial_index.py
+
+线段的均匀网格空间索引，供 CAD 绘图的吸附与拾取使用：
+-   线段按其经过的网格单元登记，支持增量插入与删除
+-   查询只检查查询点附近若干单元内的候选线段，
+    与图中线段总数无关
+-   候选线段的端点距离、点到线段距离均以 NumPy 向量化计算
+"""
+
+import math
+
+import numpy as np
+
+
+class SegmentGridIndex:
+    """
+    以整数 key 标识线段的网格索引。
+    cell_size 为网格单元边长（与坐标同单位，通常为像素），宜不小于常用查询半径。
+    """
+
+    def __init__(self, cell_size=64.0):
+        self.cell_size = float(cell_size)
+        self._cells = {}     # (cx, cy) -> set(key)
+        self._segments = {}  # key -> (x0, y0, x1, y1)
+        self._seg_cells = {}  # key -> 线段登记的单元列表
+
+    def __len__(self):
+        return len(self._segments)
+
+    def _cell_of(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _cells_along(self, x0, y0, x1, y1):
+        """线段途经的单元：沿线段以半个单元为步长取样"""
+        length = math.hypot(x1 - x0, y1 - y0)
+        steps = max(1, int(math.ceil(length / (self.cell_size / 2))))
+        cells = set()
+        for i in range(steps + 1):
+            t = i / steps
+            cells.add(self._cell_of(x0 + (x1 - x0) * t, y0 + (y1 - y0) * t))
+        return list(cells)
+
+    def insert(self, key, x0, y0, x1, y1):
+        """登记线段（若 key 已存在则先删除旧记录）"""
+        if key in self._segments:
+            self.remove(key)
+        seg = (float(x0), float(y0), float(x1), float(y1))
+        cells = self._cells_along(*seg)
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(key)
+        self._segments[key] = seg
+        self._seg_cells[key] = cells
+
+    def remove(self, key):
+        """删除线段，key 不存在时忽略"""
+        if key not in self._segments:
+            return
+        for cell in self._seg_cells.pop(key):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._cells[cell]
+        del self._segments[key]
+
+    def clear(self):
+        self._cells.clear()
+        self._segments.clear()
+        self._seg_cells.clear()
+
+    def _candidates(self, x, y, radius):
+        """
+        返回查询半径内可能存在的线段 (keys, (N, 4) 数组)。
+        取样点与线段上任一点的距离不超过 cell_size / 4，因此向外扩展
+        ceil((radius + cell_size / 4) / cell_size) 圈单元即可覆盖所有候选。
+        """
+        ring = int(math.ceil((radius + self.cell_size / 4) / self.cell_size))
+        cx, cy = self._cell_of(x, y)
+        keys = set()
+        for i in range(cx - ring, cx + ring + 1):
+            for j in range(cy - ring, cy + ring + 1):
+                members = self._cells.get((i, j))
+                if members:
+                    keys.update(members)
+        keys = list(keys)
+        if not keys:
+            return keys, np.empty((0, 4))
+        return keys, np.array([self._segments[k] for k in keys], dtype=np.float64)
+
+    def nearest_endpoint(self, x, y, radius):
+        """
+        查找半径内最近的线段端点。
+        :return: (key, (px, py), 距离)；半径内没有端点时返回 (None, None, inf)
+        """
+        keys, segs = self._candidates(x, y, radius)
+        if not keys:
+            return None, None, math.inf
+        points = segs.reshape(-1, 2)  # 依次为每条线段的起点、终点
+        dist = np.hypot(points[:, 0] - x, points[:, 1] - y)
+        i = int(np.argmin(dist))
+        if dist[i] > radius:
+            return None, None, math.inf
+        return keys[i // 2], (float(points[i, 0]), float(points[i, 1])), float(dist[i])
+
+    def nearest_segment(self, x, y, radius):
+        """
+        查找半径内距离最近的线段（点到线段的垂足距离）。
+        :return: (key, 距离)；半径内没有线段时返回 (None, inf)
+        """
+        keys, segs = self._candidates(x, y, radius)
+        if not keys:
+            return None, math.inf
+        x0, y0, x1, y1 = segs.T
+        dx = x1 - x0
+        dy = y1 - y0
+        len_sq = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(len_sq > 0, ((x - x0) * dx + (y - y0) * dy) / len_sq, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        dist = np.hypot(x0 + t * dx - x, y0 + t * dy - y)
+        i = int(np.argmin(dist))
+        if dist[i] > radius:
+            return None, math.inf
+        return keys[i], float(dist[i])
@@ -0,0 +1,128 @@
+"""
+startup_profile.py
+
+启动耗时分析（设置环境变量 SIPU_PROFILE_STARTUP=1 时启用）：
+-   在 sys.meta_path 最前面插入计时查找器，记录每个模块的导入耗时（含其导入的子模块）
+-   记录各启动阶段的时间点，窗口首次显示后得到"启动到窗口"耗时
+-   每次启动向 startup_profile.csv 追加一行指标，并写出本次的导入耗时明细，
+    同时记录窗口显示时已导入的重型模块，用于确认它们被推迟到首次使用
+"""
+
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+ENV_FLAG = "SIPU_PROFILE_STARTUP"
+
+# 应推迟到首次使用时才导入的重型模块
+HEAVY_MODULES = ("rasterio", "pyproj", "cv2", "ezdxf", "fiona", "tkinter", "PIL", "matplotlib.pyplot")
+
+
+class _TimingLoader:
+    """包装原 loader，记录 exec_module 的耗时"""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.imports[module.__name__] = time.perf_counter() - start
+
+
+class _TimingFinder:
+    """委托其余查找器查找模块，仅替换 loader 以计时"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader, self._profiler)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """
+    启动耗时记录器。未启用时各方法均为空操作。
+    """
+
+    def __init__(self, enabled=None, out_dir=None):
+        if enabled is None:
+            enabled = os.environ.get(ENV_FLAG, "") not in ("", "0")
+        self.enabled = enabled
+        self.out_dir = out_dir or os.getcwd()
+        self.start = time.perf_counter()
+        self.marks = []     # [(阶段名, 距启动的秒数)]
+        self.imports = {}   # 模块名 -> 导入耗时（秒，含子模块）
+        self._finder = None
+        self._reported = False
+        if enabled:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def mark(self, name):
+        """记录启动阶段的时间点"""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.start))
+
+    def window_shown(self):
+        """
+        窗口首次显示（事件循环开始处理后）时调用：记录启动到窗口耗时并写出报告
+        """
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        self.mark("window_shown")
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self.write_report()
+
+    def loaded_heavy_modules(self):
+        return [name for name in HEAVY_MODULES if name in sys.modules]
+
+    def write_report(self, top=40):
+        """
+        追加 startup_profile.csv 指标行，并写出 startup_imports.txt 导入耗时明细
+        """
+        time_to_window = dict(self.marks).get("window_shown")
+        heavy = self.loaded_heavy_modules()
+
+        metrics_path = os.path.join(self.out_dir, "startup_profile.csv")
+        new_file = not os.path.exists(metrics_path)
+        with open(metrics_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["时间", "启动到窗口(ms)", "导入模块数", "已导入的重型模块"])
+            writer.writerow([
+                datetime.now().isoformat(timespec="seconds"),
+                round(time_to_window * 1000, 1) if time_to_window is not None else "",
+                len(self.imports),
+                " ".join(heavy),
+            ])
+
+        with open(os.path.join(self.out_dir, "startup_imports.txt"), "w", encoding="utf-8") as f:
+            f.write("启动阶段（距启动 ms）：\n")
+            for name, t in self.marks:
+                f.write(f"  {t * 1000:10.1f}  {name}\n")
+            f.write(f"\n导入耗时最长的 {top} 个模块（含子模块，ms）：\n")
+            for name, t in sorted(self.imports.items(), key=lambda kv: -kv[1])[:top]:
+                f.write(f"  {t * 1000:10.1f}  {name}\n")
+            f.write(f"\n窗口显示时已导入的重型模块：{', '.join(heavy) or '无'}\n")
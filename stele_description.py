@@ -22,74 +22,11 @@ base_type_options = ["方形碑座", "龟趺碑座"]
 # 回调函数
 # ----------------------------------------------------
 def generate_description():
-    """生成碑刻描述"""
-    # 获取所有输入值
-    total_height = var_total_height.get().strip()
-    total_width = var_total_width.get().strip()
-    total_thickness = var_total_thickness.get().strip()
-    crown_type = var_crown_type.get()
-    
-    description = f"碑高{total_height}厘米，宽{total_width}厘米，厚{total_thickness}厘米。"
-    
-    # 处理碑冠/碑首部分
-    if crown_type == "有碑冠":
-        dragon_pattern = var_dragon_pattern.get().strip()
-        front_text = var_front_text.get().strip()
-        back_text = var_back_text.get().strip()
-        
-        description += f"碑冠饰以{dragon_pattern}，"
-        if front_text or back_text:
-            description += "碑额"
-            if front_text:
-                description += f"阳面刻「{front_text}」"
-            if back_text:
-                if front_text:
-                    description += "，"
-                description += f"阴面刻「{back_text}」"
-            description += "。"
-    else:
-        head_type = var_head_type.get()
-        pattern = var_head_pattern.get().strip()
-        front_text = var_head_front_text.get().strip()
-        back_text = var_head_back_text.get().strip()
-        
-        description += f"碑首为{head_type}"
-        if pattern:
-            description += f"，饰以{pattern}"
-        if front_text or back_text:
-            description += "，碑额"
-            if front_text:
-                description += f"阳面刻「{front_text}」"
-            if back_text:
-                if front_text:
-                    description += "，"
-                description += f"阴面刻「{back_text}」"
-        description += "。"
-    
-    # 处理碑身部分
-    material = var_material.get()
-    if material == "其他":
-        material = var_other_material.get().strip()
-    
-    front_content = var_front_content.get().strip()
-    back_content = var_back_content.get().strip()
-    
-    description += f"\n碑身为{material}质，"
-    description += f"阳面刻「{front_content}」，"
-    description += "阴面" + (f"刻「{back_content}」" if back_content else "无字") + "。"
-    
-    # 处理碑座部分
-    base_type = var_base_type.get()
-    if base_type == "方形碑座":
-        length = var_length.get().strip()
-        width = var_width.get().strip()
-        height = var_height.get().strip()
-        description += f"\n方形碑座，长{length}厘米，宽{width}厘米，高{height}厘米。"
-    else:
-        turtle_length = var_turtle_length.get().strip()
-        turtle_width = var_turtle_width.get().strip()
-        turtle_height = var_turtle_height.get().strip()
-        description += f"\n龟趺碑座，龟长{turtle_length}厘米，龟背宽{turtle_width}厘米，高{turtle_height}厘米。"
+    """生成碑刻描述（生成规则见 description_engine）"""
+    from description_engine import STELE_FIELDS, generate_stele_description
+
+    record = {key: globals()["var_" + key].get() for key, _, _ in STELE_FIELDS}
+    description = generate_stele_description(record)
     
     # 更新结果
     result_var.set(description)
@@ -179,8 +116,12 @@ def _unbound_to_mousewheel(event):
     """鼠标离开组件时解绑滚轮事件"""
     _unbind_mousewheel(canvas)
 
-def main():
-    """主函数"""
+def main(master=None):
+    """
+    主函数
+    :param master: 为 None 时独立运行（创建 Tk 并进入主循环）；
+                   否则在 master 下创建 Toplevel 并立即返回，由调用方的事件循环驱动
+    """
     global root, var_total_height, var_total_width, var_total_thickness
     global var_crown_type, var_dragon_pattern, var_front_text, var_back_text
     global var_head_type, var_head_pattern, var_head_front_text, var_head_back_text
@@ -195,7 +136,7 @@ def main():
     # ----------------------------------------------------
     # 主窗口
     # ----------------------------------------------------
-    root = tk.Tk()
+    root = tk.Tk() if master is None else tk.Toplevel(master)
     root.title("碑刻描述生成器")
     root.geometry("1200x1200")
 
@@ -519,7 +460,9 @@ def main():
     # ----------------------------------------------------
     # 启动主循环
     # ----------------------------------------------------
-    root.mainloop()
+    if master is None:
+        root.mainloop()
+    return root
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""
+survey_importer.py
+
+批量导入已有的测量成果（RTK/GNSS 测点、历次勘界的边界）：
+-   CSV：经纬度列（十进制度数或度分秒，程序导出的坐标 CSV 可直接导回），或投影坐标 X/Y 列
+-   GeoJSON：点、线、面要素，坐标系取文件中的 crs 声明，未声明时按经纬度处理
+-   DXF：POINT、LINE、LWPOLYLINE / POLYLINE（闭合的作为多边形），坐标为投影坐标
+全部坐标合并为一个数组，一次批量投影变换、一次仿射逆变换换算为 DOM 像素坐标。
+ezdxf 在读取 DXF 时才导入。
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+from orthophoto_utils import dms_to_decimal_degrees_batch, get_transformer, map_to_pixels
+
+GEOGRAPHIC_CRS = "EPSG:4490"   # CSV 经纬度列的坐标系（CGCS2000）
+GEOJSON_DEFAULT_CRS = "EPSG:4326"
+
+# CSV 列名（不区分大小写），依次匹配
+_LON_COLUMNS = ("经度", "lon", "lng", "long", "longitude")
+_LAT_COLUMNS = ("纬度", "lat", "latitude")
+_X_COLUMNS = ("x", "东坐标", "e", "east", "easting")
+_Y_COLUMNS = ("y", "北坐标", "n", "north", "northing")
+_ALT_COLUMNS = ("海拔高程", "高程", "海拔", "alt", "altitude", "elevation", "h", "z")
+_TYPE_COLUMNS = ("测点类型", "类型", "type", "code", "编码")
+_DESC_COLUMNS = ("测点说明", "说明", "desc", "description", "name", "点名", "备注")
+
+
+class SurveyData:
+    """
+    读入的测量成果，坐标均位于 crs 坐标系（None 表示与 DOM 相同的投影坐标系）
+    """
+
+    def __init__(self, crs=None):
+        self.crs = crs
+        self.points = []     # 测点属性 {"type", "desc", "alt"}，alt 为 None 时由 DSM 采样
+        self.point_xy = []   # 测点坐标 (x, y)，与 points 一一对应
+        self.polygons = []   # 多边形顶点 (K, 2)，不含闭合点
+        self.lines = []      # 折线顶点 (K, 2)
+
+    def is_empty(self):
+        return not (self.points or self.polygons or self.lines)
+
+    def add_point(self, x, y, type_="", desc="", alt=None):
+        self.points.append({"type": type_, "desc": desc, "alt": alt})
+        self.point_xy.append((x, y))
+
+    def add_ring(self, coords):
+        ring = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+            ring = ring[:-1]
+        if len(ring) >= 3:
+            self.polygons.append(ring)
+
+    def add_line(self, coords):
+        line = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        if len(line) >= 2:
+            self.lines.append(line)
+
+    def to_pixels(self, transform, dataset_crs="EPSG:4548"):
+        """
+        换算为 DOM 像素坐标，返回 dict：
+        -   points：测点字典列表，含 col / row / type / desc / alt
+        -   polygons：(K, 2) 像素顶点数组列表
+        -   segments：(N, 2, 2) 像素线段数组（折线拆分为线段）
+        """
+        parts = [np.asarray(self.point_xy, dtype=np.float64).reshape(-1, 2)]
+        parts += self.polygons + self.lines
+        xy = np.concatenate(parts)
+        xs, ys = xy[:, 0], xy[:, 1]
+        if self.crs is not None and str(self.crs) != str(dataset_crs):
+            xs, ys = get_transformer(self.crs, dataset_crs).transform(xs, ys)
+        cols, rows = map_to_pixels(xs, ys, transform)
+        pixels = np.column_stack([cols, rows])
+
+        offsets = np.cumsum([len(p) for p in parts])[:-1]
+        point_px, *rest = np.split(pixels, offsets)
+        polygons = rest[:len(self.polygons)]
+        lines = rest[len(self.polygons):]
+
+        points = [dict(attrs, col=col, row=row)
+                  for attrs, (col, row) in zip(self.points, point_px.tolist())]
+        if lines:
+            segments = np.concatenate([np.stack([p[:-1], p[1:]], axis=1) for p in lines])
+        else:
+            segments = np.empty((0, 2, 2), dtype=np.float64)
+        return {"points": points, "polygons": polygons, "segments": segments}
+
+
+# ----------------------------------------------------------------------
+# CSV
+# ----------------------------------------------------------------------
+def _find_column(fieldnames, candidates):
+    lookup = {name.strip().lower(): name for name in fieldnames if name}
+    for candidate in candidates:
+        if candidate in lookup:
+            return lookup[candidate]
+    return None
+
+
+def _parse_alt(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_csv(path):
+    """
+    读取测点 CSV。有经度/纬度列时按经纬度（CGCS2000）处理，支持度分秒；
+    否则读取 X/Y 投影坐标列。测绘习惯中 X 为北坐标，若 X 列整体大于 Y 列则自动对调。
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        rows = [row for row in reader if any((v or "").strip() for v in row.values())]
+
+    lon_col, lat_col = _find_column(fieldnames, _LON_COLUMNS), _find_column(fieldnames, _LAT_COLUMNS)
+    if lon_col and lat_col:
+        survey = SurveyData(GEOGRAPHIC_CRS)
+        xs = dms_to_decimal_degrees_batch([row[lon_col] for row in rows])
+        ys = dms_to_decimal_degrees_batch([row[lat_col] for row in rows])
+    else:
+        x_col, y_col = _find_column(fieldnames, _X_COLUMNS), _find_column(fieldnames, _Y_COLUMNS)
+        if not (x_col and y_col):
+            raise ValueError("CSV 中未找到经度/纬度或 X/Y 坐标列")
+        survey = SurveyData()
+        xs = np.asarray([row[x_col] for row in rows], dtype=np.float64)
+        ys = np.asarray([row[y_col] for row in rows], dtype=np.float64)
+        if len(xs) and np.median(xs) > np.median(ys):
+            xs, ys = ys, xs
+
+    alt_col = _find_column(fieldnames, _ALT_COLUMNS)
+    type_col = _find_column(fieldnames, _TYPE_COLUMNS)
+    desc_col = _find_column(fieldnames, _DESC_COLUMNS)
+    for row, x, y in zip(rows, xs.tolist(), ys.tolist()):
+        survey.add_point(
+            x, y,
+            type_=(row.get(type_col) or "").strip() if type_col else "",
+            desc=(row.get(desc_col) or "").strip() if desc_col else "",
+            alt=_parse_alt(row.get(alt_col)) if alt_col else None,
+        )
+    return survey
+
+
+# ----------------------------------------------------------------------
+# GeoJSON
+# ----------------------------------------------------------------------
+def _geojson_crs(obj):
+    """解析旧式 GeoJSON 的 crs 声明，如 urn:ogc:def:crs:EPSG::4548"""
+    name = ((obj.get("crs") or {}).get("properties") or {}).get("name")
+    if not name:
+        return GEOJSON_DEFAULT_CRS
+    if name.upper().endswith("CRS84"):
+        return "EPSG:4326"
+    if name.lower().startswith("urn:ogc:def:crs:"):
+        parts = name.split(":")
+        return f"{parts[4]}:{parts[-1]}"
+    return name
+
+
+def _add_geometry(survey, geometry, properties):
+    kind = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if kind == "Point":
+        alt = properties.get("alt")
+        if alt is None and len(coords) > 2:
+            alt = coords[2]
+        survey.add_point(coords[0], coords[1],
+                         type_=str(properties.get("type") or properties.get("测点类型") or ""),
+                         desc=str(properties.get("desc") or properties.get("name")
+                                  or properties.get("测点说明") or ""),
+                         alt=_parse_alt(alt))
+    elif kind == "MultiPoint":
+        for point in coords:
+            _add_geometry(survey, {"type": "Point", "coordinates": point}, properties)
+    elif kind == "LineString":
+        survey.add_line([c[:2] for c in coords])
+    elif kind == "MultiLineString":
+        for line in coords:
+            survey.add_line([c[:2] for c in line])
+    elif kind == "Polygon":
+        if coords:
+            survey.add_ring([c[:2] for c in coords[0]])  # 只取外环
+    elif kind == "MultiPolygon":
+        for polygon in coords:
+            if polygon:
+                survey.add_ring([c[:2] for c in polygon[0]])
+    elif kind == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            _add_geometry(survey, child, properties)
+
+
+def read_geojson(path):
+    """读取 GeoJSON（FeatureCollection、单个 Feature 或几何对象）"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        obj = json.load(f)
+    survey = SurveyData(_geojson_crs(obj))
+    if obj.get("type") == "FeatureCollection":
+        features = obj.get("features", [])
+    elif obj.get("type") == "Feature":
+        features = [obj]
+    else:
+        features = [{"geometry": obj, "properties": {}}]
+    for feature in features:
+        if feature.get("geometry"):
+            _add_geometry(survey, feature["geometry"], feature.get("properties") or {})
+    return survey
+
+
+# ----------------------------------------------------------------------
+# DXF
+# ----------------------------------------------------------------------
+def read_dxf(path):
+    """
+    读取 DXF 模型空间：POINT 作为测点（图层名为测点类型，非零 Z 值为高程），
+    LINE 与未闭合的多段线作为直线，闭合的多段线作为多边形
+    """
+    import ezdxf
+
+    survey = SurveyData()
+    msp = ezdxf.readfile(path).modelspace()
+    for entity in msp.query("POINT LINE LWPOLYLINE POLYLINE"):
+        kind = entity.dxftype()
+        if kind == "POINT":
+            x, y, z = entity.dxf.location
+            survey.add_point(x, y, type_=entity.dxf.layer, alt=z if z else None)
+        elif kind == "LINE":
+            start, end = entity.dxf.start, entity.dxf.end
+            survey.add_line([(start[0], start[1]), (end[0], end[1])])
+        elif kind == "LWPOLYLINE":
+            points = [(x, y) for x, y in entity.get_points("xy")]
+            if entity.closed:
+                survey.add_ring(points)
+            else:
+                survey.add_line(points)
+        elif kind == "POLYLINE":
+            points = [(v[0], v[1]) for v in entity.points()]
+            if entity.is_closed:
+                survey.add_ring(points)
+            else:
+                survey.add_line(points)
+    return survey
+
+
+_READERS = {
+    ".csv": read_csv,
+    ".txt": read_csv,
+    ".geojson": read_geojson,
+    ".json": read_geojson,
+    ".dxf": read_dxf,
+}
+
+
+def read_survey(path):
+    """按扩展名读取测量成果文件，返回 SurveyData"""
+    ext = os.path.splitext(path)[1].lower()
+    reader = _READERS.get(ext)
+    if reader is None:
+        raise ValueError(f"不支持的文件类型: {ext}")
+    return reader(path)
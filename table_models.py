@@ -0,0 +1,137 @@
+"""
+table_models.py
+
+测点表、标注表的数据模型（配合 QTableView 使用）：
+-   数据按列存放，表格只在绘制可见行时读取单元格，行数再多也不创建单元格对象
+-   批量追加一次发出 rowsInserted，清空一次发出 modelReset，不再逐行 insertRow / setItem
+-   排序与筛选在模型内完成：只维护一个“显示行 -> 数据行”的序号表，数据本身保持录入顺序
+"""
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """
+    列式存储的只读表格模型
+    """
+
+    def __init__(self, headers, numeric_columns=(), parent=None):
+        """
+        :param headers: 列标题
+        :param numeric_columns: 按数值排序的列号（无法转为数值的单元格排在最后）
+        """
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.numeric_columns = set(numeric_columns)
+        self._columns = [[] for _ in self.headers]
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._filter_text = ""
+        self._filter_column = None
+        self._view = None  # 显示行 -> 数据行；None 表示未排序、未筛选（按录入顺序全部显示）
+
+    # ------------------------------------------------------------------
+    # Qt 模型接口
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._view) if self._view is not None else len(self._columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        value = self._columns[index.column()][self.source_row(index.row())]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """由表头点击触发；column < 0 时恢复录入顺序"""
+        self.layoutAboutToBeChanged.emit()
+        self._sort_column, self._sort_order = column, order
+        self._rebuild_view()
+        self.layoutChanged.emit()
+
+    # ------------------------------------------------------------------
+    # 数据
+    # ------------------------------------------------------------------
+    def source_row(self, row):
+        """显示行号 -> 数据行号（录入顺序）"""
+        return self._view[row] if self._view is not None else row
+
+    def append_rows(self, rows):
+        """
+        批量追加行，rows 为与列标题等长的序列
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        if self._view is None:
+            start = len(self._columns[0])
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self._extend(rows)
+            self.endInsertRows()
+        else:
+            # 已排序或筛选时新行的位置不定，整体重建显示顺序
+            self.beginResetModel()
+            self._extend(rows)
+            self._rebuild_view()
+            self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        for column in self._columns:
+            column.clear()
+        self._rebuild_view()
+        self.endResetModel()
+
+    def set_filter(self, text, column=None):
+        """
+        只显示包含 text 的行；column 为 None 时在所有列中查找，text 为空时取消筛选
+        """
+        self.beginResetModel()
+        self._filter_text = text.strip()
+        self._filter_column = column
+        self._rebuild_view()
+        self.endResetModel()
+
+    def _extend(self, rows):
+        for column, values in zip(self._columns, zip(*rows)):
+            column.extend(values)
+
+    def _rebuild_view(self):
+        n = len(self._columns[0])
+        if self._sort_column < 0 and not self._filter_text:
+            self._view = None
+            return
+        rows = range(n)
+        if self._filter_text:
+            columns = (self._columns if self._filter_column is None
+                       else [self._columns[self._filter_column]])
+            needle = self._filter_text
+            rows = [i for i in rows if any(needle in str(col[i]) for col in columns)]
+        rows = list(rows)
+        if self._sort_column >= 0:
+            values = self._columns[self._sort_column]
+            if self._sort_column in self.numeric_columns:
+                keys = [_numeric_key(v) for v in values]
+            else:
+                keys = ["" if v is None else str(v) for v in values]
+            rows.sort(key=keys.__getitem__, reverse=self._sort_order == Qt.DescendingOrder)
+        self._view = rows
+
+
+def _numeric_key(value):
+    try:
+        return (0, float(value))
+    except (TypeError, ValueError):
+        return (1, 0.0)
@@ -0,0 +1,129 @@
+"""
+thumbnail_cache.py
+
+描述工具参考图片的缩略图缓存：
+-   缩略图按 (文件绝对路径, 修改时间, 文件大小, 目标尺寸) 生成键，保存为磁盘上的小 PNG，
+    原图未变化时之后每次打开都直接读取，不再解码并 LANCZOS 缩放原图
+-   缓存命中时由 Tk 直接读取 PNG，无需导入 PIL
+-   LazyThumbnailLoader：滚动表单中的图片先显示占位，滚动到可见范围时才加载
+
+直接运行本文件可预先为 pic/ 目录生成缩略图。
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+
+DEFAULT_SIZE = (80, 80)
+
+
+def default_cache_dir():
+    """缓存目录：用户目录下的 .siputoolkit/thumbnails（打包后程序目录为临时目录，不宜写入）"""
+    return os.path.join(os.path.expanduser("~"), ".siputoolkit", "thumbnails")
+
+
+class ThumbnailCache:
+    """
+    磁盘缩略图缓存
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+
+    def key(self, image_path, size=DEFAULT_SIZE):
+        """缓存键：原图路径、修改时间、大小及目标尺寸任一变化都会生成新的缩略图"""
+        st = os.stat(image_path)
+        raw = f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, image_path, size=DEFAULT_SIZE):
+        """
+        返回缩略图 PNG 的路径，缓存中没有时生成
+        """
+        thumb_path = os.path.join(self.cache_dir, self.key(image_path, size) + ".png")
+        if not os.path.exists(thumb_path):
+            try:
+                self._render(image_path, size, thumb_path)
+            except OSError:
+                # 用户目录不可写时退回系统临时目录
+                self.cache_dir = os.path.join(tempfile.gettempdir(), "siputoolkit_thumbnails")
+                thumb_path = os.path.join(self.cache_dir, os.path.basename(thumb_path))
+                if not os.path.exists(thumb_path):
+                    self._render(image_path, size, thumb_path)
+        return thumb_path
+
+    def _render(self, image_path, size, thumb_path):
+        """缩放原图并写入缓存（先写临时文件再改名，避免并发时读到半个文件）"""
+        from PIL import Image
+
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        with Image.open(image_path) as img:
+            resized = img.resize(size, Image.Resampling.LANCZOS)
+        tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+        resized.save(tmp_path, format="PNG")
+        os.replace(tmp_path, thumb_path)
+
+    def warm(self, image_paths, size=DEFAULT_SIZE):
+        """预先生成一批缩略图，返回生成（或已存在）的数量"""
+        count = 0
+        for path in image_paths:
+            self.get(path, size)
+            count += 1
+        return count
+
+
+class LazyThumbnailLoader:
+    """
+    Tk 滚动区域内的缩略图按需加载：
+    图片位置先放置同尺寸的空白占位图，滚动区域可见范围变化时只加载进入可见范围的图片
+    """
+
+    def __init__(self, scroll_canvas, cache=None, size=DEFAULT_SIZE):
+        """
+        :param scroll_canvas: 承载滚动表单的 tk.Canvas
+        """
+        import tkinter as tk
+
+        self.canvas = scroll_canvas
+        self.cache = cache or ThumbnailCache()
+        self.size = size
+        self.placeholder = tk.PhotoImage(master=scroll_canvas, width=size[0], height=size[1])
+        self.pending = []  # [(label, 原图路径)]
+
+    def add(self, label, image_path):
+        """登记一个显示缩略图的 Label（应已设置 image=self.placeholder）"""
+        self.pending.append((label, image_path))
+
+    def load_visible(self, *_):
+        """加载当前可见范围内尚未加载的图片"""
+        if not self.pending or not self.canvas.winfo_ismapped():
+            return
+        top = self.canvas.winfo_rooty()
+        bottom = top + self.canvas.winfo_height()
+        remaining = []
+        for label, image_path in self.pending:
+            y = label.winfo_rooty()
+            if label.winfo_ismapped() and y + label.winfo_height() >= top and y <= bottom:
+                self._load(label, image_path)
+            else:
+                remaining.append((label, image_path))
+        self.pending = remaining
+
+    def _load(self, label, image_path):
+        import tkinter as tk
+
+        try:
+            img = tk.PhotoImage(master=label, file=self.cache.get(image_path, self.size))
+        except Exception as e:
+            print(f"Error loading image {image_path}: {e}")
+            return
+        label.configure(image=img)
+        label.image = img  # 保持引用，防止被回收
+
+
+if __name__ == "__main__":
+    pic_dir = sys.argv[1] if len(sys.argv) > 1 else "pic"
+    paths = [os.path.join(pic_dir, name) for name in sorted(os.listdir(pic_dir))
+             if name.lower().endswith(".png")]
+    print(f"已生成 {ThumbnailCache().warm(paths)} 个缩略图")
@@ -0,0 +1,248 @@
+"""
+tiled_raster.py
+
+按窗口分块读取 DOM 的栅格后端：
+-   只读取当前视图范围覆盖到的 rasterio 窗口，不再一次性 dataset.read() 整幅影像
+-   读取结果按 (抽稀倍数, 块列号, 块行号) 切分为固定大小的瓦片
+-   已解码瓦片保存在有上限的 LRU 缓存中，内存占用保持平稳
+-   多分辨率金字塔：优先使用 GeoTIFF 内置概视图 (overviews)，
+    没有概视图时构建抽稀层级，缩放/平移的代价与影像大小无关
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+class _PyramidBase:
+    """
+    金字塔公共逻辑：层级选择、瓦片范围计算与瓦片拼接。
+    子类需提供 width / height / tile_size / levels 以及 read_tile()。
+    """
+
+    def choose_level(self, ratio):
+        """
+        根据"每个屏幕像素对应的影像像素数"选择层级：
+        取不超过 ratio 的最大层级，保证显示分辨率不低于屏幕分辨率
+        """
+        factor = self.levels[0]
+        for level in self.levels:
+            if level <= ratio:
+                factor = level
+        return factor
+
+    def tile_range(self, col0, row0, col1, row1, factor=1):
+        """
+        返回覆盖原始像素范围 [col0, col1) x [row0, row1) 的瓦片编号范围
+        (tx0, ty0, tx1, ty1)（闭区间）；范围落在影像外时返回 None
+        """
+        span = self.tile_size * factor
+        col0 = max(0, int(col0))
+        row0 = max(0, int(row0))
+        col1 = min(self.width, int(np.ceil(col1)))
+        row1 = min(self.height, int(np.ceil(row1)))
+        if col1 <= col0 or row1 <= row0:
+            return None
+        return col0 // span, row0 // span, (col1 - 1) // span, (row1 - 1) // span
+
+    def read_region(self, col0, row0, col1, row1, factor=1):
+        """
+        读取原始像素范围 [col0, col1) x [row0, row1) 并按 factor 抽稀，
+        返回 (数组, extent)。extent 为 imshow 使用的 (left, right, bottom, top)，
+        与直接 imshow 整幅影像时的像素坐标系一致。
+        """
+        tiles = self.tile_range(col0, row0, col1, row1, factor)
+        if tiles is None:
+            return None, None
+        tx0, ty0, tx1, ty1 = tiles
+
+        rows = []
+        for ty in range(ty0, ty1 + 1):
+            rows.append(np.concatenate(
+                [self.read_tile(factor, tx, ty) for tx in range(tx0, tx1 + 1)], axis=1
+            ))
+        mosaic = np.concatenate(rows, axis=0)
+
+        # 瓦片拼接后覆盖的原始像素范围
+        span = self.tile_size * factor
+        left, top = tx0 * span, ty0 * span
+        right = min(self.width, (tx1 + 1) * span)
+        bottom = min(self.height, (ty1 + 1) * span)
+        extent = (left - 0.5, right - 0.5, bottom - 0.5, top - 0.5)
+        if mosaic.ndim == 3 and mosaic.shape[2] == 1:
+            mosaic = mosaic[:, :, 0]
+        return mosaic, extent
+
+    def _tile_bounds(self, factor, tx, ty):
+        """瓦片覆盖的原始像素范围 (col0, row0, col1, row1)"""
+        span = self.tile_size * factor
+        col0 = tx * span
+        row0 = ty * span
+        return col0, row0, min(self.width, col0 + span), min(self.height, row0 + span)
+
+    def _coarse_levels(self):
+        """2 的幂抽稀层级，直到整幅影像可放入一个瓦片"""
+        levels = [1]
+        while max(self.width, self.height) / levels[-1] > self.tile_size:
+            levels.append(levels[-1] * 2)
+        return levels
+
+    def clear_cache(self):
+        """清空缓存（默认无缓存）"""
+
+
+class TiledRaster(_PyramidBase):
+    """
+    包装一个 rasterio dataset，按需读取并缓存瓦片。
+
+    瓦片坐标以"抽稀倍数 factor"为层级：factor=1 为原始分辨率，
+    factor=2 时每个瓦片覆盖 2 倍的原始像素范围，依此类推。
+    若影像含内置概视图，层级即为概视图倍数，读取时由 GDAL 直接取概视图；
+    否则首次需要粗层级时，按条带读取一幅抽稀缩略图，粗层级瓦片均由其切片得到。
+    缩略图也可由后台线程读取后通过 set_thumbnail() 传入，期间粗层级显示为空白瓦片。
+    """
+
+    def __init__(self, dataset, tile_size=512, max_cache_bytes=256 * 1024 * 1024,
+                 thumbnail_size=2048):
+        """
+        :param dataset: 已打开的 rasterio dataset
+        :param tile_size: 瓦片边长（输出像素）
+        :param max_cache_bytes: 瓦片缓存的最大字节数
+        :param thumbnail_size: 无概视图时抽稀缩略图的最大边长
+        """
+        self.dataset = dataset
+        self.tile_size = tile_size
+        self.max_cache_bytes = max_cache_bytes
+        self.width = dataset.width
+        self.height = dataset.height
+        self.count = dataset.count
+        self.transform = dataset.transform
+
+        self._tiles = OrderedDict()  # (factor, tx, ty) -> HxWxC 数组
+        self._cache_bytes = 0
+
+        try:
+            self.overview_factors = sorted(dataset.overviews(1))
+        except Exception:
+            self.overview_factors = []
+
+        if self.overview_factors:
+            self.levels = [1] + [f for f in self.overview_factors if f > 1]
+            self.thumbnail_factor = None
+        else:
+            self.levels = self._coarse_levels()
+            self.thumbnail_factor = 1
+            while max(self.width, self.height) / self.thumbnail_factor > thumbnail_size:
+                self.thumbnail_factor *= 2
+        self._thumbnail = None
+        self.thumbnail_pending = False  # 缩略图由后台线程读取中，粗层级暂不读取文件
+
+    @property
+    def shape(self):
+        """与 H x W x 波段 数组一致的形状"""
+        return (self.height, self.width, self.count)
+
+    def read_tile(self, factor, tx, ty):
+        """
+        读取 (或从缓存取出) 指定瓦片，返回 H x W x 波段 数组
+        """
+        key = (factor, tx, ty)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        col0, row0, col1, row1 = self._tile_bounds(factor, tx, ty)
+        if self.thumbnail_factor is not None and factor >= self.thumbnail_factor > 1:
+            # 无概视图时，粗层级直接从缩略图切片
+            t = self.thumbnail_factor
+            step = factor // t
+            rows = slice(row0 // t, -(-row1 // t), step)
+            cols = slice(col0 // t, -(-col1 // t), step)
+            if self._thumbnail is None and self.thumbnail_pending:
+                # 缩略图尚未就绪：返回空白瓦片，且不放入缓存
+                shape = (len(range(rows.start, rows.stop, step)),
+                         len(range(cols.start, cols.stop, step)), self.count)
+                return np.zeros(shape, dtype=self.dataset.dtypes[0])
+            tile = self.get_thumbnail()[rows, cols]
+        else:
+            from rasterio.windows import Window
+
+            out_w = max(1, -(-(col1 - col0) // factor))
+            out_h = max(1, -(-(row1 - row0) // factor))
+            data = self.dataset.read(
+                window=Window(col0, row0, col1 - col0, row1 - row0),
+                out_shape=(self.count, out_h, out_w)
+            )
+            tile = data.transpose((1, 2, 0))  # [height, width, channels]
+        tile = np.ascontiguousarray(tile)
+
+        self._tiles[key] = tile
+        self._cache_bytes += tile.nbytes
+        while self._cache_bytes > self.max_cache_bytes and len(self._tiles) > 1:
+            _, old = self._tiles.popitem(last=False)
+            self._cache_bytes -= old.nbytes
+        return tile
+
+    @property
+    def needs_thumbnail(self):
+        """粗层级是否依赖缩略图（无概视图且影像大于缩略图尺寸）"""
+        return self.thumbnail_factor is not None and self.thumbnail_factor > 1
+
+    def get_thumbnail(self, progress=None, cancelled=None):
+        """
+        返回整幅影像按 thumbnail_factor 抽稀后的缩略图 (H x W x 波段)。
+        按条带读取，避免一次性解码整幅原始影像。
+        :param progress: 可选回调，每读完一个条带以 0-100 的整数报告进度
+        :param cancelled: 可选回调，返回 True 时停止读取并返回 None（不缓存）
+        """
+        if self._thumbnail is None:
+            from rasterio.windows import Window
+
+            t = self.thumbnail_factor or 1
+            strip = self.tile_size * t
+            out_w = max(1, -(-self.width // t))
+            parts = []
+            for row0 in range(0, self.height, strip):
+                if cancelled is not None and cancelled():
+                    return None
+                win_h = min(strip, self.height - row0)
+                data = self.dataset.read(
+                    window=Window(0, row0, self.width, win_h),
+                    out_shape=(self.count, max(1, -(-win_h // t)), out_w)
+                )
+                parts.append(data.transpose((1, 2, 0)))
+                if progress is not None:
+                    progress(int(100 * (row0 + win_h) / self.height))
+            self._thumbnail = np.ascontiguousarray(np.concatenate(parts, axis=0))
+        return self._thumbnail
+
+    def set_thumbnail(self, thumbnail):
+        """
+        设置由其他线程（另一 dataset 句柄）读取的缩略图，需与 get_thumbnail() 的结果一致
+        """
+        self._thumbnail = np.ascontiguousarray(thumbnail)
+        self.thumbnail_pending = False
+
+    def clear_cache(self):
+        """清空瓦片缓存"""
+        self._tiles.clear()
+        self._cache_bytes = 0
+        self._thumbnail = None
+
+
+class ArrayPyramid(_PyramidBase):
+    """
+    对内存中的 H x W (x 波段) 数组构建抽稀金字塔。
+    各层级均为原数组的跨步视图，不额外占用内存。
+    """
+
+    def __init__(self, array, tile_size=512):
+        self.array = array
+        self.tile_size = tile_size
+        self.height, self.width = array.shape[:2]
+        self.levels = self._coarse_levels()
+
+    def read_tile(self, factor, tx, ty):
+        col0, row0, col1, row1 = self._tile_bounds(factor, tx, ty)
+        return self.array[row0:row1:factor, col0:col1:factor]
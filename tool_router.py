@@ -0,0 +1,81 @@
+"""
+tool_router.py
+
+画布工具的事件分发器：
+-   鼠标按下 / 移动 / 释放事件只在画布上连接一次，由分发器统一接收
+-   各绘图工具（坐标拾取、标注、多边形、尺寸标注、CAD 绘图）登记为具名工具，
+    同一时刻只有一个工具处于激活状态，事件只转发给该工具
+-   切换模式只改变当前工具，不新增 mpl_connect 回调，单次事件的开销与切换次数无关
+"""
+
+
+class ToolRouter:
+    """
+    由 ImageCanvas 创建（canvas.tool_router），各工具在初始化时登记
+    """
+
+    def __init__(self, canvas):
+        """
+        :param canvas: ImageCanvas 对象
+        """
+        self.canvas = canvas
+        self.tools = {}     # 工具名 -> {"on_press": ..., "on_motion": ..., "on_release": ..., "on_deactivate": ...}
+        self.active = None  # 当前激活的工具名
+        self.canvas.mpl_connect('button_press_event', self._on_press)
+        self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+        self.canvas.mpl_connect('button_release_event', self._on_release)
+
+    def register(self, name, on_press=None, on_motion=None, on_release=None, on_deactivate=None):
+        """
+        登记工具（同名工具重复登记时覆盖）。
+        on_deactivate 在工具被停用（包括被其他工具取代）时调用，用于清理临时状态。
+        """
+        self.tools[name] = {
+            "on_press": on_press,
+            "on_motion": on_motion,
+            "on_release": on_release,
+            "on_deactivate": on_deactivate,
+        }
+
+    def activate(self, name):
+        """
+        激活工具；若已有其他工具处于激活状态，先将其停用
+        """
+        if name not in self.tools:
+            raise KeyError(f"未登记的画布工具：{name}")
+        if self.active == name:
+            return
+        if self.active is not None:
+            self.deactivate(self.active)
+        self.active = name
+
+    def deactivate(self, name=None):
+        """
+        停用工具。name 为 None 时停用当前工具；name 不是当前工具时忽略。
+        先清除激活状态再调用 on_deactivate，回调中再次停用不会重复触发。
+        """
+        if self.active is None or (name is not None and name != self.active):
+            return
+        tool = self.tools[self.active]
+        self.active = None
+        if tool["on_deactivate"] is not None:
+            tool["on_deactivate"]()
+
+    def is_active(self, name):
+        return self.active == name
+
+    def _dispatch(self, handler_name, event):
+        if self.active is None:
+            return
+        handler = self.tools[self.active][handler_name]
+        if handler is not None:
+            handler(event)
+
+    def _on_press(self, event):
+        self._dispatch("on_press", event)
+
+    def _on_motion(self, event):
+        self._dispatch("on_motion", event)
+
+    def _on_release(self, event):
+        self._dispatch("on_release", event)
@@ -0,0 +1,190 @@
+"""
+vector_exporter.py
+
+将普查要素导出为带坐标系的矢量数据：
+-   测点（类型、说明、海拔、经纬度）、多边形（面积、周长）、CAD 直线三类要素
+-   坐标为项目投影坐标系（默认 EPSG:4548），由像素坐标批量换算
+-   GeoJSON 使用标准库逐要素流式写出；GeoPackage / Shapefile 通过 fiona 分批写出
+"""
+
+import json
+import os
+
+import numpy as np
+
+from orthophoto_utils import pixels_to_map
+
+LAYER_POINTS = "points"
+LAYER_POLYGONS = "polygons"
+LAYER_LINES = "lines"
+
+# 各图层的属性字段（Shapefile 字段名不超过 10 个字符）
+SCHEMAS = {
+    LAYER_POINTS: {
+        "geometry": "Point",
+        "properties": {"index": "int", "type": "str", "desc": "str", "alt": "float",
+                       "lat": "str", "lon": "str"},
+    },
+    LAYER_POLYGONS: {
+        "geometry": "Polygon",
+        "properties": {"index": "int", "area": "float", "perimeter": "float"},
+    },
+    LAYER_LINES: {
+        "geometry": "LineString",
+        "properties": {"index": "int", "color": "str", "length": "float"},
+    },
+}
+
+_FIONA_DRIVERS = {".gpkg": "GPKG", ".shp": "ESRI Shapefile"}
+_BATCH_SIZE = 1000
+
+
+def iter_point_features(coords, transform):
+    """
+    测点要素。coords 为 CoordinatePicker 的坐标列表，需含像素坐标 col / row
+    """
+    coords = [c for c in coords if "col" in c and "row" in c]
+    if not coords:
+        return
+    xs, ys = pixels_to_map([c["col"] for c in coords], [c["row"] for c in coords], transform)
+    for c, x, y in zip(coords, xs.tolist(), ys.tolist()):
+        yield LAYER_POINTS, {
+            "geometry": {"type": "Point", "coordinates": (x, y)},
+            "properties": {
+                "index": int(c["index"]),
+                "type": c["type"],
+                "desc": c["desc"],
+                "alt": float(c["alt"]),
+                "lat": c["lat"],
+                "lon": c["lon"],
+            },
+        }
+
+
+def iter_polygon_features(polygons, transform):
+    """
+    多边形要素。polygons 为 (K, 2) 像素顶点数组的列表；面积、周长按投影坐标计算
+    """
+    for index, polygon in enumerate(polygons, start=1):
+        polygon = np.asarray(polygon, dtype=np.float64)
+        xs, ys = pixels_to_map(polygon[:, 0], polygon[:, 1], transform)
+        area = 0.5 * abs(np.dot(xs, np.roll(ys, -1)) - np.dot(ys, np.roll(xs, -1)))
+        perimeter = np.hypot(np.roll(xs, -1) - xs, np.roll(ys, -1) - ys).sum()
+        ring = np.column_stack([xs, ys]).tolist()
+        ring.append(ring[0])
+        yield LAYER_POLYGONS, {
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+            "properties": {"index": index, "area": float(area), "perimeter": float(perimeter)},
+        }
+
+
+def iter_line_features(segments, colors, transform):
+    """
+    CAD 直线要素。segments 为 (N, 2, 2) 像素坐标数组
+    """
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+    if not len(segments):
+        return
+    xs, ys = pixels_to_map(segments[..., 0], segments[..., 1], transform)
+    lengths = np.hypot(xs[:, 1] - xs[:, 0], ys[:, 1] - ys[:, 0])
+    colors = colors or [""] * len(segments)
+    for index, (x, y, length, color) in enumerate(
+            zip(xs.tolist(), ys.tolist(), lengths.tolist(), colors), start=1):
+        yield LAYER_LINES, {
+            "geometry": {"type": "LineString", "coordinates": list(zip(x, y))},
+            "properties": {"index": index, "color": str(color), "length": float(length)},
+        }
+
+
+def iter_features(transform, coords=None, polygons=None, segments=None, segment_colors=None):
+    """
+    依次产出 (图层名, 要素) ，供各写出函数流式使用
+    """
+    yield from iter_point_features(coords or [], transform)
+    yield from iter_polygon_features(polygons or [], transform)
+    if segments is not None:
+        yield from iter_line_features(segments, segment_colors, transform)
+
+
+def write_geojson(out_path, features, crs="EPSG:4548"):
+    """
+    逐要素写出 GeoJSON FeatureCollection，图层名记录在 layer 属性中
+    """
+    authority, code = crs.split(":")
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "crs": ')
+        json.dump({"type": "name", "properties": {"name": f"urn:ogc:def:crs:{authority}::{code}"}}, f)
+        f.write(', "features": [\n')
+        for layer, feature in features:
+            if count:
+                f.write(",\n")
+            feature = {"type": "Feature", "geometry": feature["geometry"],
+                       "properties": dict(feature["properties"], layer=layer)}
+            json.dump(feature, f, ensure_ascii=False)
+            count += 1
+        f.write("\n]}\n")
+    return count
+
+
+def write_fiona(out_path, features, crs="EPSG:4548"):
+    """
+    通过 fiona 写出 GeoPackage（同一文件多图层）或 Shapefile（每个图层一个文件）。
+    要素按图层缓冲，每满一批写出一次。
+    """
+    import fiona
+
+    ext = os.path.splitext(out_path)[1].lower()
+    driver = _FIONA_DRIVERS[ext]
+    base = os.path.splitext(out_path)[0]
+    sinks = {}
+    buffers = {}
+    count = 0
+
+    def open_sink(layer):
+        if driver == "GPKG":
+            return fiona.open(out_path, "w", driver=driver, schema=SCHEMAS[layer],
+                              crs=crs, layer=layer, encoding="utf-8")
+        return fiona.open(f"{base}_{layer}.shp", "w", driver=driver, schema=SCHEMAS[layer],
+                          crs=crs, encoding="utf-8")
+
+    def flush(layer):
+        if buffers.get(layer):
+            sinks[layer].writerecords(buffers[layer])
+            buffers[layer] = []
+
+    try:
+        for layer, feature in features:
+            if layer not in sinks:
+                # GeoPackage 各图层需依次写完，切换图层前先关闭上一个
+                if driver == "GPKG":
+                    for other in list(sinks):
+                        flush(other)
+                        sinks.pop(other).close()
+                sinks[layer] = open_sink(layer)
+                buffers[layer] = []
+            buffers[layer].append(feature)
+            count += 1
+            if len(buffers[layer]) >= _BATCH_SIZE:
+                flush(layer)
+        for layer in list(sinks):
+            flush(layer)
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    return count
+
+
+def export_vector(out_path, transform, coords=None, polygons=None, segments=None,
+                  segment_colors=None, crs="EPSG:4548"):
+    """
+    按文件扩展名选择格式导出矢量要素：.geojson / .json / .gpkg / .shp
+    :return: 写出的要素数量
+    """
+    features = iter_features(transform, coords, polygons, segments, segment_colors)
+    ext = os.path.splitext(out_path)[1].lower()
+    if ext in (".geojson", ".json"):
+        return write_geojson(out_path, features, crs=crs)
+    if ext in _FIONA_DRIVERS:
+        return write_fiona(out_path, features, crs=crs)
+    raise ValueError(f"不支持的矢量格式：{ext}")
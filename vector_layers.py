@@ -0,0 +1,212 @@
+"""
+vector_layers.py
+
+以集合对象绘制大量矢量要素的图层（CAD 直线、多边形、尺寸线、测点）：
+-   几何存放在 NumPy 数组中，每种样式只用一个 LineCollection（多边形另加一个顶点标记对象）
+-   添加、删除、隐藏只修改数组与集合的路径列表，不再为每个要素创建 Line2D，
+    重绘耗时取决于顶点数，而不是图中对象的数量
+-   坐标轴被清空（重新加载影像时 ax.clear()）后，由画布的视图回调重新挂到坐标轴上
+"""
+
+import numpy as np
+from matplotlib.collections import Collection, LineCollection
+from matplotlib.colors import to_rgba, to_rgba_array
+from matplotlib.lines import Line2D
+from matplotlib.path import Path
+
+
+class _CollectionLayer:
+    """图层公共部分：一个 LineCollection 及其在坐标轴上的挂接"""
+
+    def __init__(self, ax, **style):
+        self.ax = ax
+        self.collection = LineCollection([], **style)
+        self.ax.add_collection(self.collection, autolim=False)
+
+    def artists(self):
+        return [self.collection]
+
+    def ensure_attached(self):
+        """坐标轴被清空后重新添加集合对象（作为画布的视图变化回调）"""
+        for artist in self.artists():
+            if artist not in self.ax.get_children():
+                if isinstance(artist, Collection):
+                    self.ax.add_collection(artist, autolim=False)
+                else:
+                    self.ax.add_line(artist)
+
+    def set_visible(self, visible):
+        for artist in self.artists():
+            artist.set_visible(visible)
+
+    def _paths(self):
+        # Collection.get_paths() 返回集合内部的路径列表，就地增删即可，不必重建全部路径
+        return self.collection.get_paths()
+
+
+class SegmentLayer(_CollectionLayer):
+    """
+    直线段图层：端点 (N, 2, 2) 与颜色 (N, 4) 存于按需扩容的数组
+    """
+
+    def __init__(self, ax, color='#0000FF', **style):
+        super().__init__(ax, **style)
+        self.default_color = to_rgba(color)
+        self._segments = np.empty((16, 2, 2), dtype=np.float64)
+        self._colors = np.empty((16, 4), dtype=np.float64)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def segments(self):
+        """(N, 2, 2) 像素坐标数组（只读视图）"""
+        view = self._segments[:self._n]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def colors(self):
+        """(N, 4) RGBA 数组（只读视图）"""
+        view = self._colors[:self._n]
+        view.flags.writeable = False
+        return view
+
+    def _reserve(self, n):
+        if n <= len(self._segments):
+            return
+        capacity = max(n, 2 * len(self._segments))
+        segments = np.empty((capacity, 2, 2), dtype=np.float64)
+        colors = np.empty((capacity, 4), dtype=np.float64)
+        segments[:self._n] = self._segments[:self._n]
+        colors[:self._n] = self._colors[:self._n]
+        self._segments, self._colors = segments, colors
+
+    def add(self, x0, y0, x1, y1, color=None):
+        """追加一条线段，返回其序号"""
+        return self.extend([[(x0, y0), (x1, y1)]], None if color is None else [color])
+
+    def extend(self, segments, colors=None):
+        """
+        批量追加线段，返回第一条的序号
+        :param segments: (M, 2, 2) 像素坐标
+        :param colors: 长度为 M 的颜色序列，None 时使用默认颜色
+        """
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        start, m = self._n, len(segments)
+        self._reserve(start + m)
+        self._segments[start:start + m] = segments
+        self._colors[start:start + m] = (self.default_color if colors is None
+                                         else to_rgba_array(list(colors)))
+        self._n += m
+        self.ensure_attached()
+        self._paths().extend(Path(seg) for seg in segments)
+        self._sync_colors()
+        return start
+
+    def remove(self, index):
+        """删除第 index 条线段（其后的线段序号减一）"""
+        n = self._n
+        self._segments[index:n - 1] = self._segments[index + 1:n]
+        self._colors[index:n - 1] = self._colors[index + 1:n]
+        self._n -= 1
+        del self._paths()[index]
+        self._sync_colors()
+
+    def clear(self):
+        self._n = 0
+        self._paths().clear()
+        self._sync_colors()
+
+    def _sync_colors(self):
+        self.collection.set_color(self._colors[:self._n])
+        self.collection.stale = True
+
+
+class RingLayer(_CollectionLayer):
+    """
+    闭合多边形图层：全部顶点存于一个 (M, 2) 数组，offsets 记录各多边形的起始位置；
+    边界线为一个 LineCollection，顶点标记为一个 Line2D（各多边形以 NaN 断开）
+    """
+
+    def __init__(self, ax, color="red", linestyle="--", marker="o"):
+        super().__init__(ax, colors=color, linestyles=linestyle)
+        self.markers = Line2D([], [], color=color, linestyle="none", marker=marker)
+        self.ax.add_line(self.markers)
+        self._vertices = np.empty((0, 2), dtype=np.float64)
+        self._offsets = [0]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def artists(self):
+        return [self.collection, self.markers]
+
+    def polygons(self):
+        """各多边形的 (K, 2) 顶点数组（不含闭合点）"""
+        return [self._vertices[a:b].copy() for a, b in zip(self._offsets[:-1], self._offsets[1:])]
+
+    def extend(self, polygons):
+        """批量追加多边形，polygons 为 (K, 2) 顶点序列的列表"""
+        rings = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polygons]
+        rings = [r for r in rings if len(r)]
+        if not rings:
+            return
+        for r in rings:
+            self._offsets.append(self._offsets[-1] + len(r))
+        self._vertices = np.concatenate([self._vertices] + rings)
+        self.ensure_attached()
+        self._paths().extend(Path(np.vstack([r, r[:1]]), closed=True) for r in rings)
+        self._sync()
+
+    def add(self, points):
+        self.extend([points])
+
+    def clear(self):
+        self._vertices = np.empty((0, 2), dtype=np.float64)
+        self._offsets = [0]
+        self._paths().clear()
+        self._sync()
+
+    def _sync(self):
+        """顶点标记：各多边形之间插入 NaN，避免连线"""
+        n = len(self)
+        if n:
+            gaps = np.insert(self._vertices, self._offsets[1:-1], np.nan, axis=0)
+            self.markers.set_data(gaps[:, 0], gaps[:, 1])
+        else:
+            self.markers.set_data([], [])
+        self.collection.stale = True
+
+
+class PointLayer(_CollectionLayer):
+    """
+    测点图层：坐标 (N, 2) 存于数组，全部测点由一个散点集合绘制
+    """
+
+    def __init__(self, ax, color="yellow", edgecolor="red", marker="o", size=20):
+        self.ax = ax
+        self.collection = ax.scatter(np.empty(0), np.empty(0), s=size, marker=marker,
+                                     facecolors=color, edgecolors=edgecolor, zorder=3)
+        self._xy = np.empty((0, 2), dtype=np.float64)
+
+    def __len__(self):
+        return len(self._xy)
+
+    def extend(self, xy):
+        """批量追加测点，xy 为 (M, 2) 像素坐标"""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        if not len(xy):
+            return
+        self._xy = np.concatenate([self._xy, xy])
+        self.ensure_attached()
+        self._sync()
+
+    def clear(self):
+        self._xy = np.empty((0, 2), dtype=np.float64)
+        self._sync()
+
+    def _sync(self):
+        self.collection.set_offsets(self._xy)
+        self.collection.stale = True